@@ -1,4 +1,7 @@
+import os
 import streamlit as st  # type: ignore
+from utils import tracing, warmup
+from utils.background import cancel_session_jobs
 
 # Import pages
 from page_views import (
@@ -9,43 +12,52 @@ from page_views import (
     model_evaluation,
     dashboard,
     model_comparison,
+    threshold_explorer,
     ai_assistant,
     project_background,
+    performance,
 )
 
 st.set_page_config(page_title="Hospital Readmission Predictor", layout="centered")
 st.title("🏥 Hospital Readmission Prediction System")
 
+PAGES = {
+    "🏠 Home": home,
+    "📖 Project Background": project_background,
+    "📝 Predict from Form": form_predict,
+    "📁 Upload CSV": csv_upload,
+    "📊 Model Evaluation": model_evaluation,
+    "🔍 Dataset Exploration": dataset_explorer,
+    "📈 Dashboard": dashboard,
+    "📌 Model Comparison": model_comparison,
+    "🎚️ Threshold Explorer": threshold_explorer,
+    "🤖 AI Assistant": ai_assistant,
+}
+
+# Admins open the app with ?admin=<ADMIN_TOKEN> to see the performance panel
+admin_token = os.getenv("ADMIN_TOKEN")
+if admin_token and st.query_params.get("admin") == admin_token:
+    PAGES["⏱️ Performance"] = performance
+
+tracing.start()
+warmup.start()
+
 # Sidebar Navigation
 st.sidebar.markdown("## 🚀 Navigation")
-choice = st.sidebar.radio("", [
-    "🏠 Home", 
-    "📖 Project Background",
-    "📝 Predict from Form", 
-    "📁 Upload CSV", 
-    "📊 Model Evaluation", 
-    "🔍 Dataset Exploration", 
-    "📈 Dashboard", 
-    "📌 Model Comparison", 
-    "🤖 AI Assistant"
-])
+choice = st.sidebar.radio("", list(PAGES))
+
+warmup_status = warmup.status()
+if warmup_status["enabled"] and not warmup_status["finished"]:
+    st.sidebar.caption("⏳ Loading models and data in the background...")
+elif warmup_status["finished"] and not warmup_status["ready"]:
+    st.sidebar.caption("⚠️ Warm-up finished with errors; some pages will load on first use.")
+
+# Drop this session's pending background work when the user navigates away
+if st.session_state.get("active_page") != choice:
+    cancel_session_jobs()
+    st.session_state["active_page"] = choice
 
 # Routing Logic
-if choice == "🏠 Home":
-    home.render()
-elif choice == "📖 Project Background":  
-    project_background.render()
-elif choice == "📝 Predict from Form":
-    form_predict.render()
-elif choice == "📁 Upload CSV":
-    csv_upload.render()
-elif choice == "📊 Model Evaluation":
-    model_evaluation.render()
-elif choice == "🔍 Dataset Exploration":
-    dataset_explorer.render()
-elif choice == "📈 Dashboard":
-    dashboard.render()
-elif choice == "📌 Model Comparison":
-    model_comparison.render()
-elif choice == "🤖 AI Assistant":
-    ai_assistant.render()
+page = PAGES[choice]
+with tracing.span(f"page.{page.__name__.rsplit('.', 1)[-1]}"):
+    page.render()
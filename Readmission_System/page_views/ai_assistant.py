@@ -4,7 +4,11 @@ import pandas as pd
 import numpy as np
 from utils.gemini_intent import get_user_intent, model
 from utils.ai_helpers import run_fallback_query, decode_dataframe
+from utils.dataset import dataset_statistics, load_dataset
+from utils.global_shap import load_global_shap
 from utils.mappings import encoding_maps
+from utils.shared_data import track_frame
+from utils.tracing import span
 
 def render():
     st.subheader("🤖 AI Assistant (Gemini Hybrid + Pandas Mode)")
@@ -13,7 +17,9 @@ def render():
     st.markdown("- How many male Asian patients were readmitted?")
     st.markdown("- How many patients aged 50–60 were not readmitted?")
 
-    df = pd.read_csv("data/FYP_Cleaned2.csv")
+    with span("ai_assistant.load_data"):
+        df = load_dataset()
+    track_frame("ai_assistant", df)
 
     user_query = st.text_input("Type your question here:")
 
@@ -54,8 +60,10 @@ def render():
 
                 else:
                     # Structured rule-based intent
-                    correlation_matrix = df.corr()
-                    feature_importances = {
+                    correlation_matrix = dataset_statistics()["corr"]
+                    # Dataset-wide mean |SHAP| of the deployed model once computed; notebook values until then
+                    shap_summary = load_global_shap()
+                    feature_importances = shap_summary["importance"] if shap_summary else {
                         "number_inpatient": 0.22,
                         "number_emergency": 0.18,
                         "number_of_visits": 0.16,
@@ -1,8 +1,36 @@
 # pages/csv_upload.py
 import streamlit as st # type: ignore
 import pandas as pd
-import numpy as np
-from utils.model_loader import load_model
+from utils.batch_jobs import FINAL_STATES, cancel_job, job_status, read_table, result_path, submit_job
+from utils.drift_monitor import PSI_MAJOR, PSI_MODERATE
+from utils.settings import get_cascade_config, get_decision_threshold
+from utils.tracing import span
+
+PREVIEW_ROWS = 1_000
+
+def _show_errors(errors):
+    bad_rows = errors["Row"].nunique()
+    st.warning(f"⚠️ {bad_rows} row(s) failed validation and were skipped ({len(errors)} problem(s)). "
+               "Row 1 is the first line below the header.")
+    with st.expander("Validation errors"):
+        st.dataframe(errors, use_container_width=True)
+        st.download_button(
+            label="📥 Download Error Report as CSV",
+            data=errors.to_csv(index=False).encode("utf-8"),
+            file_name="validation_errors.csv",
+            mime="text/csv"
+        )
+
+def _show_drift(summary, scoring_seconds, drift_seconds):
+    st.write("### 🌊 Drift vs. Training Data")
+    st.dataframe(summary, use_container_width=True)
+    major = summary.loc[summary["Status"].str.contains("Major"), "Feature"].tolist()
+    if major:
+        st.warning(f"⚠️ This batch differs strongly from the training data in: {', '.join(major)}. "
+                   "Predictions for these patients may be less reliable.")
+    overhead = drift_seconds / scoring_seconds if scoring_seconds else 0.0
+    st.caption(f"PSI < {PSI_MODERATE} stable, {PSI_MODERATE}–{PSI_MAJOR} moderate, ≥ {PSI_MAJOR} major shift. "
+               f"Drift check added {overhead:.1%} to scoring time.")
 
 def render():
     st.subheader("📄 Batch Prediction from CSV File (Top 10 Features)")
@@ -51,50 +79,120 @@ def render():
         mime="text/csv"
     )
 
+    # The cascade scores with full-feature models, so it is opt-in rather than picked by the file's columns
+    cascade = get_cascade_config()
+    use_cascade = False
+    if cascade is not None:
+        # Cascades saved without their own threshold can't be used: the Top 10 model's doesn't fit their scores
+        use_cascade = st.checkbox(
+            f"Score with the saved cascade (version {cascade['version']})",
+            disabled=cascade.get("threshold") is None,
+            help=f"{cascade['fast_model']} scores every row; rows between {cascade['band'][0]:.2f} and "
+                 f"{cascade['band'][1]:.2f} are re-scored by {', '.join(cascade['expensive_models'])}. "
+                 "The file must contain every column these models use."
+                 if cascade.get("threshold") is not None else
+                 "This cascade was saved without a decision threshold; save it again with --threshold."
+        )
+
     uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
 
-    if uploaded_file is not None:
+    # Each new upload becomes a background job; its id is kept in the URL so a
+    # reconnecting browser picks the same job up again
+    if uploaded_file is not None and st.session_state.get("csv_upload_file") != uploaded_file.file_id:
+        if use_cascade:
+            threshold, threshold_version = cascade["threshold"], cascade["version"]
+        else:
+            threshold, threshold_version = get_decision_threshold()
         try:
-            input_df = pd.read_csv(uploaded_file)
-
-            required_columns = [
-                "number_of_visits",
-                "number_inpatient",
-                "number_diagnoses",
-                "number_emergency",
-                "number_outpatient",
-                "admission_source_id",
-                "diabetesMed",
-                "numchange",
-                "time_in_hospital",
-                "num_lab_procedures"
-            ]
-
-            missing_cols = [col for col in required_columns if col not in input_df.columns]
-            if missing_cols:
-                st.error(f"❌ Missing columns in uploaded file: {missing_cols}")
-                return
-
-            # Map diabetesMed Yes/No to 1/0
-            input_df["diabetesMed"] = input_df["diabetesMed"].map({"Yes": 1, "No": 0})
-
-            # Load model
-            model = load_model("Top10Model/lightgbm_top10_randomsearch.pkl")
-
-            # Predict
-            predictions = model.predict(input_df[required_columns])
-            input_df["Prediction"] = ["Readmitted" if p == 1 else "Not Readmitted" for p in predictions]
-
-            st.success("✅ Predictions complete!")
-            st.dataframe(input_df)
-
-            csv_output = input_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Download Prediction Results as CSV",
-                data=csv_output,
-                file_name='batch_predictions.csv',
-                mime='text/csv',
-            )
-
+            with span("csv_upload.submit"):
+                job_id = submit_job(uploaded_file.getvalue(), uploaded_file.name, threshold, threshold_version,
+                                    use_cascade)
         except Exception as e:
-            st.error(f"❌ Error processing file: {e}")
+            st.error(f"❌ Could not start the batch job: {e}")
+            return
+        st.session_state["csv_upload_file"] = uploaded_file.file_id
+        st.query_params["job"] = job_id
+
+    job_id = st.query_params.get("job")
+    if job_id:
+        _render_job(job_id)
+
+def _format_seconds(seconds):
+    return f"{seconds / 60:.1f} min" if seconds >= 90 else f"{seconds:.0f} s"
+
+@st.fragment(run_every=1.0)
+def _job_progress(job_id):
+    status = job_status(job_id)
+    if status is None or status["state"] in FINAL_STATES:
+        # Re-render the whole page once so the results replace the progress view
+        st.rerun()
+
+    if status["state"] == "queued":
+        st.info("⏳ Waiting for a free worker...")
+    else:
+        st.progress(status["progress"], text=f"Scored {status['rows_done']:,} of {status['rows_total']:,} rows")
+        eta = _format_seconds(status["eta"]) if status["eta"] is not None else "—"
+        st.caption(f"{status['rows_per_second']:,.0f} rows/s · elapsed {_format_seconds(status['elapsed'])} · ETA {eta}")
+    if st.button("✖️ Cancel job"):
+        cancel_job(job_id)
+
+def _render_job(job_id):
+    status = job_status(job_id)
+    if status is None:
+        st.warning("This batch job no longer exists (results are kept for 24 hours).")
+        return
+
+    st.write(f"### 📦 Batch job: `{status['filename']}`")
+    if status["state"] not in FINAL_STATES:
+        _job_progress(job_id)
+        return
+
+    if status["state"] == "failed":
+        st.error(f"❌ Error processing file: {status['error']}")
+        return
+    if status["state"] == "interrupted":
+        st.error("❌ The server restarted while this job was running. Please upload the file again.")
+        return
+    if status["state"] == "cancelled":
+        st.warning(f"Job cancelled after {status['rows_done']:,} of {status['rows_total']:,} rows; "
+                   "the rows scored so far can still be downloaded.")
+    else:
+        st.success(f"✅ Predictions complete! {status['rows_scored']:,} rows in {_format_seconds(status['elapsed'])} "
+                   f"({status['rows_per_second']:,.0f} rows/s).")
+
+    errors = read_table(job_id, "errors.csv")
+    if errors is not None:
+        _show_errors(errors)
+    if not status["rows_scored"]:
+        st.error("❌ No valid rows to score.")
+        return
+
+    if status["cascade_band"]:
+        low, high = status["cascade_band"]
+        st.caption(f"Cascade decision threshold {status['threshold']:.2f} (cascade version {status['threshold_version']}).")
+        st.caption(f"Cascade scoring: {status['escalated_rows'] / max(status['rows_scored'], 1):.1%} of rows fell in the uncertainty band "
+                   f"{low:.2f}–{high:.2f} and were re-scored by the larger model(s).")
+    else:
+        st.caption(f"Decision threshold {status['threshold']:.2f} (version {status['threshold_version']}).")
+    if status["rows_scored"] > PREVIEW_ROWS:
+        st.caption(f"Showing the first {PREVIEW_ROWS:,} rows; download the file for all of them.")
+    st.dataframe(read_table(job_id, "part-00000.csv", nrows=PREVIEW_ROWS))
+
+    drift = read_table(job_id, "drift.csv")
+    if drift is not None:
+        if status["cascade_band"]:
+            # Score drift is only profiled for the Top 10 model's scores
+            drift = drift[drift["Feature"] != "Model score"]
+        _show_drift(drift, status["scoring_seconds"], status["drift_seconds"])
+
+    # Read only when the button is clicked, not on every rerun of this view
+    def _result_bytes():
+        with open(result_path(job_id), "rb") as f:
+            return f.read()
+
+    st.download_button(
+        label="📥 Download Prediction Results as CSV",
+        data=_result_bytes,
+        file_name='batch_predictions.csv',
+        mime='text/csv',
+    )
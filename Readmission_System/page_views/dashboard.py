@@ -1,36 +1,116 @@
 # pages/dashboard.py
+import os
+from datetime import datetime
 import streamlit as st  # type: ignore
-import pandas as pd
-import plotly.express as px
+import numpy as np
+from utils.cohort_export import EXPORT_DIR, export_cohort
+from utils.dataset import DATA_PATH, load_dataset
+from utils.figures import (
+    DISPLAY_MAPS, DISTRIBUTIONS, MEDICATION_COLORS, admission_type_figure, calibration_figure,
+    calibration_frame, discharge_figure, distribution_figure, medication_usage_figure, readmission_count_figure,
+)
+from utils.score_cache import N_DECILES, cohort_scores, decile_rows
+from utils.shared_data import decoded_column, track_frame
+from utils.tracing import span
+
+TOP_DECILE_ROWS = 50
+# Larger exports stay on the server instead of being sent through the browser
+DOWNLOAD_LIMIT_MB = 200
+
+def _codes(mapping, labels):
+    return [code for code, label in mapping.items() if label in labels]
+
+def _render_export(filters, extra_columns, count):
+    with st.expander(f"📤 Export the {count:,} matching encounters"):
+        fmt = st.radio("Format", ["CSV", "Parquet"], horizontal=True)
+        decode = st.checkbox("Decoded labels (e.g. Male/Female instead of 1/0)", value=True)
+        if not st.button("Export"):
+            return
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"cohort-{datetime.now():%Y%m%d-%H%M%S}.{fmt.lower()}")
+        bar = st.progress(0.0)
+
+        def progress(scanned, total, written):
+            bar.progress(scanned / total, text=f"Scanned {scanned:,} of {total:,} rows, {written:,} written")
+
+        # Streams the filter over the shared dataset in chunks; the filtered frame above is never copied
+        with span("dashboard.export"):
+            result = export_cohort(path, filters, fmt.lower(), decode, extra_columns=extra_columns, progress=progress)
+        st.success(f"✅ {result['rows_written']:,} rows ({result['bytes'] / 1e6:.1f} MB) in {result['seconds']:.2f}s, "
+                   f"{result['rows_per_second']:,.0f} rows/s scanned.")
+        if result["bytes"] > DOWNLOAD_LIMIT_MB * 1e6:
+            st.info(f"Saved on the server as `{path}`.")
+            return
+        with open(path, "rb") as f:
+            st.download_button(
+                label=f"📥 Download {os.path.basename(path)}",
+                data=f.read(),
+                file_name=os.path.basename(path),
+                mime="text/csv" if fmt == "CSV" else "application/octet-stream",
+                on_click="ignore"
+            )
+
+def _render_risk(df, filtered_df, cohort):
+    st.write("### 🎯 Predicted Risk (Top 10 Model)")
+    decile = filtered_df["risk_decile"].to_numpy()
+    observed = filtered_df["readmitted"].to_numpy()
+    predicted = filtered_df["predicted_risk"].to_numpy()
+
+    # Observed vs. predicted for the current filter combination
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Observed Readmission Rate", f"{observed.mean():.2%}")
+    col2.metric("Mean Predicted Risk", f"{predicted.mean():.2%}",
+                delta=f"{predicted.mean() - observed.mean():+.2%} vs. observed", delta_color="off")
+    col3.metric("Patients in Top Risk Decile", f"{(decile == N_DECILES).sum():,}")
+
+    calibration = calibration_frame(decile, observed, predicted, cohort["bands"])
+    st.plotly_chart(calibration_figure(calibration))
+
+    # Top-decile patients: the decile index is already sorted by risk
+    in_filter = np.zeros(len(df), dtype=bool)
+    in_filter[filtered_df.index.to_numpy()] = True
+    top_rows = decile_rows(cohort, N_DECILES)
+    top_rows = top_rows[in_filter[top_rows]][:TOP_DECILE_ROWS]
+    with st.expander(f"🚩 Highest-risk patients in the current filter (top {TOP_DECILE_ROWS} of decile {N_DECILES})"):
+        top = df.iloc[top_rows][[
+            "predicted_risk", "readmitted_display", "age", "gender", "race", "number_inpatient",
+            "number_emergency", "number_of_visits", "time_in_hospital", "admission_source_id",
+        ]]
+        st.dataframe(top.rename(columns={"predicted_risk": "Predicted Risk", "readmitted_display": "Outcome"}),
+                     use_container_width=True)
+    st.caption(f"Scores from {cohort['model_version']}, computed once for every encounter in the dataset.")
 
 def render():
     st.subheader("📊 Interactive Dashboard")
 
     # Load dataset
-    df = pd.read_csv("data/FYP_Cleaned2.csv")
+    with span("dashboard.load_data"):
+        df = load_dataset()
 
     # Mappings
-    readmit_map = {0: "Not Readmitted", 1: "Readmitted"}
-    gender_map = {0: 'Female', 1: 'Male'}
-    race_map = {0: 'Caucasian', 1: 'AfricanAmerican', 2: 'Other', 3: 'Asian', 4: 'Hispanic'}
-    adm_type_map = {0: "Emergency", 1: "Urgent", 2: "Elective", 3: "Newborn", 4: "Trauma"}
-    discharge_map = {
-        0: "Home", 1: "Transfer", 2: "Expired", 3: "Hospice", 4: "Left AMA", 5: "Still Patient"
-    }
-    admission_source_map = {
-    0: "Referral",
-    1: "Transfer from Healthcare Facility",
-    2: "Emergency",
-    3: "Birth/Neonatal",
-    4: "Readmission/Home Health"
-    }
+    readmit_map = DISPLAY_MAPS["readmitted"]
+    gender_map = DISPLAY_MAPS["gender"]
+    race_map = DISPLAY_MAPS["race"]
+    adm_type_map = DISPLAY_MAPS["admission_type_id"]
+    discharge_map = DISPLAY_MAPS["discharge_disposition_id"]
+    admission_source_map = DISPLAY_MAPS["admission_source_id"]
+
+    with span("dashboard.decode"):
+        df["readmitted_display"] = decoded_column(DATA_PATH, "readmitted", readmit_map)
+        df["gender"] = decoded_column(DATA_PATH, "gender", gender_map)
+        df["race"] = decoded_column(DATA_PATH, "race", race_map)
+        df["admission_type_id"] = decoded_column(DATA_PATH, "admission_type_id", adm_type_map)
+        df["discharge_disposition_id"] = decoded_column(DATA_PATH, "discharge_disposition_id", discharge_map)
+        df["admission_source_id"] = decoded_column(DATA_PATH, "admission_source_id", admission_source_map)
 
-    df["readmitted_display"] = df["readmitted"].map(readmit_map)
-    df["gender"] = df["gender"].map(gender_map)
-    df["race"] = df["race"].map(race_map)
-    df["admission_type_id"] = df["admission_type_id"].map(adm_type_map)
-    df["discharge_disposition_id"] = df["discharge_disposition_id"].map(discharge_map)
-    df["admission_source_id"] = df["admission_source_id"].map(admission_source_map)
+    with span("dashboard.risk_scores"):
+        try:
+            cohort = cohort_scores()
+            df["predicted_risk"] = cohort["probability"]
+            df["risk_decile"] = cohort["decile"]
+        except Exception as e:
+            cohort = None
+            st.sidebar.caption(f"Predicted risk unavailable: {e}")
 
     # Sidebar filters (Dynamic)
     st.sidebar.write("### 🧰 Filters")
@@ -40,7 +120,7 @@ def render():
         "Readmitted","Gender", "Race", "Age", "Admission Type",
         "Discharge Disposition", "Admission Source ID",
         "Diabetes Medication", "Medication Change",
-        "Number of Visits", "Time in Hospital"
+        "Number of Visits", "Time in Hospital", "Predicted Risk Decile"
     ]
     selected_filters = st.sidebar.multiselect("🧩 Choose filters to apply:", available_filters, default=["Gender", "Race", "Age"])
 
@@ -111,19 +191,52 @@ def render():
     else:
         selected_time = (int(df["time_in_hospital"].min()), int(df["time_in_hospital"].max()))
 
-    filtered_df = df[
-    (df["readmitted_display"].isin(selected_readmit))  &
-    (df["gender"].isin(selected_gender)) &
-    (df["race"].isin(selected_race)) &
-    (df["age"].between(selected_age[0], selected_age[1])) &
-    (df["admission_type_id"].isin(selected_adm_types)) &
-    (df["discharge_disposition_id"].isin(selected_discharges)) &
-    (df["admission_source_id"].isin(selected_adm_sources)) &
-    (df["diabetesMed"].isin(selected_diabetes_med)) &
-    (df["change"].isin(selected_change)) &
-    (df["number_of_visits"].between(selected_visits[0], selected_visits[1])) &
-    (df["time_in_hospital"].between(selected_time[0], selected_time[1]))
-    ]   
+    if "Predicted Risk Decile" in selected_filters and cohort is not None:
+        selected_deciles = st.sidebar.slider("Predicted Risk Decile (10 = highest risk)", 1, N_DECILES, (1, N_DECILES))
+    else:
+        selected_deciles = (1, N_DECILES)
+
+    with span("dashboard.filter"):
+        filtered_df = df[
+        (df["risk_decile"].between(selected_deciles[0], selected_deciles[1]) if cohort is not None else True) &
+        (df["readmitted_display"].isin(selected_readmit))  &
+        (df["gender"].isin(selected_gender)) &
+        (df["race"].isin(selected_race)) &
+        (df["age"].between(selected_age[0], selected_age[1])) &
+        (df["admission_type_id"].isin(selected_adm_types)) &
+        (df["discharge_disposition_id"].isin(selected_discharges)) &
+        (df["admission_source_id"].isin(selected_adm_sources)) &
+        (df["diabetesMed"].isin(selected_diabetes_med)) &
+        (df["change"].isin(selected_change)) &
+        (df["number_of_visits"].between(selected_visits[0], selected_visits[1])) &
+        (df["time_in_hospital"].between(selected_time[0], selected_time[1]))
+        ]   
+
+    track_frame("dashboard", df)
+    track_frame("dashboard (filtered)", filtered_df)
+
+    # The same selection on the encoded columns, for streaming exports
+    export_filters = []
+    active = {
+        "Readmitted": ("readmitted", "in", _codes(readmit_map, selected_readmit)),
+        "Gender": ("gender", "in", _codes(gender_map, selected_gender)),
+        "Race": ("race", "in", _codes(race_map, selected_race)),
+        "Age": ("age", "between", selected_age),
+        "Admission Type": ("admission_type_id", "in", _codes(adm_type_map, selected_adm_types)),
+        "Discharge Disposition": ("discharge_disposition_id", "in", _codes(discharge_map, selected_discharges)),
+        "Admission Source ID": ("admission_source_id", "in", _codes(admission_source_map, selected_adm_sources)),
+        "Diabetes Medication": ("diabetesMed", "in", selected_diabetes_med),
+        "Medication Change": ("change", "in", selected_change),
+        "Number of Visits": ("number_of_visits", "between", selected_visits),
+        "Time in Hospital": ("time_in_hospital", "between", selected_time),
+        "Predicted Risk Decile": ("risk_decile", "between", selected_deciles),
+    }
+    for name in selected_filters:
+        if name in active and (name != "Predicted Risk Decile" or cohort is not None):
+            export_filters.append(active[name])
+    extra_columns = None
+    if cohort is not None:
+        extra_columns = {"predicted_risk": cohort["probability"].to_numpy(), "risk_decile": cohort["decile"].to_numpy()}
 
     # If no data after filtering
     if filtered_df.empty:
@@ -143,98 +256,49 @@ def render():
         rate = filtered_df["readmitted"].mean()
         st.metric(label="🔁 Readmission Rate", value=f"{rate:.2%}")
 
+    _render_export(export_filters, extra_columns, count)
+
     st.markdown("---")
 
+    if cohort is not None:
+        _render_risk(df, filtered_df, cohort)
+        st.markdown("---")
+
     # ----------------------------
     # Graphs & Visual Insights
     # ----------------------------
 
     # Readmission Overview
     st.write("### 🔄 Readmission Distribution")
-    readmit_counts = filtered_df["readmitted"].value_counts().sort_index()
-    st.plotly_chart(
-        px.bar(
-            x=readmit_counts.index.map({0: "No", 1: "Yes"}),
-            y=readmit_counts.values,
-            labels={"x": "Readmitted", "y": "Count"},
-            title="Readmission Count",
-            color=readmit_counts.index.map({0: "No", 1: "Yes"}),
-            color_discrete_sequence=["#1f77b4", "#ff7f0e"]
-        )
-    )
+    st.plotly_chart(readmission_count_figure(filtered_df))
     # Key Feature Distributions
     st.write("### 📈 Key Feature Distributions")
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(px.histogram(
-            filtered_df, x="number_of_visits", nbins=30, title="Number of Visits",
-            color_discrete_sequence=["#6a5acd"]
-        ))
+        st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[0]))
     with col2:
-        st.plotly_chart(px.histogram(
-            filtered_df, x="time_in_hospital", nbins=15, title="Time in Hospital",
-            color_discrete_sequence=["#20b2aa"]
-        ))
+        st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[1]))
 
-    st.plotly_chart(px.histogram(
-        filtered_df, x="number_diagnoses", nbins=15, title="Number of Diagnoses",
-        color_discrete_sequence=["#ffa07a"]
-    ))
+    st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[2]))
 
     # Clinical & Utilization Metrics
     st.write("### 🏥 Clinical and Utilization Metrics")
     col3, col4 = st.columns(2)
     with col3:
-        st.plotly_chart(px.histogram(
-            filtered_df, x="num_lab_procedures", nbins=20, title="Lab Procedures",
-            color_discrete_sequence=["#8a2be2"]
-        ))
+        st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[3]))
 
     with col4:
-        st.plotly_chart(px.histogram(
-            filtered_df, x="num_medications", nbins=20, title="Medications",
-            color_discrete_sequence=["#2ca02c"]
-        ))
-
-    st.plotly_chart(px.histogram(
-        filtered_df, x="numchange", nbins=10, title="Medication Changes",
-        color_discrete_sequence=["#d62728"]
-    ))
+        st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[4]))
+
+    st.plotly_chart(distribution_figure(filtered_df, *DISTRIBUTIONS[5]))
     # Admission & Discharge
     st.write("### 🏷️ Admission & Discharge Patterns")
 
-    adm_df = filtered_df["admission_type_id"].value_counts().reset_index()
-    adm_df.columns = ["Admission Type", "Count"]
-    st.plotly_chart(px.bar(
-        adm_df, x="Admission Type", y="Count", title="Admission Type Distribution",
-        color="Admission Type", color_discrete_sequence=px.colors.qualitative.Pastel
-    ))
-
-    dis_df = filtered_df["discharge_disposition_id"].value_counts().reset_index()
-    dis_df.columns = ["Discharge Disposition", "Count"]
-    st.plotly_chart(px.bar(
-        dis_df, x="Discharge Disposition", y="Count", title="Discharge Disposition Distribution",
-        color="Discharge Disposition", color_discrete_sequence=px.colors.qualitative.Set3
-    ))
+    st.plotly_chart(admission_type_figure(filtered_df))
+    st.plotly_chart(discharge_figure(filtered_df))
 
     # Diabetes Medication Use
     st.write("### 💊 Diabetes Medication Usage")
-    color_map = {
-        "metformin": "#9b59b6",
-        "insulin": "#f39c12",
-        "glipizide": "#16a085"
-    }
-    for med in ["metformin", "insulin", "glipizide"]:
+    for med in MEDICATION_COLORS:
         if med in filtered_df.columns:
-            med_counts = filtered_df[med].value_counts().sort_index()
-            labels = med_counts.index.map({0: "No", 1: "Yes"})
-            usage_df = pd.DataFrame({
-                "Usage": labels,
-                "Count": med_counts.values
-            })
-            st.plotly_chart(px.bar(
-                usage_df, x="Usage", y="Count", title=f"{med.capitalize()} Usage",
-                color="Usage",
-                color_discrete_sequence=[color_map[med], "#95a5a6"]
-            ))
-
+            st.plotly_chart(medication_usage_figure(filtered_df, med))
@@ -3,32 +3,37 @@ import streamlit as st # type: ignore
 import pandas as pd
 import plotly.express as px
 from st_aggrid import AgGrid, GridOptionsBuilder # type: ignore
+from utils.dataset import DATA_PATH, dataset_statistics, load_dataset
+from utils.global_shap import load_global_shap
+from utils.shared_data import decoded_column, track_frame
+from utils.tracing import span
 
 def render():
     st.subheader("📊 Explore Dataset Features")
 
    
     # Load dataset
-    df = pd.read_csv("data/FYP_Cleaned2.csv")
+    with span("dataset_explorer.load_data"):
+        df = load_dataset()
 
 # ========== Reverse Encoding ==========
     # Race
     race_map = {0: 'Caucasian', 1: 'AfricanAmerican', 2: 'Other', 3: 'Asian', 4: 'Hispanic'}
-    df['race'] = df['race'].map(race_map)
+    df['race'] = decoded_column(DATA_PATH, 'race', race_map)
 
     # Gender
     gender_map = {0: 'Female', 1: 'Male'}
-    df['gender'] = df['gender'].map(gender_map)
+    df['gender'] = decoded_column(DATA_PATH, 'gender', gender_map)
 
     # Readmitted
     readmit_map = {0: 'Not Readmitted', 1: 'Readmitted'}
-    df['readmitted'] = df['readmitted'].map(readmit_map)
+    df['readmitted'] = decoded_column(DATA_PATH, 'readmitted', readmit_map)
 
     # Change
-    df['change'] = df['change'].map({0: 'No', 1: 'Ch'})
+    df['change'] = decoded_column(DATA_PATH, 'change', {0: 'No', 1: 'Ch'})
 
     # DiabetesMed
-    df['diabetesMed'] = df['diabetesMed'].map({0: 'No', 1: 'Yes'})
+    df['diabetesMed'] = decoded_column(DATA_PATH, 'diabetesMed', {0: 'No', 1: 'Yes'})
 
     # Admission Source
     admission_source_map = {
@@ -38,7 +43,7 @@ def render():
         3: 'Birth/Neonatal',
         4: 'Readmission/Home Health'
     }
-    df['admission_source_id'] = df['admission_source_id'].map(admission_source_map)
+    df['admission_source_id'] = decoded_column(DATA_PATH, 'admission_source_id', admission_source_map)
 
     # Admission Type
     admission_type_map = {
@@ -48,7 +53,7 @@ def render():
         3: 'Newborn',
         4: 'Trauma Center'
     }
-    df['admission_type_id'] = df['admission_type_id'].map(admission_type_map)
+    df['admission_type_id'] = decoded_column(DATA_PATH, 'admission_type_id', admission_type_map)
 
     # Discharge Disposition
     discharge_map = {
@@ -59,15 +64,15 @@ def render():
         4: 'Left AMA',
         5: 'Still Patient'
     }
-    df['discharge_disposition_id'] = df['discharge_disposition_id'].map(discharge_map)
+    df['discharge_disposition_id'] = decoded_column(DATA_PATH, 'discharge_disposition_id', discharge_map)
 
     # A1Cresult
     a1c_map = {0: 'None', 1: 'Norm', 2: '>7', 3: '>8'}
-    df['A1Cresult'] = df['A1Cresult'].map(a1c_map)
+    df['A1Cresult'] = decoded_column(DATA_PATH, 'A1Cresult', a1c_map)
 
     # Max Glucose Serum
     glu_map = {0: 'None', 1: 'Norm', 2: '>200', 3: '>300'}
-    df['max_glu_serum'] = df['max_glu_serum'].map(glu_map)
+    df['max_glu_serum'] = decoded_column(DATA_PATH, 'max_glu_serum', glu_map)
 
     # Diagnosis (optional)
     diag_map = {
@@ -75,7 +80,8 @@ def render():
         5: 'Injury', 6: 'Musculoskeletal', 7: 'Genitourinary',
         8: 'Neoplasms', 9: 'Other'
     }
-    df['diag_1'] = df['diag_1'].map(diag_map)
+    df['diag_1'] = decoded_column(DATA_PATH, 'diag_1', diag_map)
+    track_frame("dataset_explorer", df)
 
     # Navigation within page
     sub_page = st.selectbox(
@@ -85,7 +91,8 @@ def render():
             "Summary Statistics",
             "Univariate Features",
             "Bivariate Features",
-            "Correlation Analysis"
+            "Correlation Analysis",
+            "Model Feature Importance (SHAP)"
         ])
 
     categorical_cols = [
@@ -230,8 +237,7 @@ def render():
         st.caption("📊 This table summarizes key statistics such as mean, standard deviation, and range for numerical features.")
 
         num_summary = (
-            df[numerical_cols]
-            .describe()
+            dataset_statistics()["describe"][numerical_cols]
             .transpose()
             .round(2)
             .reset_index()
@@ -302,12 +308,9 @@ def render():
     elif sub_page == "Correlation Analysis":
         st.write("### 🔗 Correlation Heatmap of Numerical Features")
 
-        # Re-encode readmitted for correlation
-        corr_df = df.copy()
-        corr_df['readmitted'] = corr_df['readmitted'].map({'Not Readmitted': 0, 'Readmitted': 1})
-
-        # Compute correlation
-        corr_matrix = corr_df[numerical_cols + ['readmitted']].corr().round(2)
+        # Precomputed on the encoded data, where readmitted is already 0/1
+        corr_cols = numerical_cols + ['readmitted']
+        corr_matrix = dataset_statistics()["corr"].loc[corr_cols, corr_cols].round(2)
 
         fig = px.imshow(
             corr_matrix,
@@ -327,4 +330,38 @@ def render():
         top_corr = corr_matrix['readmitted'].drop('readmitted').sort_values(key=abs, ascending=False)
         top_corr_df = top_corr.reset_index().rename(columns={'index': 'Feature', 'readmitted': 'Correlation'})
 
-        st.table(top_corr_df.head(10))
\ No newline at end of file
+        st.table(top_corr_df.head(10))
+
+    # -------------------- Model Feature Importance --------------------
+    elif sub_page == "Model Feature Importance (SHAP)":
+        summary = load_global_shap()
+        if summary is None:
+            st.info("The SHAP summary for the current model and dataset hasn't been computed yet. "
+                    "Run `python -m utils.global_shap` once; it spreads the work across all cores.")
+            return
+
+        st.write("### 🧠 Global Feature Importance (mean |SHAP|)")
+        importance = summary["mean_abs"].sort_values().reset_index()
+        importance.columns = ["Feature", "Mean |SHAP|"]
+        fig = px.bar(importance, x="Mean |SHAP|", y="Feature", orientation="h", color_discrete_sequence=['#636EFA'])
+        fig.update_layout(title="Average impact on the model output (log-odds)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.write("### 📈 Dependence")
+        shap_feature = st.selectbox("Feature:", list(summary["mean_abs"].index))
+        dependence = summary["dependence"][shap_feature]
+        fig = px.scatter(dependence, x="value", y="mean_shap", error_y="std_shap", size="count",
+                         labels={"value": shap_feature, "mean_shap": "Mean SHAP (log-odds)"},
+                         color_discrete_sequence=['#00CC96'])
+        fig.add_hline(y=0, line_dash="dot")
+        fig.update_layout(title=f"SHAP value of {shap_feature} by feature value (± 1 std)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        if summary["interactions"] is not None:
+            st.write("### 🔀 Interactions (mean |SHAP interaction|)")
+            fig = px.imshow(summary["interactions"].round(3), text_auto=True, color_continuous_scale='Blues', aspect='auto')
+            fig.update_layout(title="Diagonal: main effect; off-diagonal: pairwise interaction")
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.caption(f"{summary['model_version']} on {summary['n_rows']:,} encounters "
+                   f"(interactions on a sample of {summary['interaction_rows']:,}), computed {summary['computed_at']}.")
@@ -1,16 +1,21 @@
 # pages/form_predict.py
 import streamlit as st # type: ignore
-import numpy as np
 import pandas as pd
-from utils.model_loader import load_model
-from utils.shap_plot import generate_shap_plot, explain_with_gemini
+from utils.audit_log import record_predictions
+from utils.counterfactuals import MODIFIABLE, describe_change, find_counterfactuals
+from utils.dataset import TOP10_FEATURES
+from utils.model_loader import DEFAULT_MODEL_PATH, get_model, model_version
+from utils.schema import validate_top10
+from utils.settings import get_decision_threshold
+from utils.similar_patients import DEFAULT_K, similar_patients
+from utils.tracing import span
+from utils.shap_plot import compute_shap, generate_shap_plot, explain_with_gemini, render_gemini_explanation
+
+_RESULT_KEY = "form_predict_result"
 
 def render():
     st.subheader("Manual Input Form (Top 10 Features + SHAP Explanation)")
 
-    # Mapping for diabetesMed
-    diabetesMed_map = {"Yes": 1, "No": 0}
-
     # Grouped admission source mapping
     admission_source_options = {
         "Referral (Clinic, Physician, HMO)": 0,
@@ -79,43 +84,110 @@ def render():
         help="Number of lab tests performed during the encounter."
     )
 
+    inputs = {
+        "number_of_visits": number_of_visits,
+        "number_inpatient": number_inpatient,
+        "number_diagnoses": number_diagnoses,
+        "number_emergency": number_emergency,
+        "number_outpatient": number_outpatient,
+        "admission_source_id": admission_source_id,
+        "diabetesMed": diabetesMed,
+        "numchange": numchange,
+        "time_in_hospital": time_in_hospital,
+        "num_lab_procedures": num_lab_procedures
+    }
+
     # ------------------ Prediction ------------------ #
     if st.button("Predict Readmission"):
         try:
-            # Prepare input
-            input_data = np.array([[
-                number_of_visits,
-                number_inpatient,
-                number_diagnoses,
-                number_emergency,
-                number_outpatient,
-                admission_source_id,
-                diabetesMed_map[diabetesMed],
-                numchange,
-                time_in_hospital,
-                num_lab_procedures
-            ]])
-            feature_names = [
-                "number_of_visits", "number_inpatient", "number_diagnoses",
-                "number_emergency", "number_outpatient", "admission_source_id",
-                "diabetesMed", "numchange", "time_in_hospital", "num_lab_procedures"
-            ]
-            input_df = pd.DataFrame(input_data, columns=feature_names)
+            # Prepare input (same schema checks as batch CSV scoring)
+            input_df, errors = validate_top10(pd.DataFrame([inputs]))
+            if len(errors):
+                st.session_state.pop(_RESULT_KEY, None)
+                for _, error in errors.iterrows():
+                    st.error(f"{error['Column']}: {error['Problem']}")
+                return
+            input_df = input_df[TOP10_FEATURES]
 
             # Load model
-            model = load_model("Top10Model/lightgbm_top10_randomsearch.pkl")
+            model = get_model(DEFAULT_MODEL_PATH)
 
             # Predict with probability
-            probability = float(model.predict_proba(input_df)[0][1])
-            prediction = 1 if probability >= 0.5 else 0
-            label = "Readmitted" if prediction == 1 else "Not Readmitted"
-
-            st.success(f"Prediction: **{label}**")
-            st.info(f"📊 Probability of Readmission: **{probability:.2%}**")
-
-            # SHAP Plot + Gemini Explanation
-            generate_shap_plot(model, input_df)
-            explain_with_gemini(model, input_df, prediction, probability)
+            with span("form_predict.predict"):
+                probability = float(model.predict_proba(input_df)[0][1])
+            threshold, threshold_version = get_decision_threshold()
+            prediction = 1 if probability >= threshold else 0
+            record_predictions(input_df, [probability], [prediction], model_version(DEFAULT_MODEL_PATH),
+                               threshold, threshold_version, "form")
+
+            # Similar past patients and what happened to them
+            with span("form_predict.similar"):
+                neighbours = similar_patients(input_df, k=DEFAULT_K)
+
+            # Smallest edits to modifiable features that bring the risk under the threshold
+            search = None
+            if prediction == 1:
+                with span("form_predict.counterfactuals"):
+                    search = find_counterfactuals(model, input_df, threshold)
+
+            # SHAP values now; the Gemini explanation runs in the background and fills in when ready
+            shap_row, base_value = compute_shap(model, input_df)
+            explain_with_gemini(input_df, shap_row, base_value, prediction, probability)
+
+            # Kept in the session: the explanation's completion reruns the page, where the
+            # button reads False again, so the result is redrawn from here
+            st.session_state[_RESULT_KEY] = dict(
+                inputs=inputs, input_df=input_df, probability=probability, prediction=prediction,
+                threshold=threshold, threshold_version=threshold_version, neighbours=neighbours,
+                search=search, shap_row=shap_row, base_value=base_value,
+            )
+        except Exception as e:
+            st.session_state.pop(_RESULT_KEY, None)
+            st.error(f"Something went wrong: {e}")
+            return
 
+    result = st.session_state.get(_RESULT_KEY)
+    # Editing any input hides the previous prediction until the button is pressed again
+    if result is not None and result["inputs"] == inputs:
+        try:
+            _render_prediction(result)
         except Exception as e:
             st.error(f"Something went wrong: {e}")
+
+
+def _render_prediction(result):
+    probability, prediction, threshold = result["probability"], result["prediction"], result["threshold"]
+    label = "Readmitted" if prediction == 1 else "Not Readmitted"
+    st.success(f"Prediction: **{label}**")
+    st.info(f"📊 Probability of Readmission: **{probability:.2%}**")
+    st.caption(f"Decision threshold {threshold:.2f} (version {result['threshold_version']}).")
+
+    neighbours = result["neighbours"]
+    st.write("### 👥 Similar Past Patients")
+    st.metric(f"Observed Readmission Rate ({len(neighbours)} most similar encounters)",
+              f"{neighbours['readmitted'].mean():.0%}")
+    with st.expander("Show similar patients"):
+        st.dataframe(
+            neighbours.assign(readmitted=neighbours["readmitted"].map({0: "Not Readmitted", 1: "Readmitted"}))
+            .rename(columns={"readmitted": "Outcome", "distance": "Distance"}),
+            use_container_width=True
+        )
+        st.caption("Nearest encounters in the dataset on the Top 10 features (standardized Euclidean distance).")
+
+    search = result["search"]
+    if search is not None:
+        st.write("### 🛠️ What Could Lower This Risk")
+        if search["suggestions"]:
+            st.dataframe(pd.DataFrame([{
+                "Suggested Changes": "; ".join(describe_change(*change) for change in s["changes"]),
+                "New Probability": f"{s['probability']:.2%}",
+                "Change Size": round(s["cost"], 2),
+            } for s in search["suggestions"]]), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"No change to {', '.join(MODIFIABLE)} alone brings the risk under the threshold.")
+        st.caption(f"{search['candidates']:,} candidate edits scored in {search['seconds'] * 1000:.0f} ms. "
+                   "These are associations learned by the model, not clinical recommendations.")
+
+    # SHAP Plot + Gemini Explanation (explanation fills in when ready)
+    generate_shap_plot(result["input_df"], result["shap_row"], result["base_value"])
+    render_gemini_explanation()
@@ -23,6 +23,7 @@ def render():
     - **🔍 Dataset Exploration**: Filter and examine key patterns across demographic and clinical attributes.  
     - **📈 Dashboard**: Visualize trends across race, age, diagnoses, visit history, and hospital utilization.  
     - **📌 Model Comparison**: Compare various machine learning models evaluated throughout the project.  
+    - **🎚️ Threshold Explorer**: Pick the decision threshold by care-management capacity and the cost of missed or unnecessary follow-ups.  
     - **🤖 AI Assistant**: Ask questions using natural language and receive intelligent insights powered by Gemini + pandas.
     """)
 
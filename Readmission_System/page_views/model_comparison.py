@@ -1,65 +1,51 @@
 # pages/model_compare.py
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import joblib
 
-def render():
-    st.subheader("📌 Comparison of Top 5 Machine Learning Models")
+from utils.bootstrap import bootstrap_comparison
+from utils.figures import CI_METRICS, METRIC_COLORS, comparison_frame, metrics_comparison_figure, roc_comparison_figure
+from utils.metrics_catalog import FEATURED_METRICS_PATHS, list_entries, load_plot_roc_curve, model_path_for
+
+@st.cache_data(show_spinner="Resampling the holdout set (2,000 paired bootstrap replicates)...")
+def _bootstrap_results(model_paths):
+    return bootstrap_comparison(list(model_paths))
 
-    st.markdown("""
-    Below is a comparison of the top 5 models developed to predict hospital readmissions among diabetic patients.  
+def render():
+    # Every metrics pickle in EvaluationMetrics/ and BaseModelMetrics/ is indexed
+    # once per process; new files show up here without code changes.
+    entries = sorted(list_entries(), key=lambda e: e["roc_auc"] or 0, reverse=True)
+    if not entries:
+        st.error("❌ No evaluation metrics found in EvaluationMetrics/ or BaseModelMetrics/.")
+        return
+
+    # The curated five by default; any other catalogued model (new tuning runs,
+    # LiveMetrics/ re-evaluations) can be added
+    names = [entry["name"] for entry in entries]
+    featured = [entry["name"] for entry in entries if entry["path"] in FEATURED_METRICS_PATHS] or names[:5]
+    selected = st.multiselect("Models to compare:", options=names, default=featured)
+    entries = [entry for entry in entries if entry["name"] in selected]
+    if not entries:
+        st.info("Select at least one model to compare.")
+        return
+    top_n = len(entries)
+
+    st.subheader(f"📌 Comparison of {top_n} Machine Learning Models")
+
+    st.markdown(f"""
+    Below is a comparison of {top_n} models developed to predict hospital readmissions among diabetic patients.  
     Metrics were loaded directly from saved `.pkl` evaluation files.  
     Each hypertuned model was tuned using 5-fold cross-validation and evaluated based on ROC AUC, Precision, Recall, F1-Score, and Accuracy (for class 1: readmitted).
     """)
 
-    # Path to the top 5 metrics
-    model_info = {
-        "LightGBM with Random Search CV": "EvaluationMetrics/Lightgbm_Randomsearch_Metrics.pkl",
-        "CatBoost with Random Search CV": "EvaluationMetrics/CatBoost_Randomsearch_Metrics.pkl",
-        "LightGBM with Grid Search CV": "EvaluationMetrics/Lightgbm_Gridsearch_Metrics.pkl",
-        "XGBoost with Grid Search CV": "EvaluationMetrics/XGBoost_Gridsearch_Metrics.pkl",
-        "CatBoost Base Model": "BaseModelMetrics/catboost_base_metrics.pkl"
-    }
-
-    data = {
-        "Model": [],
-        "ROC AUC": [],
-        "Accuracy": [],
-        "Precision (1)": [],
-        "Recall (1)": [],
-        "F1-Score (1)": []
-    }
-
-    # Read metrics from each model
-    for model_name, file_path in model_info.items():
-        try:
-            metrics = joblib.load(file_path)
-            report = metrics["classification_report"]
-            auc = metrics["roc_auc"]
-            accuracy = metrics.get("accuracy", None)
-
-            if accuracy is None:
-                accuracy = report.get("accuracy", None)
+    # Path to each model's metrics file, keyed by display name; models saved without
+    # fpr/tpr arrays are left out of the ROC chart
+    model_info = {entry["name"]: entry["path"] for entry in entries if entry.get("has_roc")}
+    no_roc = [entry["name"] for entry in entries if not entry.get("has_roc")]
+    model_files = {entry["name"]: model_path_for(entry) for entry in entries}
 
-            precision = report["1"]["precision"]
-            recall = report["1"]["recall"]
-            f1 = report["1"]["f1-score"]
-
-            data["Model"].append(model_name)
-            data["ROC AUC"].append(round(auc, 4))
-            data["Accuracy"].append(round(accuracy, 4) if accuracy is not None else None)
-            data["Precision (1)"].append(round(precision, 4))
-            data["Recall (1)"].append(round(recall, 4))
-            data["F1-Score (1)"].append(round(f1, 4))
-
-        except Exception as e:
-            st.error(f"❌ Failed to load metrics for {model_name}: {e}")
-
-    # Create DataFrame and sort by ROC AUC
-    df_eval = pd.DataFrame(data).sort_values(by="ROC AUC", ascending=False).reset_index(drop=True)
-    df_eval["Rank"] = df_eval.index + 1
+    df_eval, failed = comparison_frame(entries)
+    for name, e in failed:
+        st.error(f"❌ Failed to load metrics for {name}: {e}")
 
     st.dataframe(df_eval)
 
@@ -77,60 +63,32 @@ def render():
             default=df_eval["Model"].tolist()[0:1]
         )
 
-    # Define metric and model colors
-    metric_colors = {
-        "ROC AUC": "skyblue",
-        "Accuracy": "lightgreen",
-        "Precision (1)": "lightcoral",
-        "Recall (1)": "plum",
-        "F1-Score (1)": "lightsalmon"
-    }
-    model_colors = px.colors.qualitative.Plotly  # will be used for single metric
-
     # Select metrics to show
-    available_metrics = list(metric_colors.keys())
+    available_metrics = list(METRIC_COLORS)
     metric_option = st.selectbox("Select metrics to display:", ["All"] + available_metrics)
-    metrics_to_plot = available_metrics if metric_option == "All" else [metric_option]
     filtered_df = df_eval[df_eval["Model"].isin(models_to_plot)]
 
-    fig = go.Figure()
-
-    # =============== CASE: ALL METRICS (Grouped, colored by metric) =============== #
-    if metric_option == "All":
-        for metric in metrics_to_plot:
-            fig.add_trace(go.Bar(
-                x=filtered_df["Model"],
-                y=filtered_df[metric],
-                name=metric,
-                marker_color=metric_colors.get(metric),
-                text=filtered_df[metric].round(4),
-                textposition='auto'
-            ))
-    # =============== CASE: ONE METRIC (Single, colored by model) =============== #
-    else:
-        metric = metrics_to_plot[0]
-        for idx, row in filtered_df.iterrows():
-            fig.add_trace(go.Bar(
-                x=[row["Model"]],
-                y=[row[metric]],
-                name=row["Model"],
-                marker_color=model_colors[idx % len(model_colors)],
-                text=f"{row[metric]:.4f}",
-                textposition='auto'
-            ))
-
-    fig.update_layout(
-        barmode="group",
-        title="Performance Metrics Comparison",
-        xaxis_title="Model",
-        yaxis_title="Score",
-        legend_title="Metric" if metric_option == "All" else "Model",
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white')
+    # ---------- Bootstrap Confidence Intervals ---------- #
+    show_ci = st.checkbox(
+        "Show 95% bootstrap confidence intervals",
+        help="Re-scores each model on the holdout set and resamples it 2,000 times. "
+             "Intervals are shown for ROC AUC, Accuracy and F1-Score (1), around each model's "
+             "re-scored value (◆), which can differ from the notebook value shown on the bar."
     )
-
+    intervals, bootstrap = {}, None
+    if show_ci:
+        ci_models = [m for m in filtered_df["Model"] if model_files.get(m)]
+        missing = [m for m in filtered_df["Model"] if not model_files.get(m)]
+        if missing:
+            st.caption(f"No saved model file for: {', '.join(missing)} — shown without intervals.")
+        if ci_models:
+            try:
+                bootstrap = _bootstrap_results(tuple(model_files[m] for m in ci_models))
+                intervals = {m: bootstrap["models"][model_files[m]] for m in ci_models}
+            except Exception as e:
+                st.warning(f"⚠️ Could not compute bootstrap intervals: {e}")
+
+    fig = metrics_comparison_figure(filtered_df, metric_option, intervals)
     st.plotly_chart(fig, use_container_width=True)
 
     # Dynamically update best model summary
@@ -143,6 +101,28 @@ def render():
         st.markdown(
             f"🔍 Based on the **{best_metric}**, the best model is **{best_model_name}** with a score of **{best_score:.4f}**."
         )
+
+    # ---------- Paired Significance Tests ---------- #
+    if bootstrap and len(intervals) > 1:
+        reference = next(m for m, path in model_files.items() if path == bootstrap["reference"])
+        st.markdown(f"#### 🎯 Paired Bootstrap Tests vs **{reference}**")
+        rows = []
+        for model, summary in intervals.items():
+            if model == reference:
+                continue
+            row = {"Model": model}
+            for label, key in CI_METRICS.items():
+                s = summary[key]
+                row[f"Δ {label}"] = round(s["diff_vs_reference"], 4)
+                row[f"Δ {label} 95% CI"] = f"[{s['diff_low']:.4f}, {s['diff_high']:.4f}]"
+                row[f"p ({label})"] = round(s["p_value"], 4)
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        st.caption(
+            f"Δ = reference minus model on the same {bootstrap['n_replicates']:,} resamples of "
+            f"{bootstrap['n_rows']:,} holdout rows. A CI that contains 0 (p ≥ 0.05) means the "
+            "difference is within resampling noise."
+        )
     # ---------- ROC AUC Curve Plot ---------- #
     st.markdown("### 🧪 ROC Curve Comparison")
 
@@ -153,6 +133,9 @@ def render():
         key="roc_view"
     )
 
+    if no_roc:
+        st.caption(f"No ROC curve saved for: {', '.join(no_roc)}.")
+
     if roc_view_option == "All Models":
         selected_roc_models = list(model_info.keys())
     else:
@@ -163,67 +146,20 @@ def render():
             key="roc_select"
         )
 
-    fig_auc = go.Figure()
-
-    # Custom line styles
-    line_styles = {
-        "LightGBM with Random Search CV": dict(color='skyblue', width=3),
-        "CatBoost with Random Search CV": dict(color='deepskyblue', dash='dot', width=3),
-        "LightGBM with Grid Search CV": dict(color='lightgreen', dash='dash', width=2),
-        "XGBoost with Grid Search CV": dict(color='salmon', width=2),
-        "CatBoost Base Model": dict(color='palegreen', dash='dashdot', width=2)
-    }
-
+    auc_by_model = dict(zip(df_eval["Model"], df_eval["ROC AUC"]))
+    curves = []
     for model_name in selected_roc_models:
         file_path = model_info[model_name]
+        fpr = tpr = None
         try:
-            metrics = joblib.load(file_path)
-            fpr = metrics.get("roc_curve", {}).get("fpr") or metrics.get("fpr")
-            tpr = metrics.get("roc_curve", {}).get("tpr") or metrics.get("tpr")
-            auc = metrics.get("roc_auc", None)
-
-            if fpr is not None and tpr is not None:
-                style = line_styles.get(model_name, {})
-                fig_auc.add_trace(go.Scatter(
-                    x=fpr,
-                    y=tpr,
-                    mode='lines',
-                    name=f"{model_name} (AUC = {auc:.4f})" if auc else model_name,
-                    line=style
-                ))
-            else:
+            # Curve arrays are only read from disk here, once per process, and
+            # reduced to a few hundred points before going to the browser
+            fpr, tpr, curve_info = load_plot_roc_curve(file_path)
+            if fpr is None or tpr is None:
                 st.warning(f"⚠️ ROC data missing for {model_name} — no fpr and tpr found.")
         except Exception as e:
             st.error(f"❌ Failed to load ROC for {model_name}: {e}")
+        curves.append((model_name, fpr, tpr, auc_by_model.get(model_name)))
 
-    # Diagonal reference line
-    fig_auc.add_trace(go.Scatter(
-        x=[0, 1],
-        y=[0, 1],
-        mode='lines',
-        name='Random Guess',
-        line=dict(color='gray', dash='dash'),
-        showlegend=True
-    ))
-
-    # Update layout
-    fig_auc.update_layout(
-        title=dict(
-            text="ROC Curve Comparison",
-            x=0.25,
-            font=dict(size=20)
-        ),
-        xaxis_title="False Positive Rate",
-        yaxis_title="True Positive Rate",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        legend=dict(
-            bgcolor='rgba(0,0,0,0.1)',
-            bordercolor='gray',
-            borderwidth=1
-        ),
-        height=500
-    )
-
+    fig_auc = roc_comparison_figure(curves)
     st.plotly_chart(fig_auc, use_container_width=True)
\ No newline at end of file
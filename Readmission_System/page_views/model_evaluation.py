@@ -1,8 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import joblib
 from utils.ai_helpers import explain_model_metrics_with_gemini
+from utils.background import submit, render_job_result
+from utils.figures import classification_report_frame, confusion_matrix_figure, roc_figure, style_classification_report
+from utils.metrics_catalog import EVALUATION_METRICS_PATH as METRICS_PATH, get_entry, load_plot_roc_curve
+
+def _render_metrics_explanation(gemini_explanation):
+    with st.expander("📘 What does this mean? (AI Explanation)"):
+        st.markdown(gemini_explanation)
 
 def render():
     st.subheader("📊 LightGBM Model Evaluation (Hyper-Tuning Random Search CV)")
@@ -14,18 +18,19 @@ def render():
     """)
 
     try:
-        # Load saved metrics
-        metrics = joblib.load("EvaluationMetrics/Lightgbm_Randomsearch_Metrics.pkl")
+        # Load saved metrics (shared per-process catalog; curve arrays load lazily)
+        metrics = get_entry(METRICS_PATH)
+        if metrics is None:
+            raise FileNotFoundError(METRICS_PATH)
+        if "error" in metrics:
+            raise ValueError(metrics["error"])
         report = metrics["classification_report"]
         cm = metrics["confusion_matrix"]
         roc_auc = metrics["roc_auc"]
         accuracy = metrics["accuracy"]
-        if "roc_curve" in metrics:
-            fpr = metrics["roc_curve"].get("fpr")
-            tpr = metrics["roc_curve"].get("tpr")
-        else:
-            fpr = metrics.get("fpr")
-            tpr = metrics.get("tpr")
+
+        # Start the Gemini interpretation now so it runs while the charts render
+        submit("metrics_explanation", explain_model_metrics_with_gemini, accuracy, roc_auc, report, key=METRICS_PATH)
 
         # ---------- Classification Report ---------- #
         st.write("### 🧾 Classification Report")
@@ -35,68 +40,12 @@ def render():
         - **F1-Score**: Harmonic mean of precision and recall  
         """)
 
-        report_df = pd.DataFrame(report).transpose()
-        report_df = report_df[["precision", "recall", "f1-score", "support"]].round(3)
-
-        # Format accuracy row
-        if "accuracy" in report_df.index:
-            report_df.loc["accuracy", ["precision", "recall", "f1-score"]] = report_df.loc["accuracy", "precision"]
-            report_df.loc["accuracy", "support"] = None
-
-        report_df["support"] = report_df["support"].apply(lambda x: f"{int(x):,}" if pd.notna(x) else "")
-
-        def dark_mode_friendly_style(report_df):
-            return (
-            report_df.style
-            .format("{:.3f}", subset=["precision", "recall", "f1-score"])
-            .apply(lambda s: ['background-color: #2e2f38; color: #f1f1f1']*len(s) if s.name == 'accuracy' else ['']*len(s), axis=1)
-            .background_gradient(cmap="PuBuGn", subset=["precision", "recall", "f1-score"], axis=None)
-            .set_properties(subset=["precision", "recall", "f1-score", "support"], **{
-                'text-align': 'center',
-                'font-size': '14px',
-                'padding': '8px',
-                'color': 'white',
-                'background-color': '#1e1e1e',
-                'border': '1px solid #3a3a3a'
-            })
-            .set_table_styles([
-                {"selector": "th", "props": [
-                    ("font-size", "14px"),
-                    ("text-align", "center"),
-                    ("color", "white"),
-                    ("background-color", "#111"),
-                    ("padding", "8px")
-                ]},
-                {"selector": "td", "props": [
-                    ("border", "1px solid #3a3a3a")
-                ]},
-                {"selector": "caption", "props": [
-                    ("caption-side", "top"),
-                    ("font-size", "16px"),
-                    ("color", "#ccc"),
-                    ("text-align", "center"),
-                    ("padding", "10px")
-                ]}
-            ])
-            .set_caption("📋 Detailed Classification Report")
-        )
-
-        styled_report = dark_mode_friendly_style(report_df)
-        st.dataframe(styled_report, use_container_width=True)
+        report_df = classification_report_frame(report)
+        st.dataframe(style_classification_report(report_df), use_container_width=True)
 
         # ---------- Confusion Matrix (Plotly) ---------- #
         st.write("### 📘 Confusion Matrix (Interactive)")
-        fig_cm = go.Figure(data=go.Heatmap(
-            z=cm,
-            x=["Predicted 0", "Predicted 1"],
-            y=["Actual 0", "Actual 1"],
-            colorscale="Blues",
-            showscale=True,
-            text=cm,
-            texttemplate="%{text}"
-        ))
-        fig_cm.update_layout(title="Confusion Matrix Heatmap", xaxis_title="Predicted", yaxis_title="Actual")
-        st.plotly_chart(fig_cm)
+        st.plotly_chart(confusion_matrix_figure(cm))
 
         # ---------- ROC AUC Score ---------- #
         st.write("### 🎯 ROC AUC Score")
@@ -109,36 +58,21 @@ def render():
 
         # ---------- ROC Curve ---------- #
         st.write("### 📈 ROC Curve")
-        fig_roc = go.Figure()
-        fig_roc.add_trace(go.Scatter(
-            x=fpr,
-            y=tpr,
-            mode='lines',
-            name='ROC Curve',
-            line=dict(color='blue')
-        ))
-        fig_roc.add_trace(go.Scatter(
-            x=[0, 1],
-            y=[0, 1],
-            mode='lines',
-            name='Random Guess',
-            line=dict(dash='dash', color='gray')
-        ))
-        fig_roc.update_layout(
-            xaxis_title='False Positive Rate',
-            yaxis_title='True Positive Rate',
-            title='ROC Curve',
-            width=700,
-            height=500
-        )
-        st.plotly_chart(fig_roc)
+        fpr, tpr, curve_info = load_plot_roc_curve(METRICS_PATH)
+        st.plotly_chart(roc_figure(fpr, tpr))
+        if curve_info:
+            st.caption(
+                f"Curve drawn with {curve_info['points_out']:,} of {curve_info['points_in']:,} points "
+                f"(AUC difference {curve_info['auc_error']:.1e})."
+            )
 
         # ---------- Gemini Explanation ---------- #
         st.write("### 🤖 Gemini Interpretation")
-        with st.spinner("Generating explanation with Gemini..."):
-            gemini_explanation = explain_model_metrics_with_gemini(accuracy, roc_auc, report)
-        with st.expander("📘 What does this mean? (AI Explanation)"):
-            st.markdown(gemini_explanation)
+        render_job_result(
+            "metrics_explanation",
+            _render_metrics_explanation,
+            pending_message="Generating explanation with Gemini...",
+        )
 
     except Exception as e:
         st.error(f"❌ Could not load evaluation metrics: {e}")
@@ -0,0 +1,112 @@
+# pages/performance.py
+import streamlit as st  # type: ignore
+import pandas as pd
+import plotly.express as px
+from utils.shared_data import process_rss, session_memory, shared_bytes
+from utils.tracing import BUCKETS, ENABLED, LOG_PATH, PORT, reset, snapshot
+from utils.warmup import status as warmup_status
+
+def _bucket_labels():
+    labels, low = [], 0.0
+    for high in BUCKETS:
+        labels.append(f"{low * 1000:g}–{high * 1000:g} ms")
+        low = high
+    return labels + [f"> {low:g} s"]
+
+def _render_warmup():
+    st.write("### 🔥 Warm-up")
+    current = warmup_status()
+    if not current["enabled"]:
+        st.info("Warm-up is disabled (`WARMUP=0`); models and data load on first use.")
+        return
+    if current["finished"]:
+        state = "✅ Ready" if current["ready"] else "⚠️ Finished with errors"
+        st.metric(state, f"{current['time_to_ready']:.1f} s to ready")
+    else:
+        st.metric("⏳ Warming up", f"{current['elapsed'] or 0:.1f} s so far")
+    tasks = pd.DataFrame([
+        {"Task": name, "State": task["state"],
+         "Seconds": round(task["seconds"], 2) if task["seconds"] is not None else None,
+         "Error": task.get("error", "")}
+        for name, task in current["tasks"].items()
+    ])
+    st.dataframe(tasks, use_container_width=True, hide_index=True)
+
+def _render_memory():
+    st.write("### 🧠 Memory")
+    sessions = session_memory()
+    rss = process_rss()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Process RSS", f"{rss / 1e6:,.0f} MB" if rss else "n/a")
+    col2.metric("Shared dataset (mapped)", f"{shared_bytes() / 1e6:,.1f} MB")
+    col3.metric("Active sessions", len(sessions))
+    if not sessions:
+        st.caption("No session has opened the dashboard, explorer or assistant yet.")
+        return
+
+    rows = []
+    for entry in sessions:
+        shared = sum(s for s, _ in entry["frames"].values())
+        private = sum(p for _, p in entry["frames"].values())
+        rows.append({
+            "Session": entry["session"][:8],
+            "Pages": ", ".join(entry["frames"]),
+            "Shared (MB)": round(shared / 1e6, 1),
+            "Private (MB)": round(private / 1e6, 1),
+            "Without sharing (MB)": round((shared + private) / 1e6, 1),
+        })
+    table = pd.DataFrame(rows)
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    saved = table["Shared (MB)"].sum()
+    st.caption(f"Shared bytes are views into the memory-mapped dataset or process-wide decoded columns; "
+               f"without sharing, these sessions would hold about {saved:,.0f} MB more.")
+
+def _render_tracing():
+    st.write("### ⏱️ Timings")
+    if not ENABLED:
+        st.info("Tracing is off. Start the app with `TRACING=1` to time pages and their stages "
+                "(optionally `TRACING_PORT` for the Prometheus endpoint and `TRACING_LOG` for a periodic log).")
+        return
+
+    exporters = [f"Prometheus text on http://127.0.0.1:{PORT}/metrics"] if PORT else []
+    if LOG_PATH:
+        exporters.append(f"JSON lines appended to `{LOG_PATH}`")
+    st.caption("Timings since the server started, for all sessions. " + "; ".join(exporters))
+
+    stats = snapshot()
+    if not stats:
+        st.info("No spans recorded yet. Open a few pages and come back.")
+        return
+
+    # ------------------ Span Summary ------------------ #
+    summary = pd.DataFrame([
+        {
+            "Span": name,
+            "Calls": s["count"],
+            "Total (s)": round(s["sum"], 2),
+            "Mean (ms)": round(1000 * s["sum"] / s["count"], 1),
+            "p50 (ms)": round(1000 * s["p50"], 1),
+            "p95 (ms)": round(1000 * s["p95"], 1),
+            "p99 (ms)": round(1000 * s["p99"], 1),
+            "Max (ms)": round(1000 * s["max"], 1),
+        }
+        for name, s in stats.items()
+    ]).sort_values("Total (s)", ascending=False)
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    # ------------------ Latency Histogram ------------------ #
+    selected = st.selectbox("Latency distribution for", summary["Span"].tolist())
+    histogram = pd.DataFrame({"Latency": _bucket_labels(), "Calls": stats[selected]["counts"]})
+    st.plotly_chart(px.bar(histogram, x="Latency", y="Calls", title=selected), use_container_width=True)
+
+    if st.button("Reset timings"):
+        reset()
+        st.rerun()
+
+def render():
+    st.subheader("⏱️ Performance")
+    _render_warmup()
+    st.markdown("---")
+    _render_memory()
+    st.markdown("---")
+    _render_tracing()
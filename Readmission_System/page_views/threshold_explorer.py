@@ -0,0 +1,130 @@
+# pages/threshold_explorer.py
+import streamlit as st # type: ignore
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils.binary_metrics import threshold_counts, confusion_for_all_thresholds
+from utils.curve_downsample import downsample_curve
+from utils.model_loader import DEFAULT_MODEL_PATH, discover_models
+from utils.score_cache import holdout_scores
+from utils.settings import get_decision_threshold, save_decision_threshold, threshold_history
+
+@st.cache_data(show_spinner="Scoring the holdout set once for this model...")
+def _threshold_table(model_path):
+    # One sort + cumulative sums gives the confusion counts at every threshold
+    y_true, scores = holdout_scores(model_path)
+    table = confusion_for_all_thresholds(threshold_counts(y_true, scores))
+    return {key: np.asarray(value) for key, value in table.items()}, len(y_true)
+
+def _index_for(table, threshold):
+    # Thresholds are sorted descending; predicted positive when score >= threshold
+    k = int(np.searchsorted(-table["thresholds"], -threshold, side="right"))
+    return k - 1
+
+def render():
+    st.subheader("🎚️ Decision Threshold & Cost Explorer")
+    st.markdown("""
+    Choose the probability cut-off used to flag a patient as **likely to be readmitted**.
+    Counts below come from the model's scores on the holdout set and update instantly as you move the sliders.
+    """)
+
+    models = discover_models(["Top10Model"]) or [DEFAULT_MODEL_PATH]
+    model_path = st.selectbox(
+        "Model", models,
+        index=models.index(DEFAULT_MODEL_PATH) if DEFAULT_MODEL_PATH in models else 0,
+        help="Both prediction pages score with the deployed Top 10 model; other models can be explored but not saved."
+    )
+    deployed = model_path == DEFAULT_MODEL_PATH
+
+    try:
+        table, n_rows = _threshold_table(model_path)
+    except Exception as e:
+        st.error(f"❌ Could not score the holdout set: {e}")
+        return
+
+    current_threshold, current_version = get_decision_threshold(model_path)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        threshold = st.slider("Threshold", 0.01, 0.99, float(current_threshold), 0.01)
+    with col2:
+        fp_cost = st.number_input("Cost of a false positive", min_value=0.0, value=100.0, step=10.0,
+                                  help="e.g. an unnecessary follow-up call or care-management slot.")
+    with col3:
+        fn_cost = st.number_input("Cost of a false negative", min_value=0.0, value=1000.0, step=50.0,
+                                  help="e.g. the cost of an avoidable readmission.")
+
+    capacity = st.slider(
+        "Care-management capacity (% of patients that can be followed up)", 1, 100, 100,
+        help="Thresholds that would flag more patients than this are excluded from the recommendation."
+    )
+
+    # ---------- Vectorised over all thresholds ---------- #
+    tp, fp, fn, tn = table["tp"], table["fp"], table["fn"], table["tn"]
+    cost = fp * fp_cost + fn * fn_cost
+    flagged_share = (tp + fp) / n_rows
+    feasible = flagged_share <= capacity / 100
+
+    # ---------- Selected Threshold ---------- #
+    k = _index_for(table, threshold)
+    if k >= 0:
+        sel = {"tp": int(tp[k]), "fp": int(fp[k]), "fn": int(fn[k]), "tn": int(tn[k])}
+    else:
+        sel = {"tp": 0, "fp": 0, "fn": int(fn[0] + tp[0]), "tn": int(tn[0] + fp[0])}
+    flagged = sel["tp"] + sel["fp"]
+    precision = sel["tp"] / flagged if flagged else 0.0
+    recall = sel["tp"] / (sel["tp"] + sel["fn"]) if sel["tp"] + sel["fn"] else 0.0
+    selected_cost = sel["fp"] * fp_cost + sel["fn"] * fn_cost
+
+    st.write("### 📌 At the Selected Threshold")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Flagged patients", f"{flagged / n_rows:.1%}")
+    m2.metric("Precision", f"{precision:.3f}")
+    m3.metric("Recall", f"{recall:.3f}")
+    m4.metric("Cost per 1,000 patients", f"{selected_cost / n_rows * 1000:,.0f}")
+
+    cm_df = pd.DataFrame(
+        [[sel["tn"], sel["fp"]], [sel["fn"], sel["tp"]]],
+        index=["Actual 0", "Actual 1"], columns=["Predicted 0", "Predicted 1"]
+    )
+    st.table(cm_df)
+
+    # ---------- Recommendation ---------- #
+    if feasible.any():
+        best = int(np.argmin(np.where(feasible, cost, np.inf)))
+        best_threshold = float(table["thresholds"][best])
+        st.info(
+            f"💡 Lowest expected cost within capacity: threshold **{best_threshold:.3f}** "
+            f"({cost[best] / n_rows * 1000:,.0f} per 1,000 patients, flags {flagged_share[best]:.1%})."
+        )
+    else:
+        st.warning("⚠️ No threshold keeps the flagged share within the selected capacity.")
+
+    # ---------- Cost Curve ---------- #
+    st.write("### 📉 Expected Cost by Threshold")
+    x, y, _ = downsample_curve(table["thresholds"][::-1], (cost / n_rows * 1000)[::-1], auc_tolerance=np.inf)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name="Cost per 1,000 patients"))
+    fig.add_vline(x=threshold, line_dash="dash", line_color="gray", annotation_text="selected")
+    fig.update_layout(xaxis_title="Threshold", yaxis_title="Cost per 1,000 patients", height=400)
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ---------- Save as Setting ---------- #
+    st.write("### 💾 Operating Point")
+    if not deployed:
+        # A cut-off tuned on another model's scores means nothing for the deployed model's scores
+        st.info(f"Predictions are scored with `{DEFAULT_MODEL_PATH}`; select it to save an operating point.")
+    else:
+        st.caption(f"Currently used by the prediction pages: **{current_threshold:.3f}** (version {current_version}).")
+    note = st.text_input("Note for this version (optional)", disabled=not deployed)
+    if st.button("Use this threshold for predictions", disabled=not deployed):
+        version = save_decision_threshold(
+            threshold, model_path=model_path, fp_cost=fp_cost, fn_cost=fn_cost,
+            capacity_pct=capacity, note=note
+        )
+        st.success(f"✅ Saved threshold {threshold:.2f} as version {version}.")
+
+    history = threshold_history()
+    if history:
+        with st.expander("Version history"):
+            st.dataframe(pd.DataFrame(history).iloc[::-1], use_container_width=True)
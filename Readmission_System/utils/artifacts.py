@@ -0,0 +1,363 @@
+# utils/artifacts.py
+# Pickle-free model artifacts. Each model.pkl gets a sibling directory:
+#   Top10Model/lightgbm_top10_randomsearch/
+#       model.txt        LightGBM text model  (XGBoost: model.ubj, CatBoost: model.cbm,
+#                        sklearn GradientBoosting / MLP: model.npz, no pickled objects)
+#       manifest.json    feature order, dtypes, metrics, sha256 of the model file
+#
+#   python -m utils.artifacts export --models all
+#   python -m utils.artifacts benchmark --models all
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.dataset import holdout_split, load_dataset
+from utils.metrics_catalog import list_entries, model_path_for
+
+MANIFEST_NAME = "manifest.json"
+MODEL_FILES = {
+    "lightgbm": "model.txt",
+    "xgboost": "model.ubj",
+    "catboost": "model.cbm",
+    "sklearn_gbdt": "model.npz",
+    "sklearn_mlp": "model.npz",
+}
+FORMAT_VERSION = 1
+
+
+def artifact_dir(model_path):
+    return os.path.splitext(model_path)[0]
+
+
+def has_artifact(model_path):
+    return os.path.exists(os.path.join(artifact_dir(model_path), MANIFEST_NAME))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_matches(model_path, source_sha256=None):
+    # True only if the artifact was exported from this exact .pkl; a retrained or
+    # hand-replaced pickle makes it stale until the next export
+    try:
+        with open(os.path.join(artifact_dir(model_path), MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("source_sha256") == (source_sha256 or _sha256(model_path))
+
+
+def _model_kind(model):
+    name = type(model).__name__
+    module = type(model).__module__.split(".")[0]
+    if module in ("lightgbm", "xgboost", "catboost"):
+        return module
+    if name == "GradientBoostingClassifier":
+        return "sklearn_gbdt"
+    if name == "MLPClassifier":
+        return "sklearn_mlp"
+    raise ValueError(f"No native format for {type(model).__module__}.{name}")
+
+
+# ---------------------- Portable sklearn formats ---------------------- #
+def _save_gbdt(model, path):
+    # All trees flattened into one node table; children index into the same table
+    trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    left = np.concatenate([np.where(t.children_left >= 0, t.children_left + o, -1) for t, o in zip(trees, offsets)])
+    right = np.concatenate([np.where(t.children_right >= 0, t.children_right + o, -1) for t, o in zip(trees, offsets)])
+    init = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0]
+    np.savez(
+        path,
+        roots=offsets[:-1],
+        left=left,
+        right=right,
+        feature=np.concatenate([t.feature for t in trees]),
+        threshold=np.concatenate([t.threshold for t in trees]),
+        value=np.concatenate([t.value[:, 0, 0] for t in trees]) * model.learning_rate,
+        init=np.float64(init),
+        max_depth=np.int64(max(t.max_depth for t in trees)),
+    )
+
+
+def _load_gbdt(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as f:
+        arrays = {key: f[key] for key in f.files}
+
+    def predict(X):
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(arrays["roots"], (len(X), len(arrays["roots"]))).copy()
+        for _ in range(int(arrays["max_depth"])):
+            go_left = X[rows, np.maximum(arrays["feature"][node], 0)] <= arrays["threshold"][node]
+            child = np.where(go_left, arrays["left"][node], arrays["right"][node])
+            node = np.where(child >= 0, child, node)
+        raw = arrays["init"] + arrays["value"][node].sum(axis=1)
+        return 1 / (1 + np.exp(-raw))
+    return predict
+
+
+def _save_mlp(model, path):
+    layers = {f"coef_{i}": coef for i, coef in enumerate(model.coefs_)}
+    layers.update({f"intercept_{i}": b for i, b in enumerate(model.intercepts_)})
+    np.savez(path, n_layers=np.int64(len(model.coefs_)), activation=np.str_(model.activation),
+             out_activation=np.str_(model.out_activation_), **layers)
+
+
+ACTIVATIONS = {
+    "relu": lambda z: np.maximum(z, 0),
+    "tanh": np.tanh,
+    "logistic": lambda z: 1 / (1 + np.exp(-z)),
+    "identity": lambda z: z,
+}
+
+
+def _load_mlp(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as f:
+        n_layers = int(f["n_layers"])
+        coefs = [f[f"coef_{i}"] for i in range(n_layers)]
+        intercepts = [f[f"intercept_{i}"] for i in range(n_layers)]
+        hidden, output = ACTIVATIONS[str(f["activation"])], ACTIVATIONS[str(f["out_activation"])]
+
+    def predict(X):
+        a = np.asarray(X, dtype=np.float64)
+        for i, (coef, intercept) in enumerate(zip(coefs, intercepts)):
+            a = a @ coef + intercept
+            a = output(a) if i == n_layers - 1 else hidden(a)
+        return a[:, 0]
+    return predict
+
+
+# ---------------------- Loaded Model ---------------------- #
+class NativeModel:
+    # predict_proba/predict over DataFrames like the sklearn wrappers. `booster`
+    # is the framework object (for shap.TreeExplainer), None for portable formats.
+    def __init__(self, manifest, predict_positive, booster=None):
+        self.manifest = manifest
+        self.feature_names_in_ = np.asarray(manifest["feature_names"], dtype=object)
+        self.classes_ = np.asarray([0, 1])
+        self.booster = booster
+        self._predict_positive = predict_positive
+
+    def predict_proba(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        positive = np.asarray(self._predict_positive(X), dtype=np.float64)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+    def __repr__(self):
+        return f"NativeModel({self.manifest['kind']}, {len(self.feature_names_in_)} features)"
+
+
+def load_artifact(model_path, verify=True):
+    return _load_from(artifact_dir(model_path), verify)
+
+
+def _load_from(directory, verify=True):
+    with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    model_file = os.path.join(directory, manifest["model_file"])
+    # Read once: the same bytes are hashed and handed to the framework
+    with open(model_file, "rb") as f:
+        data = f.read()
+    if verify and hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+        raise ValueError(f"{model_file} does not match the sha256 in its manifest")
+
+    kind = manifest["kind"]
+    if kind == "lightgbm":
+        import lightgbm as lgb
+        booster = lgb.Booster(model_str=data.decode("utf-8"))
+        return NativeModel(manifest, booster.predict, booster)
+    if kind == "xgboost":
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(bytearray(data))
+        return NativeModel(manifest, lambda X: booster.predict(xgb.DMatrix(X)), booster)
+    if kind == "catboost":
+        from catboost import CatBoostClassifier
+        booster = CatBoostClassifier()
+        booster.load_model(blob=data)
+        return NativeModel(manifest, lambda X: booster.predict_proba(X)[:, 1], booster)
+    if kind == "sklearn_gbdt":
+        return NativeModel(manifest, _load_gbdt(data))
+    if kind == "sklearn_mlp":
+        return NativeModel(manifest, _load_mlp(data))
+    raise ValueError(f"Unknown artifact kind: {kind}")
+
+
+# ---------------------- Export ---------------------- #
+def _training_dtypes():
+    try:
+        return {name: str(dtype) for name, dtype in load_dataset().dtypes.items()}
+    except OSError:
+        return None
+
+
+def _check_rows(features, n_rows=256):
+    # Holdout rows exercise the real value ranges; random integers only when no data is available
+    try:
+        _, X_test, _, _ = holdout_split(load_dataset())
+        if set(features) <= set(X_test.columns):
+            return X_test[list(features)].head(n_rows)
+    except OSError:
+        pass
+    return pd.DataFrame(np.random.default_rng(0).integers(0, 5, size=(n_rows, len(features))), columns=features)
+
+
+def _catalog_metrics(model_path):
+    for entry in list_entries():
+        if model_path_for(entry) == model_path:
+            return {key: entry[key] for key in ("roc_auc", "accuracy", "precision", "recall", "f1")} | {
+                "source": entry["path"]}
+    return None
+
+
+def export_artifact(model_path, dtypes=None):
+    model = joblib.load(model_path)
+    kind = _model_kind(model)
+    directory = artifact_dir(model_path)
+    # Built in a scratch directory and swapped in only after the fidelity check, so a
+    # rejected export never sits next to the pickle with a matching source_sha256
+    staging = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        manifest = _write_artifact(model, kind, model_path, staging, dtypes)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _swap_in(staging, directory)
+    return directory, manifest
+
+
+def _write_artifact(model, kind, model_path, directory, dtypes):
+    # Imported here: utils.model_loader itself loads artifacts through this module
+    from utils.model_loader import model_feature_names
+    model_file = os.path.join(directory, MODEL_FILES[kind])
+
+    if kind == "lightgbm":
+        model.booster_.save_model(model_file)
+    elif kind == "xgboost":
+        model.get_booster().save_model(model_file)
+    elif kind == "catboost":
+        model.save_model(model_file, format="cbm")
+    elif kind == "sklearn_gbdt":
+        _save_gbdt(model, model_file)
+    elif kind == "sklearn_mlp":
+        _save_mlp(model, model_file)
+
+    features = model_feature_names(model)
+    if features is None:
+        raise ValueError(f"{model_path} does not record its feature names")
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "model_class": f"{type(model).__module__}.{type(model).__name__}",
+        "model_file": os.path.basename(model_file),
+        "sha256": _sha256(model_file),
+        "feature_names": list(features),
+        "dtypes": {name: dtypes.get(name) for name in features} if dtypes else None,
+        "metrics": _catalog_metrics(model_path),
+        "source_pickle": model_path,
+        "source_sha256": _sha256(model_path),
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Refuse an artifact that doesn't reproduce the pickle's probabilities
+    check = _check_rows(features)
+    drift = np.abs(_load_from(directory).predict_proba(check)[:, 1] - model.predict_proba(check)[:, 1]).max()
+    if drift > 1e-6:
+        raise ValueError(f"Native artifact for {model_path} differs from the pickle by {drift:.2e}")
+    return manifest
+
+
+def _swap_in(staging, directory):
+    # A directory can't be os.replace'd over a non-empty one: move the old export aside first
+    previous = f"{directory}.{os.getpid()}.old"
+    if os.path.isdir(directory):
+        os.replace(directory, previous)
+    os.replace(staging, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+# ---------------------- Benchmark ---------------------- #
+def _best_of(fn, repeats):
+    best = np.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_loading(model_paths, repeats=5):
+    # Frameworks are imported by the first (untimed) loads, so both columns time the model alone
+    rows = []
+    for path in model_paths:
+        if not has_artifact(path):
+            continue
+        joblib.load(path)
+        load_artifact(path)
+        rows.append({
+            "model": path,
+            "pickle_ms": _best_of(lambda: joblib.load(path), repeats) * 1000,
+            "native_ms": _best_of(lambda: load_artifact(path), repeats) * 1000,
+            "pickle_kb": os.path.getsize(path) / 1024,
+            "native_kb": sum(e.stat().st_size for e in os.scandir(artifact_dir(path))) / 1024,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    from utils.model_loader import discover_models
+    parser = argparse.ArgumentParser(description="Export models to native artifacts and compare load times")
+    parser.add_argument("command", choices=["export", "benchmark"])
+    parser.add_argument("--models", nargs="+", default=["all"], help="Model .pkl paths, or 'all'")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    model_paths = discover_models() if args.models == ["all"] else args.models
+
+    if args.command == "export":
+        dtypes = _training_dtypes()
+        for path in model_paths:
+            try:
+                directory, manifest = export_artifact(path, dtypes)
+                print(f"{path:<52} -> {directory}/{manifest['model_file']}")
+            except Exception as e:
+                print(f"{path:<52} failed: {e}")
+        return
+
+    df = benchmark_loading(model_paths, args.repeats)
+    if df.empty:
+        print("No native artifacts found; run `python -m utils.artifacts export` first.")
+        return
+    print(f"{'model':<52}{'pickle ms':>11}{'native ms':>11}{'speedup':>9}{'pickle KB':>11}{'native KB':>11}")
+    for _, row in df.iterrows():
+        print(f"{row['model']:<52}{row['pickle_ms']:>11.1f}{row['native_ms']:>11.1f}"
+              f"{row['pickle_ms'] / row['native_ms']:>8.1f}x{row['pickle_kb']:>11.0f}{row['native_kb']:>11.0f}")
+    print(f"{'total':<52}{df['pickle_ms'].sum():>11.1f}{df['native_ms'].sum():>11.1f}"
+          f"{df['pickle_ms'].sum() / df['native_ms'].sum():>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
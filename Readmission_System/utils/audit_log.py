@@ -0,0 +1,394 @@
+# utils/audit_log.py
+# Append-only record of every prediction: inputs, probability, label, model
+# version, threshold version, source and timestamp.
+#
+# record() only appends numpy arrays to an in-memory buffer; a background
+# thread flushes the buffer every AUDIT_FLUSH_SECONDS (or once AUDIT_FLUSH_ROWS
+# rows are waiting) as one record batch onto the process's live segment, an
+# Arrow IPC stream (audit_log/<day>/seg-<start ms>-<pid>.arrows). A segment is
+# rotated after AUDIT_SEGMENT_ROWS rows or AUDIT_SEGMENT_SECONDS and then
+# compacted into a zstd Parquet file; segments left behind by a process that
+# died are compacted by the next writer or the CLI. Files are never rewritten.
+#
+#   python -m utils.audit_log query --since 2026-10-01 --model-version Top10Model/lightgbm_top10_randomsearch.pkl@
+#   python -m utils.audit_log query --since "2026-10-19 08:00" --source form --out form_predictions.csv
+#   python -m utils.audit_log summary
+#   python -m utils.audit_log benchmark --rows 2000000
+import argparse
+import atexit
+import glob
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.dataset import TOP10_FEATURES
+
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit_log")
+ENABLED = os.getenv("AUDIT", "1").lower() not in ("0", "false", "no")
+FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+FLUSH_ROWS = int(os.getenv("AUDIT_FLUSH_ROWS", "200000"))
+SEGMENT_ROWS = int(os.getenv("AUDIT_SEGMENT_ROWS", "5000000"))
+SEGMENT_SECONDS = float(os.getenv("AUDIT_SEGMENT_SECONDS", "3600"))
+
+SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("source", pa.dictionary(pa.int32(), pa.string())),
+        ("model_version", pa.dictionary(pa.int32(), pa.string())),
+        ("threshold", pa.float32()),
+        ("threshold_version", pa.int32()),
+        ("probability", pa.float32()),
+        ("prediction", pa.int8()),
+    ]
+    + [(name, pa.int64()) for name in TOP10_FEATURES]
+)
+
+
+# ---------------------- Segments ---------------------- #
+def _segment_start(path):
+    # seg-<start ms>-<pid>.<ext>
+    return int(os.path.basename(path).split("-")[1])
+
+
+def _segment_pid(path):
+    return int(os.path.basename(path).split("-")[2].split(".")[0])
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _read_stream(path):
+    # A writer that died mid-flush leaves a truncated last batch; keep everything before it.
+    # A segment that can't be opened raises: callers must never take it for an empty one.
+    batches = []
+    with pa.OSFile(path, "rb") as f:
+        if f.size() == 0:
+            # Writer died before it wrote the schema
+            return SCHEMA.empty_table()
+        reader = pa.ipc.open_stream(f)
+        try:
+            for batch in reader:
+                batches.append(batch)
+        except pa.ArrowInvalid:
+            pass
+    return pa.Table.from_batches(batches, schema=SCHEMA)
+
+
+def _compact(path):
+    # The .arrows file is removed only after its rows are safely in Parquet; a read
+    # error raises before anything is deleted and the segment waits for the next pass
+    table = _read_stream(path)
+    if table.num_rows:
+        parquet_path = path[: -len(".arrows")] + ".parquet"
+        tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=1_000_000)
+        os.replace(tmp_path, parquet_path)
+    os.remove(path)
+    return table.num_rows
+
+
+def compact_orphans():
+    # Live segments whose writer is gone (crash, killed worker) become Parquet like any rotated one
+    compacted = 0
+    for path in glob.glob(os.path.join(AUDIT_DIR, "*", "seg-*.arrows")):
+        if not _pid_alive(_segment_pid(path)):
+            try:
+                compacted += _compact(path)
+            except (OSError, pa.ArrowInvalid):
+                continue
+    return compacted
+
+
+class _Segment:
+    def __init__(self):
+        self.started = time.time()
+        day = datetime.fromtimestamp(self.started, timezone.utc).strftime("%Y-%m-%d")
+        os.makedirs(os.path.join(AUDIT_DIR, day), exist_ok=True)
+        self.path = os.path.join(AUDIT_DIR, day, f"seg-{int(self.started * 1000)}-{os.getpid()}.arrows")
+        self.file = pa.OSFile(self.path, "wb")
+        self.writer = pa.ipc.new_stream(self.file, SCHEMA)
+        self.rows = 0
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+        self.file.flush()
+        self.rows += batch.num_rows
+
+    def full(self):
+        return self.rows >= SEGMENT_ROWS or time.time() - self.started >= SEGMENT_SECONDS
+
+    def close(self):
+        self.writer.close()
+        self.file.close()
+        try:
+            _compact(self.path)
+        except (OSError, pa.ArrowInvalid):
+            # Rows stay in the .arrows file; compact_orphans picks it up once this process is gone
+            pass
+
+
+# ---------------------- Writer ---------------------- #
+class AuditLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._pending_rows = 0
+        self._segment = None
+        self._thread = None
+        self.rows_written = 0
+
+    def record(self, inputs, probabilities, predictions, model_version, threshold, threshold_version, source):
+        # inputs: validated Top 10 frame; the arrays are copied, never the frame.
+        # Selecting columns costs ~0.2 ms even for one row, so skip it when already in order
+        if list(inputs.columns) != TOP10_FEATURES:
+            inputs = inputs[TOP10_FEATURES]
+        values = inputs.to_numpy(dtype=np.int64)
+        entry = (
+            time.time_ns() // 1_000_000, str(source), str(model_version), float(threshold), int(threshold_version),
+            np.asarray(probabilities, dtype=np.float32), np.asarray(predictions, dtype=np.int8), values,
+        )
+        with self._lock:
+            self._pending.append(entry)
+            self._pending_rows += len(values)
+            full = self._pending_rows >= FLUSH_ROWS
+            if self._thread is None:
+                self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        # Called with _lock held
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+        threading.Thread(target=compact_orphans, name="audit-compact", daemon=True).start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_SECONDS)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Keep the writer alive (e.g. disk full); record() has already checked the values
+                pass
+
+    def _batch(self, entries):
+        sizes = np.array([len(e[7]) for e in entries])
+
+        def repeated(i, dtype):
+            return np.repeat(np.array([e[i] for e in entries], dtype=dtype), sizes)
+
+        def dictionary(i):
+            labels, codes = np.unique([e[i] for e in entries], return_inverse=True)
+            return pa.DictionaryArray.from_arrays(np.repeat(codes.astype(np.int32), sizes), labels.tolist())
+
+        values = np.concatenate([e[7] for e in entries])
+        columns = [
+            pa.array(repeated(0, np.int64), pa.timestamp("ms", tz="UTC")),
+            dictionary(1),
+            dictionary(2),
+            pa.array(repeated(3, np.float32)),
+            pa.array(repeated(4, np.int32)),
+            pa.array(np.concatenate([e[5] for e in entries])),
+            pa.array(np.concatenate([e[6] for e in entries])),
+        ] + [pa.array(values[:, i]) for i in range(values.shape[1])]
+        return pa.record_batch(columns, schema=SCHEMA)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                entries, self._pending, self._pending_rows = self._pending, [], 0
+            if entries:
+                batch = self._batch(entries)
+                if self._segment is None:
+                    self._segment = _Segment()
+                self._segment.write(batch)
+                self.rows_written += batch.num_rows
+            if self._segment is not None and self._segment.full():
+                self._segment.close()
+                self._segment = None
+
+    def close(self):
+        # Flushes and compacts the live segment; the next record() opens a new one
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+_log = AuditLog()
+
+
+def record_predictions(inputs, probabilities, predictions, model_version, threshold, threshold_version, source):
+    if ENABLED and len(inputs):
+        _log.record(inputs, probabilities, predictions, model_version, threshold, threshold_version, source)
+
+
+def flush():
+    _log.flush()
+
+
+def close():
+    _log.close()
+
+
+# ---------------------- Query ---------------------- #
+def _timestamp_ms(value):
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return int(stamp.timestamp() * 1000)
+
+
+def query(since=None, until=None, model_version=None, source=None, columns=None, include_live=True):
+    # model_version/source match as prefixes, e.g. "Top10Model/" or "batch:"
+    start = _timestamp_ms(since) if since is not None else None
+    end = _timestamp_ms(until) if until is not None else None
+
+    # Segments started after the range can be skipped from the file name alone;
+    # inside a file, Parquet row-group statistics prune the rest
+    paths = sorted(glob.glob(os.path.join(AUDIT_DIR, "*", "seg-*.parquet")))
+    live = sorted(glob.glob(os.path.join(AUDIT_DIR, "*", "seg-*.arrows"))) if include_live else []
+    if end is not None:
+        paths = [p for p in paths if _segment_start(p) < end]
+        live = [p for p in live if _segment_start(p) < end]
+
+    condition = None
+    for term in (
+        pc.field("timestamp") >= pa.scalar(start, pa.timestamp("ms", tz="UTC")) if start is not None else None,
+        pc.field("timestamp") < pa.scalar(end, pa.timestamp("ms", tz="UTC")) if end is not None else None,
+        pc.starts_with(pc.field("model_version").cast(pa.string()), model_version) if model_version else None,
+        pc.starts_with(pc.field("source").cast(pa.string()), source) if source else None,
+    ):
+        if term is not None:
+            condition = term if condition is None else condition & term
+
+    tables = []
+    if paths:
+        tables.append(ds.dataset(paths, schema=SCHEMA, format="parquet").to_table(columns=columns, filter=condition))
+    for path in live:
+        try:
+            table = _read_stream(path)
+        except (OSError, pa.ArrowInvalid):
+            # A segment whose schema isn't written yet (or can't be read right now) has nothing to show
+            continue
+        if condition is not None:
+            table = table.filter(condition)
+        tables.append(table.select(columns) if columns else table)
+    if not tables:
+        return pa.Table.from_batches([], schema=SCHEMA).select(columns) if columns else SCHEMA.empty_table()
+    return pa.concat_tables(tables, promote_options="permissive").combine_chunks()
+
+
+def summary(**filters):
+    table = query(columns=["timestamp", "model_version", "threshold_version", "prediction"], **filters)
+    if not table.num_rows:
+        return pd.DataFrame()
+    grouped = table.group_by(["model_version", "threshold_version"]).aggregate([
+        ("prediction", "count"), ("prediction", "sum"), ("timestamp", "min"), ("timestamp", "max"),
+    ])
+    return grouped.to_pandas().rename(columns={
+        "prediction_count": "rows", "prediction_sum": "readmitted",
+        "timestamp_min": "first", "timestamp_max": "last",
+    })
+
+
+# ---------------------- CLI ---------------------- #
+def _benchmark(rows, chunk_rows):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.integers(0, 20, size=(chunk_rows, len(TOP10_FEATURES))), columns=TOP10_FEATURES)
+    probabilities = rng.random(chunk_rows)
+    predictions = (probabilities >= 0.5).astype(np.int8)
+    log = AuditLog()
+
+    started = time.perf_counter()
+    for _ in range(max(rows // chunk_rows, 1)):
+        log.record(frame, probabilities, predictions, "benchmark@0", 0.5, 0, "benchmark")
+    log.close()
+    seconds = time.perf_counter() - started
+    total = max(rows // chunk_rows, 1) * chunk_rows
+    print(f"batch:  {total:,} rows in {seconds:.2f}s ({total / seconds:,.0f} rows/s, flushed and compacted)")
+
+    single = frame.iloc[:1]
+    timings = []
+    for _ in range(2000):
+        started = time.perf_counter()
+        log.record(single, probabilities[:1], predictions[:1], "benchmark@0", 0.5, 0, "benchmark")
+        timings.append(time.perf_counter() - started)
+    log.close()
+    timings = np.array(timings) * 1e6
+    print(f"single: p50 {np.percentile(timings, 50):.1f} µs, p99 {np.percentile(timings, 99):.1f} µs per record() call")
+
+
+def main():
+    global AUDIT_DIR
+    parser = argparse.ArgumentParser(description="Query and maintain the prediction audit log.")
+    parser.add_argument("--dir", default=AUDIT_DIR, help="Audit log directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("query", "summary"):
+        command = commands.add_parser(name)
+        command.add_argument("--since", help="Start of the time range (UTC unless an offset is given)")
+        command.add_argument("--until", help="End of the time range (exclusive)")
+        command.add_argument("--model-version", help="Model version prefix, e.g. Top10Model/ or cascade:")
+        command.add_argument("--source", help="Source prefix: form, batch:<job id>")
+        if name == "query":
+            command.add_argument("--out", help="Write matching rows to .csv or .parquet instead of printing them")
+            command.add_argument("--limit", type=int, default=20, help="Rows to print")
+    commands.add_parser("compact", help="Compact live segments left behind by processes that are gone")
+    benchmark = commands.add_parser("benchmark", help="Measure record/flush throughput in a temporary directory")
+    benchmark.add_argument("--rows", type=int, default=2_000_000)
+    benchmark.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+    AUDIT_DIR = args.dir
+
+    if args.command == "benchmark":
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            AUDIT_DIR = directory
+            _benchmark(args.rows, args.chunk_rows)
+        return
+    if args.command == "compact":
+        print(f"compacted {compact_orphans():,} rows")
+        return
+
+    filters = dict(since=args.since, until=args.until, model_version=args.model_version, source=args.source)
+    started = time.perf_counter()
+    if args.command == "summary":
+        print(summary(**filters).to_string(index=False))
+        return
+    table = query(**filters)
+    seconds = time.perf_counter() - started
+    if args.out:
+        if args.out.endswith(".parquet"):
+            pq.write_table(table, args.out, compression="zstd")
+        else:
+            table.to_pandas().to_csv(args.out, index=False)
+        print(f"{table.num_rows:,} rows -> {args.out} ({seconds:.2f}s)")
+    else:
+        print(table.slice(0, args.limit).to_pandas().to_string(index=False))
+        print(f"{table.num_rows:,} matching rows ({seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
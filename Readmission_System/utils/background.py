@@ -0,0 +1,174 @@
+# utils/background.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st # type: ignore
+
+MAX_WORKERS = int(os.getenv("BACKGROUND_MAX_WORKERS", "4"))
+MAX_PENDING = int(os.getenv("BACKGROUND_MAX_PENDING", "32"))
+DEFAULT_TIMEOUT = float(os.getenv("BACKGROUND_TIMEOUT", "45"))
+
+# One pool per server process, shared by every session. Module state survives
+# Streamlit reruns, so jobs keep running while the page re-executes.
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="background")
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+
+_SESSION_KEY = "_background_jobs"
+TERMINAL_STATES = ("done", "failed", "timeout", "rejected", "cancelled")
+
+
+class _Slot:
+    # One pending slot per job, released exactly once: when the job ends, is
+    # cancelled before it starts, or is abandoned after its timeout
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = True
+
+    def release(self):
+        with self._lock:
+            if self._held:
+                self._held = False
+                _pending.release()
+
+
+# ---------------------- Job Handle ---------------------- #
+class JobHandle:
+    def __init__(self, name, key, future, timeout, slot=None):
+        self.name = name
+        self.key = key
+        self.future = future
+        self.timeout = timeout
+        self.slot = slot
+        self.submitted_at = time.monotonic()
+        self.cancelled = False
+        self.timed_out = False
+        # Set once a final state has been shown; until then a rerun reuses the job instead of retrying it
+        self.reported = False
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return "cancelled"
+        if self.future is None:
+            return "rejected"
+        if self.timed_out:
+            return "timeout"
+        if self.future.done():
+            return "failed" if self.future.exception() is not None else "done"
+        if time.monotonic() - self.submitted_at > self.timeout:
+            # Give up on it: a queued job never starts, and its pending slot is freed
+            # now. A thread already running can't be interrupted; its result is dropped.
+            self.timed_out = True
+            self.future.cancel()
+            if self.slot is not None:
+                self.slot.release()
+            return "timeout"
+        return "running"
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.submitted_at
+
+    def result(self):
+        return self.future.result() if self.status == "done" else None
+
+    def error(self):
+        return self.future.exception() if self.status == "failed" else None
+
+    def cancel(self):
+        # Queued jobs never start; a job already talking to the LLM cannot be
+        # interrupted, so its result is simply discarded.
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+# ---------------------- Submission ---------------------- #
+def _session_jobs():
+    if _SESSION_KEY not in st.session_state:
+        st.session_state[_SESSION_KEY] = {}
+    return st.session_state[_SESSION_KEY]
+
+
+def _run(fn, args, kwargs, slot):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        slot.release()
+
+
+def submit(name, fn, *args, key=None, timeout=None, **kwargs):
+    jobs = _session_jobs()
+    existing = jobs.get(name)
+    if existing is not None:
+        if existing.key == key and (existing.status in ("running", "done") or not existing.reported):
+            return existing
+        existing.cancel()
+
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    if not _pending.acquire(blocking=False):
+        handle = JobHandle(name, key, None, timeout)
+    else:
+        slot = _Slot()
+        try:
+            future = _executor.submit(_run, fn, args, kwargs, slot)
+        except Exception:
+            slot.release()
+            raise
+        # Cancelled-before-start jobs never reach _run, so free their slot here
+        future.add_done_callback(lambda f: f.cancelled() and slot.release())
+        handle = JobHandle(name, key, future, timeout, slot)
+
+    jobs[name] = handle
+    return handle
+
+
+def get_job(name):
+    return _session_jobs().get(name)
+
+
+def cancel_session_jobs():
+    jobs = _session_jobs()
+    for handle in jobs.values():
+        handle.cancel()
+    jobs.clear()
+
+
+# ---------------------- Rendering ---------------------- #
+def _render_status(handle, render_result, pending_message, failure_message):
+    status = handle.status
+    if status == "running":
+        st.caption(f"{pending_message} ({handle.elapsed:.0f}s)")
+    elif status == "done":
+        render_result(handle.result())
+    elif status == "failed":
+        st.warning(failure_message)
+        st.text(str(handle.error()))
+    elif status == "timeout":
+        st.warning(f"⌛ Gave up waiting after {handle.timeout:.0f}s. Try again later.")
+    elif status == "rejected":
+        st.warning("The server is busy right now. Please try again in a moment.")
+
+
+def render_job_result(name, render_result, pending_message="⏳ Working in the background...",
+                      failure_message="Background task failed.", poll_interval=1.0):
+    handle = get_job(name)
+    if handle is None:
+        return
+    # Finished jobs render once, outside any timer
+    if handle.status in TERMINAL_STATES:
+        _render_status(handle, render_result, pending_message, failure_message)
+        handle.reported = True
+        return
+
+    @st.fragment(run_every=poll_interval)
+    def _poll():
+        if handle.status in TERMINAL_STATES:
+            # One full rerun renders the result through the branch above; no fragment, no more polling.
+            # Pages that draw their output under a button must keep it in st.session_state to survive it.
+            st.rerun()
+        _render_status(handle, render_result, pending_message, failure_message)
+
+    _poll()
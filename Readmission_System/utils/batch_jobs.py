@@ -0,0 +1,306 @@
+# utils/batch_jobs.py
+# File-backed queue for batch CSV scoring. Each upload becomes a job directory
+# under .cache/jobs/<id>/ that a worker process fills in chunk by chunk:
+#   input.csv      the uploaded file
+#   status.json    state, progress counters and timings (rewritten after every chunk)
+#   part-NNNNN.csv scored rows; part 0 carries the header, so the parts concatenate into result.csv
+#   errors.csv     validation report (rows that were skipped)
+#   drift.csv      drift summary vs. the training data
+#   cancel         created by the UI to stop the job between chunks
+#
+# Jobs outlive page reruns and reconnects (the page keeps the job id in the URL);
+# BATCH_MAX_JOBS bounds how many run at once, the rest wait as "queued".
+import json
+import multiprocessing as mp
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from utils.audit_log import close as close_audit_log, record_predictions
+from utils.cascade import load_cascade
+from utils.dataset import TOP10_FEATURES
+from utils.drift_monitor import DriftMonitor, load_reference
+from utils.model_loader import DEFAULT_MODEL_PATH, get_model, model_version
+from utils.schema import missing_columns, validate_top10
+from utils.settings import get_cascade_config
+
+JOBS_DIR = ".cache/jobs"
+MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "2"))
+CHUNK_ROWS = int(os.getenv("BATCH_CHUNK_ROWS", "50000"))
+KEEP_SECONDS = float(os.getenv("BATCH_KEEP_HOURS", "24")) * 3600
+FINAL_STATES = ("done", "failed", "cancelled", "interrupted")
+
+_lock = threading.Lock()
+_pool = None
+_futures = {}
+
+
+# ---------------------- Job Files ---------------------- #
+def job_dir(job_id):
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _path(job_id, name):
+    return os.path.join(job_dir(job_id), name)
+
+
+def _write_status(job_id, status):
+    path = _path(job_id, "status.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def _read_status(job_id):
+    try:
+        with open(_path(job_id, "status.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _count_rows(path):
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def _cleanup():
+    # Finished jobs are kept for a day so results can still be downloaded after a reconnect
+    if not os.path.isdir(JOBS_DIR):
+        return
+    now = time.time()
+    for job_id in os.listdir(JOBS_DIR):
+        status = _read_status(job_id)
+        if status and status["state"] in FINAL_STATES and now - status.get("updated_at", now) > KEEP_SECONDS:
+            shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+# ---------------------- Worker ---------------------- #
+def _score_chunk(chunk, cascade, model):
+    if cascade is not None:
+        return cascade.score(chunk)
+    return model.predict_proba(chunk[TOP10_FEATURES])[:, 1], None
+
+
+def run_job(job_id):
+    # Runs in a worker process; every state change goes through status.json
+    status = _read_status(job_id)
+    if os.path.exists(_path(job_id, "cancel")):
+        status.update(state="cancelled", updated_at=time.time(), finished_at=time.time())
+        _write_status(job_id, status)
+        return status
+
+    status.update(state="running", started_at=time.time(), updated_at=time.time())
+    _write_status(job_id, status)
+    try:
+        reader = pd.read_csv(_path(job_id, "input.csv"), chunksize=CHUNK_ROWS)
+        cascade = model = None
+        try:
+            reference = load_reference()
+        except Exception:
+            reference = None
+        monitor = DriftMonitor(reference) if reference else None
+        error_parts = []
+
+        for index, raw in enumerate(reader):
+            if os.path.exists(_path(job_id, "cancel")):
+                status["state"] = "cancelled"
+                break
+            if index == 0:
+                missing = missing_columns(raw)
+                if missing:
+                    raise ValueError(f"Missing columns in uploaded file: {missing}")
+                # The saved cascade only when the user asked for it; its models must all
+                # declare their inputs and the file must contain every one of them
+                if status.get("use_cascade"):
+                    config = get_cascade_config()
+                    if config is None:
+                        raise ValueError("No saved cascade; save one with python -m utils.cascade ... --save")
+                    # The job's threshold was tuned for one cascade version; don't apply it to another
+                    if config["version"] != status["threshold_version"]:
+                        raise ValueError("The saved cascade changed after this file was uploaded; please upload it again")
+                    cascade = load_cascade()
+                    if cascade.features is None:
+                        raise ValueError("A model of the saved cascade doesn't record its input features")
+                    missing = [name for name in cascade.features if name not in raw.columns]
+                    if missing:
+                        raise ValueError(f"Missing columns for cascade scoring: {missing}")
+                model = None if cascade is not None else get_model(DEFAULT_MODEL_PATH)
+                version = cascade.model_version if cascade is not None else model_version(DEFAULT_MODEL_PATH)
+                status["cascade_band"] = list(cascade.band) if cascade is not None else None
+
+            chunk, errors = validate_top10(raw)
+            if len(errors):
+                errors["Row"] += status["rows_done"]
+                error_parts.append(errors)
+
+            started = time.perf_counter()
+            probabilities, escalated = _score_chunk(chunk, cascade, model) if len(chunk) else (np.array([]), None)
+            status["scoring_seconds"] += time.perf_counter() - started
+            if escalated is not None:
+                status["escalated_rows"] += int(escalated.sum())
+
+            if monitor and len(chunk):
+                started = time.perf_counter()
+                # Score drift is measured against the Top 10 model's training scores, which
+                # a cascade's scores aren't comparable to; its feature drift still counts
+                monitor.update(chunk, probabilities if cascade is None else None)
+                status["drift_seconds"] += time.perf_counter() - started
+
+            predictions = probabilities >= status["threshold"]
+            record_predictions(chunk, probabilities, predictions, version,
+                               status["threshold"], status["threshold_version"], f"batch:{job_id}")
+            chunk = chunk.assign(
+                Probability=probabilities.round(4),
+                Prediction=np.where(predictions, "Readmitted", "Not Readmitted"),
+            )
+            chunk.to_csv(_path(job_id, f"part-{index:05d}.csv"), index=False, header=index == 0)
+            status["parts"] += 1
+            status["rows_done"] += len(raw)
+            status["rows_scored"] += len(chunk)
+            status["rows_invalid"] += int(errors["Row"].nunique()) if len(errors) else 0
+            status["updated_at"] = time.time()
+            _write_status(job_id, status)
+
+        if error_parts:
+            pd.concat(error_parts, ignore_index=True).to_csv(_path(job_id, "errors.csv"), index=False)
+        if monitor:
+            monitor.summary().to_csv(_path(job_id, "drift.csv"), index=False)
+        if status["state"] == "running":
+            status["state"] = "done"
+    except Exception as e:
+        status.update(state="failed", error=str(e))
+    # Audit rows are on disk before the job reports its final state
+    close_audit_log()
+    status.update(updated_at=time.time(), finished_at=time.time())
+    _write_status(job_id, status)
+    return status
+
+
+# ---------------------- Queue ---------------------- #
+def _executor():
+    # Spawned (not forked) workers: the Streamlit server process has many threads
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_JOBS, mp_context=mp.get_context("spawn"))
+        return _pool
+
+
+def _reset_executor(broken):
+    # A worker killed mid-job (e.g. by the OOM killer) breaks the whole pool; start a fresh one
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _on_done(job_id, future):
+    # A worker that died (e.g. out of memory) never wrote its final state
+    if future.cancelled() or future.exception() is not None:
+        status = _read_status(job_id) or {}
+        if status.get("state") not in FINAL_STATES:
+            error = "cancelled before start" if future.cancelled() else str(future.exception())
+            status.update(state="failed", error=error, updated_at=time.time(), finished_at=time.time())
+            _write_status(job_id, status)
+    # The final state is on disk now, so job_status no longer needs the future
+    with _lock:
+        _futures.pop(job_id, None)
+
+
+def submit_job(data, filename, threshold, threshold_version, use_cascade=False):
+    # With use_cascade, threshold/threshold_version are the saved cascade's threshold and version
+    _cleanup()
+    job_id = uuid.uuid4().hex
+    os.makedirs(job_dir(job_id))
+    with open(_path(job_id, "input.csv"), "wb") as f:
+        f.write(data)
+    now = time.time()
+    _write_status(job_id, {
+        "id": job_id, "filename": filename, "state": "queued",
+        "rows_total": _count_rows(_path(job_id, "input.csv")),
+        "rows_done": 0, "rows_scored": 0, "rows_invalid": 0, "parts": 0,
+        "use_cascade": bool(use_cascade), "escalated_rows": 0, "cascade_band": None,
+        "scoring_seconds": 0.0, "drift_seconds": 0.0,
+        "threshold": threshold, "threshold_version": threshold_version,
+        "created_at": now, "updated_at": now, "started_at": None, "finished_at": None, "error": None,
+    })
+    pool = _executor()
+    try:
+        future = pool.submit(run_job, job_id)
+    except BrokenProcessPool:
+        _reset_executor(pool)
+        try:
+            future = _executor().submit(run_job, job_id)
+        except Exception as e:
+            _write_status(job_id, {**_read_status(job_id), "state": "failed", "error": str(e)})
+            raise
+    with _lock:
+        _futures[job_id] = future
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return job_id
+
+
+def job_status(job_id):
+    # Checked before reading the status: a future is only dropped after its final state is written
+    with _lock:
+        known = job_id in _futures
+    status = _read_status(job_id)
+    if status is None:
+        return None
+    # Queued/running jobs this server never started were orphaned by a restart
+    if status["state"] not in FINAL_STATES and not known:
+        status.update(state="interrupted", updated_at=time.time())
+        _write_status(job_id, status)
+
+    elapsed = (status["finished_at"] or time.time()) - status["started_at"] if status["started_at"] else 0.0
+    rate = status["rows_done"] / elapsed if elapsed > 0 else 0.0
+    remaining = max(status["rows_total"] - status["rows_done"], 0)
+    status["elapsed"] = elapsed
+    status["rows_per_second"] = rate
+    status["eta"] = remaining / rate if rate > 0 and status["state"] == "running" else None
+    status["progress"] = min(status["rows_done"] / status["rows_total"], 1.0) if status["rows_total"] else 0.0
+    return status
+
+
+def cancel_job(job_id):
+    open(_path(job_id, "cancel"), "w").close()
+    with _lock:
+        future = _futures.get(job_id)
+    # Still waiting for a worker: never start it
+    if future is not None and future.cancel():
+        status = _read_status(job_id)
+        status.update(state="cancelled", updated_at=time.time(), finished_at=time.time())
+        _write_status(job_id, status)
+
+
+def result_path(job_id):
+    # Concatenates the parts once; part 0 has the header, the rest are plain rows
+    path = _path(job_id, "result.csv")
+    if not os.path.exists(path):
+        status = _read_status(job_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            for index in range(status["parts"]):
+                with open(_path(job_id, f"part-{index:05d}.csv"), "rb") as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(tmp_path, path)
+    return path
+
+
+def read_table(job_id, name, nrows=None):
+    path = _path(job_id, name)
+    return pd.read_csv(path, nrows=nrows) if os.path.exists(path) else None
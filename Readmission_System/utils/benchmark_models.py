@@ -0,0 +1,188 @@
+# utils/benchmark_models.py
+# Serving cost of every saved model next to its holdout AUC:
+#   python -m utils.benchmark_models
+#   python -m utils.benchmark_models --models Top10Model/*.pkl --batches 1 1000 --out benchmark.csv
+#
+# Each model is measured in its own fresh process, one at a time, so import
+# costs, resident memory and timings don't leak between models.
+import argparse
+import ctypes
+import gc
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.binary_metrics import auc_from_counts, threshold_counts
+from utils.dataset import holdout_split, load_dataset
+from utils.metrics_catalog import list_entries, model_path_for
+from utils.model_loader import discover_models, load_model, model_feature_names
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+LATENCY_CALLS = 300
+MIN_SECONDS = 0.5
+
+# Imported before the baseline so load time and memory cover the model alone
+FRAMEWORK_MODULES = ["sklearn.ensemble", "sklearn.neural_network", "lightgbm", "xgboost", "catboost"]
+
+
+def _rss():
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+def _release_free_memory():
+    # Hand freed heap pages back to the OS so the next allocation shows up in RSS
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+# ---------------------- Worker ---------------------- #
+def _benchmark_one(model_path, batch_sizes, latency_calls, min_seconds):
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    _, X, _, y = holdout_split(load_dataset())
+    for name in FRAMEWORK_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    _release_free_memory()
+    rss_before = _rss()
+    model, load_seconds = _timed(load_model, model_path)
+    rss_after = _rss()
+
+    features = model_feature_names(model) or list(X.columns)
+    X = X[features]
+    scores = model.predict_proba(X)[:, 1]
+
+    # ---------- Single-row latency ----------
+    rows = [X.iloc[[i % len(X)]] for i in range(latency_calls)]
+    for row in rows[:20]:
+        model.predict_proba(row)
+    latencies = []
+    for row in rows:
+        _, seconds = _timed(model.predict_proba, row)
+        latencies.append(seconds * 1000)
+
+    # ---------- Batch throughput ----------
+    pool = X.iloc[np.resize(np.arange(len(X)), max(batch_sizes))]
+    throughput = {}
+    for size in batch_sizes:
+        batch = pool.iloc[:size]
+        calls, elapsed = 0, 0.0
+        while elapsed < min_seconds or calls == 0:
+            _, seconds = _timed(model.predict_proba, batch)
+            elapsed += seconds
+            calls += 1
+        throughput[size] = calls * size / elapsed
+
+    return {
+        "model_path": model_path,
+        "holdout_auc": auc_from_counts(threshold_counts(y.to_numpy(), scores)),
+        "disk_mb": os.path.getsize(model_path) / 1e6,
+        "rss_mb": (rss_after - rss_before) / 1e6 if psutil else None,
+        "load_ms": load_seconds * 1000,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput": throughput,
+    }
+
+
+def benchmark_models(model_paths, batch_sizes=BATCH_SIZES, latency_calls=LATENCY_CALLS, min_seconds=MIN_SECONDS):
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for path in model_paths:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                results[path] = pool.submit(_benchmark_one, path, batch_sizes, latency_calls, min_seconds).result()
+            except Exception as e:
+                results[path] = {"model_path": path, "error": str(e)}
+    return results
+
+
+# ---------------------- Report ---------------------- #
+def _pareto_front(df):
+    # A model is on the frontier if no other model is both more accurate and faster
+    front = []
+    for _, row in df.iterrows():
+        dominated = ((df["AUC"] >= row["AUC"]) & (df["p50 ms"] <= row["p50 ms"])
+                     & ((df["AUC"] > row["AUC"]) | (df["p50 ms"] < row["p50 ms"]))).any()
+        front.append(not dominated)
+    return front
+
+
+def comparison_table(results):
+    reported_auc = {model_path_for(entry): entry["roc_auc"] for entry in list_entries()}
+    rows = []
+    for path, result in results.items():
+        if "error" in result:
+            continue
+        row = {
+            "Model": path,
+            "AUC": round(result["holdout_auc"], 4),
+            "Reported AUC": round(reported_auc[path], 4) if reported_auc.get(path) else None,
+            "Disk MB": round(result["disk_mb"], 2),
+            "RSS MB": round(result["rss_mb"], 1) if result["rss_mb"] is not None else None,
+            "Load ms": round(result["load_ms"], 1),
+            "p50 ms": round(result["p50_ms"], 3),
+            "p99 ms": round(result["p99_ms"], 3),
+        }
+        for size, rows_per_sec in result["throughput"].items():
+            row[f"rows/s @{size:,}"] = round(rows_per_sec)
+        rows.append(row)
+
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["Frontier"] = np.where(_pareto_front(df), "*", "")
+        df = df.sort_values("AUC", ascending=False).reset_index(drop=True)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load time, memory, latency and throughput of saved models")
+    parser.add_argument("--models", nargs="+", default=["all"], help="Model .pkl paths, or 'all'")
+    parser.add_argument("--batches", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--latency-calls", type=int, default=LATENCY_CALLS)
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS, help="Minimum timed seconds per batch size")
+    parser.add_argument("--out", default=None, help="Optional .csv path for the comparison table")
+    args = parser.parse_args()
+
+    model_paths = discover_models() if args.models == ["all"] else args.models
+    started = time.perf_counter()
+    results = benchmark_models(model_paths, args.batches, args.latency_calls, args.min_seconds)
+
+    for path, result in results.items():
+        if "error" in result:
+            print(f"{path}: failed: {result['error']}")
+    df = comparison_table(results)
+    with pd.option_context("display.width", 250, "display.max_columns", None):
+        print(df.to_string(index=False))
+    if psutil is None:
+        print("psutil is not installed; resident size is not reported.")
+    print(f"* = on the AUC / single-row latency frontier. Benchmarked {len(model_paths)} models "
+          f"in {time.perf_counter() - started:.0f}s.")
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# utils/binary_metrics.py
+# Every metric below comes from one descending sort of the scores plus
+# cumulative sums, instead of a separate sklearn pass per metric.
+import numpy as np
+
+
+# ---------------------- Threshold Counts ---------------------- #
+def threshold_counts(y_true, scores):
+    y_true = np.asarray(y_true).astype(np.int64)
+    scores = np.asarray(scores, dtype=float)
+
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    sorted_y = y_true[order]
+
+    # Last index of each run of tied scores
+    cut = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tps = np.cumsum(sorted_y)[cut]
+    fps = cut + 1 - tps
+    return {
+        "thresholds": sorted_scores[cut],
+        "tps": tps,
+        "fps": fps,
+        "positives": int(sorted_y.sum()),
+        "negatives": int(len(sorted_y) - sorted_y.sum()),
+    }
+
+
+def confusion_at(counts, threshold):
+    # Predicted positive when score >= threshold
+    k = np.searchsorted(-counts["thresholds"], -threshold, side="right")
+    tp = int(counts["tps"][k - 1]) if k else 0
+    fp = int(counts["fps"][k - 1]) if k else 0
+    fn = counts["positives"] - tp
+    tn = counts["negatives"] - fp
+    return np.array([[tn, fp], [fn, tp]])
+
+
+def confusion_for_all_thresholds(counts):
+    tps, fps = counts["tps"], counts["fps"]
+    return {
+        "thresholds": counts["thresholds"],
+        "tp": tps,
+        "fp": fps,
+        "fn": counts["positives"] - tps,
+        "tn": counts["negatives"] - fps,
+    }
+
+
+# ---------------------- Curves ---------------------- #
+def roc_from_counts(counts):
+    fpr = np.r_[0.0, counts["fps"] / max(counts["negatives"], 1)]
+    tpr = np.r_[0.0, counts["tps"] / max(counts["positives"], 1)]
+    thresholds = np.r_[np.inf, counts["thresholds"]]
+    return fpr, tpr, thresholds
+
+
+def pr_from_counts(counts):
+    tps, fps = counts["tps"], counts["fps"]
+    precision = tps / np.maximum(tps + fps, 1)
+    recall = tps / max(counts["positives"], 1)
+    # sklearn order: recall decreasing, ending at (recall=0, precision=1)
+    return np.r_[precision[::-1], 1.0], np.r_[recall[::-1], 0.0], counts["thresholds"][::-1]
+
+
+def auc_from_counts(counts):
+    fpr, tpr, _ = roc_from_counts(counts)
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+
+def average_precision_from_counts(counts):
+    tps, fps = counts["tps"], counts["fps"]
+    precision = tps / np.maximum(tps + fps, 1)
+    recall = tps / max(counts["positives"], 1)
+    return float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+
+# ---------------------- Classification Report ---------------------- #
+def _safe_div(a, b):
+    return float(a) / b if b else 0.0
+
+
+def classification_report_from_confusion(cm):
+    (tn, fp), (fn, tp) = cm
+    total = tn + fp + fn + tp
+    report = {}
+    for label, correct, predicted, actual in (("0", tn, tn + fn, tn + fp), ("1", tp, tp + fp, tp + fn)):
+        precision = _safe_div(correct, predicted)
+        recall = _safe_div(correct, actual)
+        f1 = _safe_div(2 * precision * recall, precision + recall)
+        report[label] = {"precision": precision, "recall": recall, "f1-score": f1, "support": float(actual)}
+
+    report["accuracy"] = _safe_div(tn + tp, total)
+    for avg, weights in (("macro avg", (0.5, 0.5)),
+                         ("weighted avg", (_safe_div(tn + fp, total), _safe_div(tp + fn, total)))):
+        report[avg] = {
+            key: weights[0] * report["0"][key] + weights[1] * report["1"][key]
+            for key in ("precision", "recall", "f1-score")
+        }
+        report[avg]["support"] = float(total)
+    return report
+
+
+def evaluate_scores(y_true, scores, threshold=0.5):
+    counts = threshold_counts(y_true, scores)
+    cm = confusion_at(counts, threshold)
+    fpr, tpr, roc_thresholds = roc_from_counts(counts)
+    precision, recall, pr_thresholds = pr_from_counts(counts)
+    report = classification_report_from_confusion(cm)
+    return {
+        "accuracy": report["accuracy"],
+        "roc_auc": auc_from_counts(counts),
+        "average_precision": average_precision_from_counts(counts),
+        "classification_report": report,
+        "confusion_matrix": cm,
+        "roc_curve": {"fpr": fpr, "tpr": tpr, "thresholds": roc_thresholds},
+        "pr_curve": {"precision": precision, "recall": recall, "thresholds": pr_thresholds},
+        "threshold": threshold,
+    }
@@ -0,0 +1,168 @@
+# utils/bootstrap.py
+# Paired bootstrap intervals for AUC, F1 and accuracy on holdout scores:
+#   python -m utils.bootstrap --models HypertunedModels/Lightgbm_Randomsearch.pkl BaseModels/catboost.pkl
+#
+# Every model is scored on the same resampled rows in each replicate, so the
+# differences between models are paired. A replicate is a row of draw counts
+# (how often each holdout row was drawn), so every metric is a weighted sum over
+# the original rows; chunks of replicates run in separate processes.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.score_cache import holdout_scores
+
+N_REPLICATES = 2000
+CHUNK_SIZE = 50
+CONFIDENCE = 0.95
+METRICS = ("roc_auc", "f1", "accuracy")
+
+
+# ---------------------- Per-model Layout ---------------------- #
+def _auc_layout(y_true, scores):
+    # Ascending score order and the start of each run of tied scores
+    order = np.argsort(scores, kind="mergesort")
+    sorted_scores = scores[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_scores)) + 1]
+    return order, starts, y_true[order].astype(bool)
+
+
+def _weighted_auc(weights, layout):
+    # Mann-Whitney AUC with each row counted `weight` times; ties count half
+    order, starts, is_positive = layout
+    w = weights[:, order]
+    pos = np.where(is_positive, w, 0)
+    neg = w - pos
+    if len(starts) < len(order):
+        pos = np.add.reduceat(pos, starts, axis=1)
+        neg = np.add.reduceat(neg, starts, axis=1)
+    neg_below = np.cumsum(neg, axis=1) - neg
+    wins = np.einsum("ij,ij->i", pos, neg_below + 0.5 * neg)
+    return wins / (pos.sum(axis=1) * neg.sum(axis=1))
+
+
+def _threshold_metrics(weights, y_true, predicted):
+    tp = weights @ (y_true & predicted)
+    fp = weights @ (~y_true & predicted)
+    fn = weights @ (y_true & ~predicted)
+    total = weights.sum(axis=1)
+    f1 = 2 * tp / np.maximum(2 * tp + fp + fn, 1)
+    accuracy = (total - fp - fn) / total
+    return f1, accuracy
+
+
+def _metrics_for_weights(weights, y_true, score_matrix, threshold):
+    # Returns {metric: (n_replicates, n_models)}
+    y_bool = y_true.astype(bool)
+    out = {metric: np.empty((len(weights), len(score_matrix))) for metric in METRICS}
+    for m, scores in enumerate(score_matrix):
+        out["roc_auc"][:, m] = _weighted_auc(weights, _auc_layout(y_true, scores))
+        out["f1"][:, m], out["accuracy"][:, m] = _threshold_metrics(weights, y_bool, scores >= threshold)
+    return out
+
+
+# ---------------------- Worker ---------------------- #
+def _replicate_chunk(seed, size, y_true, score_matrix, threshold):
+    n_rows = len(y_true)
+    rng = np.random.default_rng(seed)
+    # (size, n_rows) draw indices -> (size, n_rows) draw counts in one bincount
+    draws = rng.integers(0, n_rows, size=(size, n_rows))
+    draws += np.arange(size)[:, None] * n_rows
+    weights = np.bincount(draws.ravel(), minlength=size * n_rows).reshape(size, n_rows).astype(np.float64)
+    return _metrics_for_weights(weights, y_true, score_matrix, threshold)
+
+
+def replicate_metrics(y_true, score_matrix, n_replicates=N_REPLICATES, threshold=0.5, seed=42, workers=None):
+    y_true = np.asarray(y_true).astype(np.int8)
+    score_matrix = np.asarray(score_matrix, dtype=np.float64)
+    sizes = [CHUNK_SIZE] * (n_replicates // CHUNK_SIZE)
+    if n_replicates % CHUNK_SIZE:
+        sizes.append(n_replicates % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = workers or min(len(sizes), os.cpu_count() or 1)
+    if workers == 1:
+        chunks = [_replicate_chunk(s, n, y_true, score_matrix, threshold) for s, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(
+                _replicate_chunk, seeds, sizes,
+                [y_true] * len(sizes), [score_matrix] * len(sizes), [threshold] * len(sizes)
+            ))
+    return {metric: np.concatenate([chunk[metric] for chunk in chunks]) for metric in METRICS}
+
+
+# ---------------------- Intervals & Paired Tests ---------------------- #
+def _interval(samples, confidence):
+    tail = (1 - confidence) / 2 * 100
+    return np.percentile(samples, [tail, 100 - tail], axis=0)
+
+
+def bootstrap_comparison(model_paths, n_replicates=N_REPLICATES, threshold=0.5, confidence=CONFIDENCE,
+                         seed=42, workers=None):
+    labels, score_matrix, y_true = [], [], None
+    for path in model_paths:
+        y, scores = holdout_scores(path)
+        if y_true is not None and not np.array_equal(y, y_true):
+            raise ValueError(f"{path} was scored on a different holdout set")
+        y_true = y
+        labels.append(path)
+        score_matrix.append(scores)
+
+    score_matrix = np.asarray(score_matrix, dtype=np.float64)
+    point = _metrics_for_weights(np.ones((1, len(y_true))), y_true, score_matrix, threshold)
+    samples = replicate_metrics(y_true, score_matrix, n_replicates, threshold, seed, workers)
+    reference = int(np.argmax(point["roc_auc"][0]))
+
+    results = {"models": {}, "reference": labels[reference], "n_replicates": n_replicates,
+               "n_rows": int(len(y_true)), "confidence": confidence, "threshold": threshold}
+    for m, label in enumerate(labels):
+        summary = {}
+        for metric in METRICS:
+            low, high = _interval(samples[metric][:, m], confidence)
+            diff = samples[metric][:, reference] - samples[metric][:, m]
+            diff_low, diff_high = _interval(diff, confidence)
+            # Two-sided paired bootstrap p-value for "reference is no better than this model"
+            p_value = 1.0 if m == reference else min(1.0, 2 * min((diff <= 0).mean(), (diff >= 0).mean()))
+            summary[metric] = {
+                "estimate": float(point[metric][0, m]),
+                "low": float(low),
+                "high": float(high),
+                "diff_vs_reference": float(point[metric][0, reference] - point[metric][0, m]),
+                "diff_low": float(diff_low),
+                "diff_high": float(diff_high),
+                "p_value": float(p_value),
+            }
+        results["models"][label] = summary
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paired bootstrap confidence intervals for saved models")
+    parser.add_argument("--models", nargs="+", required=True, help="Model .pkl paths scored on the holdout set")
+    parser.add_argument("--replicates", type=int, default=N_REPLICATES)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    for path in args.models:
+        holdout_scores(path)
+    started = time.perf_counter()
+    results = bootstrap_comparison(args.models, args.replicates, args.threshold, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"{results['n_replicates']} replicates x {results['n_rows']} rows, reference: {results['reference']}")
+    print(f"{'model':<48}{'metric':>10}{'estimate':>10}{'95% CI':>20}{'p vs ref':>10}")
+    for path, summary in results["models"].items():
+        for metric in METRICS:
+            s = summary[metric]
+            ci = f"[{s['low']:.4f}, {s['high']:.4f}]"
+            print(f"{path:<48}{metric:>10}{s['estimate']:>10.4f}{ci:>20}{s['p_value']:>10.3f}")
+    print(f"Bootstrap finished in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# utils/cascade.py
+# Two-stage scoring: a cheap model scores every row and only rows whose
+# probability falls inside an uncertainty band are re-scored by the expensive
+# model (or the average of several). Only batch CSV scoring uses it: the
+# manual form collects the Top 10 features, not the full-feature inputs the
+# cascade's models need.
+#   python -m utils.cascade --fast BaseModels/catboost.pkl \
+#       --expensive HypertunedModels/Lightgbm_Randomsearch.pkl HypertunedModels/CatBoost_Randomsearch.pkl
+#   python -m utils.cascade ... --band 0.3 0.7 --threshold 0.45 --save
+#   python -m utils.cascade --disable   # batch scoring goes back to the Top 10 model
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.binary_metrics import auc_from_counts, threshold_counts
+from utils.dataset import holdout_split, load_dataset
+from utils.model_loader import load_model, model_feature_names, model_version
+from utils.settings import disable_cascade, get_cascade_config, get_decision_threshold, save_cascade_config
+
+HALF_WIDTHS = [0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
+
+
+def _positive_proba(model, X):
+    features = model_feature_names(model) or list(X.columns)
+    return model.predict_proba(X[features])[:, 1]
+
+
+# ---------------------- Scorer ---------------------- #
+class CascadeScorer:
+    def __init__(self, fast_model, expensive_models, band):
+        self.fast_model = fast_model
+        self.expensive_models = list(expensive_models)
+        self.band = (float(band[0]), float(band[1]))
+        self.model_paths = None
+
+    @classmethod
+    def from_paths(cls, fast_path, expensive_paths, band):
+        scorer = cls(load_model(fast_path), [load_model(p) for p in expensive_paths], band)
+        scorer.model_paths = [fast_path, *expensive_paths]
+        return scorer
+
+    @property
+    def model_version(self):
+        # Audit label: the band plus every model file behind a cascade score
+        paths = "+".join(model_version(p) for p in self.model_paths) if self.model_paths else "in-memory"
+        return f"cascade[{self.band[0]:g}-{self.band[1]:g}]:{paths}"
+
+    @property
+    def features(self):
+        # None when any model doesn't record its inputs: the cascade's columns are then unknown
+        names = []
+        for model in [self.fast_model] + self.expensive_models:
+            model_names = model_feature_names(model)
+            if model_names is None:
+                return None
+            for name in model_names:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def score(self, X):
+        # Returns (probabilities, mask of rows sent to the expensive stage)
+        scores = _positive_proba(self.fast_model, X)
+        low, high = self.band
+        escalate = (scores >= low) & (scores <= high)
+        if escalate.any():
+            uncertain = X[escalate]
+            scores[escalate] = np.mean([_positive_proba(m, uncertain) for m in self.expensive_models], axis=0)
+        return scores, escalate
+
+    def predict_proba(self, X):
+        scores, _ = self.score(X)
+        return np.column_stack([1 - scores, scores])
+
+
+@lru_cache(maxsize=4)
+def _cached_scorer(fast_path, expensive_paths, band):
+    return CascadeScorer.from_paths(fast_path, expensive_paths, band)
+
+
+def load_cascade():
+    # The saved cascade, or None when batch scoring should use a single model
+    config = get_cascade_config()
+    if config is None:
+        return None
+    return _cached_scorer(config["fast_model"], tuple(config["expensive_models"]), tuple(config["band"]))
+
+
+# ---------------------- Evaluation ---------------------- #
+def _auc(y_true, scores):
+    return auc_from_counts(threshold_counts(y_true, scores))
+
+
+def _rows_per_second(fn, X, repeats=3):
+    best = np.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - started)
+    return len(X) / best
+
+
+def band_sweep(fast_scores, expensive_scores, y_true, fast_rate, expensive_rate, center=0.5, half_widths=HALF_WIDTHS):
+    # Both stages are scored once; each band only changes which score a row keeps
+    rows = []
+    for half in half_widths:
+        low, high = max(center - half, 0.0), min(center + half, 1.0)
+        escalate = (fast_scores >= low) & (fast_scores <= high)
+        combined = np.where(escalate, expensive_scores, fast_scores)
+        # Seconds per row: every row pays the fast model, escalated rows also pay the expensive stage
+        cost = 1 / fast_rate + escalate.mean() / expensive_rate
+        rows.append({
+            "band": f"[{low:.2f}, {high:.2f}]",
+            "escalated": escalate.mean(),
+            "auc": _auc(y_true, combined),
+            "rows_per_sec": 1 / cost,
+            "speedup": (1 / cost) / expensive_rate,
+        })
+    return pd.DataFrame(rows)
+
+
+def evaluate_cascade(fast_path, expensive_paths, band=None, half_widths=HALF_WIDTHS, center=None):
+    _, X, _, y = holdout_split(load_dataset())
+    y_true = y.to_numpy()
+    fast_model = load_model(fast_path)
+    expensive_models = [load_model(p) for p in expensive_paths]
+
+    def expensive_stage(frame):
+        return np.mean([_positive_proba(m, frame) for m in expensive_models], axis=0)
+
+    fast_scores = _positive_proba(fast_model, X)
+    expensive_scores = expensive_stage(X)
+    fast_rate = _rows_per_second(lambda frame: _positive_proba(fast_model, frame), X)
+    expensive_rate = _rows_per_second(expensive_stage, X)
+
+    if center is None:
+        center, _ = get_decision_threshold(fast_path)
+    report = {
+        "n_rows": len(X),
+        "fast_auc": _auc(y_true, fast_scores),
+        "expensive_auc": _auc(y_true, expensive_scores),
+        "fast_rows_per_sec": fast_rate,
+        "expensive_rows_per_sec": expensive_rate,
+        "sweep": band_sweep(fast_scores, expensive_scores, y_true, fast_rate, expensive_rate, center, half_widths),
+    }
+
+    if band is not None:
+        # Measured end to end, including the row selection and the second predict call
+        scorer = CascadeScorer(fast_model, expensive_models, band)
+        scores, escalate = scorer.score(X)
+        report["band"] = {
+            "band": tuple(band),
+            "escalated": float(escalate.mean()),
+            "auc": _auc(y_true, scores),
+            "rows_per_sec": _rows_per_second(scorer.score, X),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a fast-model / expensive-model cascade on the holdout split")
+    parser.add_argument("--fast", help="Cheap model scoring every row")
+    parser.add_argument("--expensive", nargs="+", help="Model(s) averaged for uncertain rows")
+    parser.add_argument("--band", nargs=2, type=float, metavar=("LOW", "HIGH"), default=None,
+                        help="Probability band escalated to the expensive stage")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Decision threshold for the cascade's scores (centers the sweep; required with --save)")
+    parser.add_argument("--save", action="store_true", help="Use this cascade for batch CSV predictions")
+    parser.add_argument("--disable", action="store_true", help="Turn the saved cascade off for batch CSV predictions")
+    parser.add_argument("--note", default="")
+    args = parser.parse_args()
+
+    if args.disable:
+        version = disable_cascade(note=args.note)
+        print(f"Cascade disabled (version {version}); batch predictions use the Top 10 model")
+        return
+    if not args.fast or not args.expensive:
+        parser.error("--fast and --expensive are required unless --disable is given")
+    if args.save and args.threshold is None:
+        # The Top 10 model's threshold doesn't carry over to the cascade's scores
+        parser.error("--save needs --threshold")
+
+    report = evaluate_cascade(args.fast, args.expensive, args.band, center=args.threshold)
+    print(f"Holdout rows: {report['n_rows']:,}")
+    print(f"Fast model      AUC {report['fast_auc']:.4f}  {report['fast_rows_per_sec']:>12,.0f} rows/s")
+    print(f"Expensive stage AUC {report['expensive_auc']:.4f}  {report['expensive_rows_per_sec']:>12,.0f} rows/s")
+    print()
+    sweep = report["sweep"]
+    print(f"{'band':<16}{'escalated':>10}{'AUC':>8}{'ΔAUC':>9}{'rows/s':>12}{'speedup':>9}")
+    for _, row in sweep.iterrows():
+        print(f"{row['band']:<16}{row['escalated']:>10.1%}{row['auc']:>8.4f}{row['auc'] - report['expensive_auc']:>+9.4f}"
+              f"{row['rows_per_sec']:>12,.0f}{row['speedup']:>8.1f}x")
+
+    if "band" in report:
+        measured = report["band"]
+        print()
+        print(f"Measured cascade {measured['band']}: {measured['escalated']:.1%} escalated, AUC {measured['auc']:.4f} "
+              f"({measured['auc'] - report['expensive_auc']:+.4f} vs expensive), {measured['rows_per_sec']:,.0f} rows/s "
+              f"({measured['rows_per_sec'] / report['expensive_rows_per_sec']:.1f}x)")
+        if args.save:
+            version = save_cascade_config(
+                args.fast, args.expensive, args.band, args.threshold, auc=measured["auc"],
+                escalated=measured["escalated"], rows_per_sec=measured["rows_per_sec"], note=args.note
+            )
+            print(f"Saved as cascade version {version} (threshold {args.threshold:.2f})")
+    elif args.save:
+        print("Pass --band to save a cascade.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# utils/cohort_export.py
+# Streams the encounters matching a filter to CSV or Parquet without building
+# the filtered frame: the memory-mapped Arrow copy of the dataset is sliced
+# into chunks, and each chunk is filtered, optionally decoded with
+# encoding_maps, and handed to the writer before the next one is read. Memory
+# stays at about one chunk whatever the size of the dataset or the result.
+#
+# Filters are (column, "in", values) or (column, "between", (low, high)) on the
+# encoded values, ANDed together.
+#   python -m utils.cohort_export --where gender=1 --where age=5:7 --decode --out cohort.parquet
+#   python -m utils.cohort_export --where readmitted=1 --where race=1,3 --out readmitted.csv
+import argparse
+import os
+import time
+from contextlib import suppress
+from functools import lru_cache
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from utils.dataset import DATA_PATH
+from utils.mappings import encoding_maps
+from utils.shared_data import shared_table
+
+EXPORT_DIR = "exports"
+CHUNK_ROWS = 65_536
+FORMATS = ("csv", "parquet")
+
+
+def filter_expression(filters):
+    expression = None
+    for column, op, value in filters:
+        if op == "in":
+            term = pc.field(column).isin(list(value))
+        elif op == "between":
+            term = (pc.field(column) >= value[0]) & (pc.field(column) <= value[1])
+        else:
+            raise ValueError(f"Unknown filter operator: {op}")
+        expression = term if expression is None else expression & term
+    return expression
+
+
+@lru_cache(maxsize=None)
+def _labels(column):
+    # Dense lookup array: code -> label, so decoding a chunk is one take()
+    mapping = encoding_maps[column]
+    return pa.array([mapping.get(code) for code in range(max(mapping) + 1)], pa.string())
+
+
+def _decode(table):
+    for i, name in enumerate(table.column_names):
+        if name not in encoding_maps:
+            continue
+        labels = _labels(name)
+        codes = table.column(i)
+        # Codes outside the mapping become nulls instead of failing the export
+        valid = pc.and_(pc.greater_equal(codes, 0), pc.less(codes, len(labels)))
+        decoded = labels.take(pc.if_else(valid, codes, pa.scalar(None, codes.type)))
+        table = table.set_column(i, name, decoded)
+    return table
+
+
+def _writer(out, fmt, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(out, schema, compression="zstd")
+    return pacsv.CSVWriter(out, schema)
+
+
+def export_cohort(out, filters=(), fmt=None, decode=False, columns=None, extra_columns=None,
+                  data_path=DATA_PATH, chunk_rows=CHUNK_ROWS, progress=None):
+    # extra_columns: {name: array aligned with the dataset rows}, e.g. the cohort risk scores;
+    # they can be filtered on and are exported like any other column
+    fmt = fmt or ("parquet" if str(out).endswith(".parquet") else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    table = shared_table(data_path)
+    expression = filter_expression(filters)
+    extra_columns = extra_columns or {}
+
+    started = time.perf_counter()
+    rows_written = 0
+    writer = None
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    try:
+        for offset in range(0, max(table.num_rows, 1), chunk_rows):
+            chunk = table.slice(offset, chunk_rows)
+            for name, values in extra_columns.items():
+                chunk = chunk.append_column(name, pa.array(values[offset:offset + chunk.num_rows]))
+            if expression is not None:
+                chunk = chunk.filter(expression)
+            if columns:
+                chunk = chunk.select(columns)
+            if decode:
+                chunk = _decode(chunk)
+            if writer is None:
+                writer = _writer(tmp_path, fmt, chunk.schema)
+            writer.write_table(chunk)
+            rows_written += chunk.num_rows
+            if progress:
+                progress(min(offset + chunk_rows, table.num_rows), table.num_rows, rows_written)
+    except BaseException:
+        # A failed or interrupted export (e.g. a page rerun mid-stream) leaves nothing in exports/
+        if writer is not None:
+            with suppress(Exception):
+                writer.close()
+            writer = None
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, out)
+
+    seconds = time.perf_counter() - started
+    return {
+        "path": out,
+        "format": fmt,
+        "rows_scanned": table.num_rows,
+        "rows_written": rows_written,
+        "bytes": os.path.getsize(out),
+        "seconds": seconds,
+        "rows_per_second": table.num_rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _parse_where(text):
+    # column=1,3 (in) or column=2:8 (between, inclusive)
+    column, _, value = text.partition("=")
+    if ":" in value:
+        low, high = value.split(":")
+        return column, "between", (float(low), float(high))
+    return column, "in", [int(v) if v.lstrip("-").isdigit() else v for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a filtered cohort of the dataset to CSV or Parquet.")
+    parser.add_argument("--out", required=True, help="Output path (.csv or .parquet)")
+    parser.add_argument("--where", action="append", default=[], help="column=v1,v2 or column=low:high (encoded values)")
+    parser.add_argument("--columns", nargs="*", help="Columns to export (default all)")
+    parser.add_argument("--decode", action="store_true", help="Write labels from encoding_maps instead of codes")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    result = export_cohort(args.out, [_parse_where(w) for w in args.where], decode=args.decode,
+                           columns=args.columns, data_path=args.data, chunk_rows=args.chunk_rows)
+    print(f"{result['rows_written']:,} of {result['rows_scanned']:,} rows -> {result['path']} "
+          f"({result['bytes'] / 1e6:.1f} MB) in {result['seconds']:.2f}s, {result['rows_per_second']:,.0f} rows/s scanned")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# utils/counterfactuals.py
+# "What would lower this patient's risk?": the smallest edits to the
+# modifiable Top 10 features that bring the predicted probability under the
+# decision threshold.
+#
+# Beam search over edits: each level changes one more feature, every child of
+# every beam state is scored in one predict_proba call, children that cross
+# the threshold are kept as answers and the rest are ranked by risk reduction
+# per unit of change to form the next beam. The search stops at the time
+# budget and returns what it has found so far.
+#   python -m utils.counterfactuals   # latency over random high-risk encounters
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset import TOP10_FEATURES, dataset_statistics, load_dataset
+from utils.mappings import encoding_maps
+from utils.schema import NUMERIC_RANGES
+
+# Things that can change during or after an encounter; visit history and admission source cannot
+MODIFIABLE = ["numchange", "num_lab_procedures", "time_in_hospital", "diabetesMed"]
+TIME_BUDGET = 0.3
+BEAM_WIDTH = 16
+MAX_RESULTS = 5
+# Extra cost per changed feature, so one larger edit beats several tiny ones
+SPARSITY_COST = 0.5
+
+
+@lru_cache(maxsize=1)
+def _search_space():
+    # Candidate values (the schema's valid range, capped at the dataset maximum) and the cost of one unit of change
+    describe = dataset_statistics()["describe"]
+    grids, scales = [], []
+    for feature in MODIFIABLE:
+        if feature in NUMERIC_RANGES:
+            low, high = NUMERIC_RANGES[feature]
+            high = min(high, int(describe.loc["max", feature]))
+            grids.append(np.arange(low, high + 1))
+            scales.append(float(describe.loc["std", feature]) or 1.0)
+        else:
+            grids.append(np.array(sorted(encoding_maps[feature])))
+            scales.append(1.0)
+    return grids, np.array(scales)
+
+
+def _costs(states, base, columns, scales):
+    deltas = np.abs(states[:, columns] - base[columns])
+    return (deltas / scales).sum(axis=1) + SPARSITY_COST * (deltas > 0).sum(axis=1)
+
+
+def find_counterfactuals(model, input_df, threshold, time_budget=TIME_BUDGET,
+                         beam_width=BEAM_WIDTH, max_results=MAX_RESULTS):
+    started = time.perf_counter()
+    deadline = started + time_budget
+    base = input_df[TOP10_FEATURES].to_numpy(dtype=np.int64)[0]
+    columns = np.array([TOP10_FEATURES.index(f) for f in MODIFIABLE])
+    grids, scales = _search_space()
+    base_probability = float(model.predict_proba(input_df[TOP10_FEATURES])[0, 1])
+
+    beam = base[None, :]
+    found = {}
+    scored = 0
+    complete = True
+    for _ in MODIFIABLE:
+        # All single-feature edits of every beam state, as one matrix
+        children = []
+        for state in beam:
+            for i, column in enumerate(columns):
+                if state[column] != base[column]:
+                    continue
+                values = grids[i][grids[i] != base[column]]
+                block = np.repeat(state[None, :], len(values), axis=0)
+                block[:, column] = values
+                children.append(block)
+        if not children:
+            break
+        children = np.unique(np.concatenate(children), axis=0)
+        probabilities = model.predict_proba(pd.DataFrame(children, columns=TOP10_FEATURES))[:, 1]
+        costs = _costs(children, base, columns, scales)
+        scored += len(children)
+
+        # Answers: the cheapest crossing edit for each set of changed features
+        crossing = probabilities < threshold
+        for state, probability, cost in zip(children[crossing], probabilities[crossing], costs[crossing]):
+            changed = tuple(np.flatnonzero(state[columns] != base[columns]))
+            if changed not in found or cost < found[changed]["cost"]:
+                found[changed] = {"state": state, "probability": float(probability), "cost": float(cost)}
+
+        if time.perf_counter() > deadline:
+            complete = False
+            break
+        # Next beam: the most risk removed per unit of change among edits that haven't crossed yet
+        remaining = np.flatnonzero(~crossing)
+        gain = (base_probability - probabilities[remaining]) / costs[remaining]
+        beam = children[remaining[np.argsort(-gain)[:beam_width]]]
+        if not len(beam):
+            break
+
+    results = sorted(found.values(), key=lambda r: r["cost"])
+    # Drop answers that change a superset of the features of a cheaper answer
+    minimal = []
+    for result in results:
+        changed = set(np.flatnonzero(result["state"] != base))
+        if not any(other["changed"] <= changed for other in minimal):
+            minimal.append({**result, "changed": changed})
+    suggestions = [{
+        "changes": [(TOP10_FEATURES[c], int(base[c]), int(r["state"][c])) for c in sorted(r["changed"])],
+        "probability": r["probability"],
+        "cost": r["cost"],
+    } for r in minimal[:max_results]]
+    return {
+        "suggestions": suggestions,
+        "base_probability": base_probability,
+        "candidates": scored,
+        "seconds": time.perf_counter() - started,
+        "complete": complete,
+    }
+
+
+def describe_change(feature, old, new):
+    if feature in encoding_maps:
+        return f"{feature}: {encoding_maps[feature][old]} → {encoding_maps[feature][new]}"
+    return f"{feature}: {old} → {new}"
+
+
+def main():
+    from utils.model_loader import DEFAULT_MODEL_PATH, get_model
+    from utils.settings import get_decision_threshold
+
+    parser = argparse.ArgumentParser(description="Time the counterfactual search on high-risk encounters.")
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET)
+    args = parser.parse_args()
+
+    model = get_model(DEFAULT_MODEL_PATH)
+    threshold, _ = get_decision_threshold()
+    X = load_dataset()[TOP10_FEATURES]
+    risky = X[model.predict_proba(X)[:, 1] >= threshold]
+    rows = risky.sample(min(args.patients, len(risky)), random_state=0)
+    _search_space()  # dataset statistics; the app loads them during warm-up
+
+    timings, answered, complete = [], 0, 0
+    for i in range(len(rows)):
+        result = find_counterfactuals(model, rows.iloc[[i]], threshold, args.budget)
+        timings.append(result["seconds"] * 1000)
+        answered += bool(result["suggestions"])
+        complete += result["complete"]
+    timings = np.array(timings)
+    print(f"{len(rows)} high-risk encounters: p50 {np.percentile(timings, 50):.0f} ms, "
+          f"p95 {np.percentile(timings, 95):.0f} ms, max {timings.max():.0f} ms")
+    print(f"with a suggestion: {answered}, full search within budget: {complete}")
+
+
+if __name__ == "__main__":
+    main()
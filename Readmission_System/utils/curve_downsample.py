@@ -0,0 +1,103 @@
+# utils/curve_downsample.py
+import json
+
+import numpy as np
+
+PLOT_POINTS = 400
+AUC_TOLERANCE = 5e-4
+
+
+# ---------------------- Shape-Critical Points ---------------------- #
+def _upper_hull(x, y):
+    # Monotone chain over points already ordered by x; returns indices
+    hull = []
+    for i in range(len(x)):
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            cross = (x[b] - x[a]) * (y[i] - y[a]) - (y[b] - y[a]) * (x[i] - x[a])
+            if cross < 0:
+                break
+            hull.pop()
+        hull.append(i)
+    return np.asarray(hull, dtype=int)
+
+
+def _lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: one point per bucket, chosen to maximise
+    # the triangle formed with the previous pick and the next bucket's mean.
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return selected
+
+
+def curve_area(x, y):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    return float(np.abs(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2)))
+
+
+# ---------------------- Downsampling ---------------------- #
+def downsample_curve(x, y, max_points=PLOT_POINTS, auc_tolerance=AUC_TOLERANCE):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    full_area = curve_area(x, y)
+    if n <= max_points:
+        return x, y, {"points_in": n, "points_out": n, "auc_error": 0.0}
+
+    hull = _upper_hull(x, y) if np.all(np.diff(x) >= 0) else np.empty(0, dtype=int)
+    budget = max_points
+    while True:
+        # Hull vertices keep the curve's envelope (and its optimal operating
+        # points); LTTB spends the rest of the budget on local shape.
+        keep = np.union1d(hull, _lttb(x, y, max(3, budget - len(hull))))
+        x_out, y_out = x[keep], y[keep]
+        error = abs(curve_area(x_out, y_out) - full_area)
+        if error <= auc_tolerance or len(keep) >= n:
+            break
+        budget *= 2
+
+    return x_out, y_out, {"points_in": n, "points_out": len(keep), "auc_error": error}
+
+
+def payload_bytes(x, y):
+    return len(json.dumps({"x": np.asarray(x).tolist(), "y": np.asarray(y).tolist()}))
+
+
+# ---------------------- Report ---------------------- #
+def main():
+    from utils.metrics_catalog import list_entries, load_roc_curve
+
+    print(f"{'metrics file':<50}{'points':>10}{'kept':>8}{'bytes':>12}{'kept':>10}{'AUC err':>10}")
+    total_in = total_out = 0
+    for entry in list_entries():
+        fpr, tpr = load_roc_curve(entry["path"])
+        if fpr is None:
+            continue
+        x, y, info = downsample_curve(fpr, tpr)
+        before, after = payload_bytes(fpr, tpr), payload_bytes(x, y)
+        total_in, total_out = total_in + before, total_out + after
+        print(f"{entry['path']:<50}{info['points_in']:>10}{info['points_out']:>8}"
+              f"{before:>12,}{after:>10,}{info['auc_error']:>10.2e}")
+    if total_in:
+        print(f"Total payload {total_in:,} -> {total_out:,} bytes ({1 - total_out / total_in:.1%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
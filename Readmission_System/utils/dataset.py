@@ -0,0 +1,42 @@
+# utils/dataset.py
+from functools import lru_cache
+from sklearn.model_selection import train_test_split
+from utils.shared_data import data_key, shared_frame
+
+DATA_PATH = "data/FYP_Cleaned2.csv"
+TARGET = "readmitted"
+
+# Same split as Model_Building.ipynb, so holdout scores match the saved metrics
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+TOP10_FEATURES = [
+    "number_of_visits",
+    "number_inpatient",
+    "number_diagnoses",
+    "number_emergency",
+    "number_outpatient",
+    "admission_source_id",
+    "diabetesMed",
+    "numchange",
+    "time_in_hospital",
+    "num_lab_procedures"
+]
+
+def load_dataset(path=DATA_PATH):
+    # Memory-mapped and shared by every session and worker process; treat as read-only
+    return shared_frame(path)
+
+@lru_cache(maxsize=4)
+def _statistics(path, key):
+    df = shared_frame(path)
+    return {"describe": df.describe(), "corr": df.corr()}
+
+def dataset_statistics(path=DATA_PATH):
+    # Summary and correlation matrix of the raw (encoded) columns, computed once per dataset version
+    return _statistics(path, data_key(path))
+
+def holdout_split(df, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    X = df.drop(columns=[TARGET])
+    y = df[TARGET]
+    return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
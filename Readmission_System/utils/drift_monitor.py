@@ -0,0 +1,162 @@
+# utils/drift_monitor.py
+# Compares uploaded batches with the training data without a second pass:
+# each scored chunk only adds to per-feature bin counts, and PSI/KS are read
+# off those counts at any time.
+#
+# The reference profile (bin edges + training proportions for the Top 10
+# features and the model's training scores) is built once per dataset/model
+# version and kept in .cache/drift_reference.json.
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset import DATA_PATH, TOP10_FEATURES, holdout_split, load_dataset
+from utils.model_loader import DEFAULT_MODEL_PATH, load_model, model_feature_names
+from utils.score_cache import cache_key
+
+REFERENCE_PATH = ".cache/drift_reference.json"
+SCORE_COLUMN = "model_score"
+PSI_BINS = 10
+KS_POINTS = 100
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+EPSILON = 1e-4
+
+
+# ---------------------- Reference Profile ---------------------- #
+def _edges(values, n_bins):
+    # Discrete features: one bin per value. Continuous: quantile bins.
+    values = values[~np.isnan(values)]
+    unique = np.unique(values)
+    if len(unique) <= n_bins:
+        return unique
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def _bin_counts(values, edges):
+    # Bin k holds edges[k-1] < x <= edges[k]; the last bin is everything above the last edge
+    return np.bincount(np.searchsorted(edges, values, side="left"), minlength=len(edges) + 1)
+
+
+def _profile(values, psi_bins=PSI_BINS, ks_points=KS_POINTS):
+    values = np.asarray(values, dtype=float)
+    present = values[~np.isnan(values)]
+    ks_edges = _edges(present, ks_points)
+    # PSI edges are a subset of the KS edges, so one bin count per chunk serves both
+    psi_edges = np.unique(ks_edges[np.searchsorted(ks_edges, _edges(present, psi_bins)).clip(0, len(ks_edges) - 1)])
+    psi_groups = np.r_[np.searchsorted(psi_edges, ks_edges, side="left"), len(psi_edges)]
+    return {
+        "psi_groups": psi_groups.tolist(),
+        "psi_expected": (_bin_counts(present, psi_edges) / len(present)).tolist(),
+        "ks_edges": ks_edges.tolist(),
+        "ks_cdf": (np.cumsum(_bin_counts(present, ks_edges)) / len(present)).tolist(),
+        "min": float(present.min()),
+        "max": float(present.max()),
+    }
+
+
+def build_reference(model_path=DEFAULT_MODEL_PATH, data_path=DATA_PATH):
+    X_train, _, _, _ = holdout_split(load_dataset(data_path))
+    model = load_model(model_path)
+    features = model_feature_names(model) or TOP10_FEATURES
+    scores = model.predict_proba(X_train[features])[:, 1]
+
+    profiles = {name: _profile(X_train[name].to_numpy()) for name in TOP10_FEATURES}
+    profiles[SCORE_COLUMN] = _profile(scores, ks_points=200)
+    return {
+        "key": cache_key(model_path, data_path),
+        "model_path": model_path,
+        "n_rows": int(len(X_train)),
+        "profiles": profiles,
+    }
+
+
+@lru_cache(maxsize=4)
+def _reference(model_path, data_path, key):
+    try:
+        with open(REFERENCE_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached
+    except (OSError, ValueError):
+        pass
+
+    reference = build_reference(model_path, data_path)
+    os.makedirs(os.path.dirname(REFERENCE_PATH), exist_ok=True)
+    tmp_path = f"{REFERENCE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(reference, f)
+    os.replace(tmp_path, REFERENCE_PATH)
+    return reference
+
+
+def load_reference(model_path=DEFAULT_MODEL_PATH, data_path=DATA_PATH):
+    return _reference(model_path, data_path, cache_key(model_path, data_path))
+
+
+# ---------------------- Streaming Monitor ---------------------- #
+class DriftMonitor:
+    def __init__(self, reference):
+        self.reference = reference
+        self.profiles = {
+            name: {key: np.asarray(value) if isinstance(value, list) else value for key, value in profile.items()}
+            for name, profile in reference["profiles"].items()
+        }
+        self.ks_counts = {name: np.zeros(len(p["ks_edges"]) + 1) for name, p in self.profiles.items()}
+        self.missing = dict.fromkeys(self.profiles, 0)
+        self.out_of_range = dict.fromkeys(self.profiles, 0)
+        self.rows = 0
+
+    def _add(self, name, values):
+        profile = self.profiles[name]
+        values = np.asarray(values, dtype=float)
+        is_missing = np.isnan(values)
+        if is_missing.any():
+            self.missing[name] += int(is_missing.sum())
+            values = values[~is_missing]
+        self.out_of_range[name] += int(np.count_nonzero((values < profile["min"]) | (values > profile["max"])))
+        self.ks_counts[name] += _bin_counts(values, profile["ks_edges"])
+
+    def update(self, chunk, scores=None):
+        for name in TOP10_FEATURES:
+            if name in chunk.columns:
+                column = chunk[name]
+                if not pd.api.types.is_numeric_dtype(column):
+                    column = pd.to_numeric(column, errors="coerce")
+                self._add(name, column.to_numpy())
+        if scores is not None:
+            self._add(SCORE_COLUMN, scores)
+        self.rows += len(chunk)
+
+    def _stats(self, name):
+        profile = self.profiles[name]
+        counts = self.ks_counts[name]
+        total = counts.sum()
+        if not total:
+            return np.nan, np.nan
+        psi_counts = np.bincount(profile["psi_groups"], weights=counts, minlength=len(profile["psi_expected"]))
+        actual = np.maximum(psi_counts / total, EPSILON)
+        expected = np.maximum(profile["psi_expected"], EPSILON)
+        psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+        # KS on the shared grid: exact for discrete features, grid-resolution otherwise
+        cdf = np.cumsum(counts) / total
+        ks = float(np.max(np.abs(cdf - profile["ks_cdf"])))
+        return psi, ks
+
+    def summary(self):
+        rows = []
+        for name in self.profiles:
+            psi, ks = self._stats(name)
+            status = "—" if np.isnan(psi) else "🔴 Major" if psi >= PSI_MAJOR else "🟠 Moderate" if psi >= PSI_MODERATE else "🟢 Stable"
+            rows.append({
+                "Feature": "Model score" if name == SCORE_COLUMN else name,
+                "PSI": round(psi, 4),
+                "KS": round(ks, 4),
+                "Out of training range": self.out_of_range[name],
+                "Missing": self.missing[name],
+                "Status": status,
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,141 @@
+# utils/evaluation_engine.py
+# Re-scores saved models on a holdout set, one process per model:
+#   python -m utils.evaluation_engine --models all --workers 4
+#   python -m utils.evaluation_engine --data new_batch.csv --no-split --models Top10Model/*.pkl
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+
+from utils.binary_metrics import evaluate_scores
+from utils.dataset import DATA_PATH, TARGET, holdout_split, load_dataset
+from utils.model_loader import discover_models, load_model, model_feature_names
+from utils.score_cache import store_scores
+
+LIVE_METRICS_DIR = "LiveMetrics"
+
+_holdout = {}
+
+
+# ---------------------- Worker ---------------------- #
+def _evaluation_set(data_path, split):
+    df = load_dataset(data_path)
+    if split:
+        _, X, _, y = holdout_split(df)
+        return X, y
+    return df.drop(columns=[TARGET]), df[TARGET]
+
+
+def _init_worker(data_path, split):
+    # Workers map the shared Arrow copy of the dataset instead of receiving a pickled one
+    _holdout["X"], _holdout["y"] = _evaluation_set(data_path, split)
+
+
+def artifact_name(model_path):
+    directory, filename = os.path.split(model_path)
+    stem = os.path.splitext(filename)[0]
+    suffix = "_base" if os.path.basename(directory) == "BaseModels" else ""
+    return f"{stem}{suffix}_live_metrics.pkl"
+
+
+def score_model(model_path, X, y, threshold=0.5):
+    started = time.perf_counter()
+    model = load_model(model_path)
+    features = model_feature_names(model) or list(X.columns)
+    scores = model.predict_proba(X[features])[:, 1]
+
+    metrics = evaluate_scores(y.to_numpy(), scores, threshold)
+    metrics.update({
+        "model_name": os.path.splitext(os.path.basename(model_path))[0],
+        "model_path": model_path,
+        "n_samples": int(len(y)),
+        "evaluated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seconds": time.perf_counter() - started,
+    })
+    return metrics, scores
+
+
+def _evaluate_in_worker(model_path, threshold, out_dir, data_label, cache_scores):
+    metrics, scores = score_model(model_path, _holdout["X"], _holdout["y"], threshold)
+    metrics["data_path"] = data_label
+    if cache_scores:
+        # Reused by the threshold explorer and bootstrap intervals
+        store_scores(model_path, _holdout["y"].to_numpy(), scores, data_label)
+    out_path = os.path.join(out_dir, artifact_name(model_path))
+    joblib.dump(metrics, out_path)
+    return model_path, out_path, metrics
+
+
+# ---------------------- Engine ---------------------- #
+@contextmanager
+def _omp_threads(threads):
+    # OpenMP reads OMP_NUM_THREADS once, when LightGBM/XGBoost first load it, so the value has
+    # to be in the environment the workers are spawned with; setting it inside a worker is too late
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+
+
+def evaluate_models(model_paths, data_path=DATA_PATH, split=True, threshold=0.5, workers=None, out_dir=LIVE_METRICS_DIR):
+    load_dataset(data_path)  # writes the shared Arrow file once, before the workers map it
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or min(len(model_paths), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    results = {}
+    # Spawned, not forked: a forked worker would inherit an OpenMP runtime the parent already
+    # started (scikit-learn loads one) with its full thread count
+    with _omp_threads(threads), ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                                    initializer=_init_worker, initargs=(data_path, split)) as pool:
+        futures = {
+            pool.submit(_evaluate_in_worker, path, threshold, out_dir, data_path, split): path
+            for path in model_paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                _, out_path, metrics = future.result()
+                results[path] = {"out_path": out_path, **metrics}
+            except Exception as e:
+                results[path] = {"error": str(e)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate saved models on a holdout set in parallel")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV with the model features and a 'readmitted' column")
+    parser.add_argument("--no-split", action="store_true", help="Score every row instead of the notebook's 20%% holdout")
+    parser.add_argument("--models", nargs="+", default=["all"], help="Model .pkl paths, or 'all'")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=LIVE_METRICS_DIR)
+    args = parser.parse_args()
+
+    model_paths = discover_models() if args.models == ["all"] else args.models
+    started = time.perf_counter()
+    results = evaluate_models(model_paths, args.data, not args.no_split, args.threshold, args.workers, args.out)
+
+    print(f"{'model':<48}{'AUC':>8}{'Acc':>8}{'F1(1)':>8}{'sec':>8}")
+    for path in model_paths:
+        result = results[path]
+        if "error" in result:
+            print(f"{path:<48} failed: {result['error']}")
+            continue
+        f1 = result["classification_report"]["1"]["f1-score"]
+        print(f"{path:<48}{result['roc_auc']:>8.4f}{result['accuracy']:>8.4f}{f1:>8.4f}{result['seconds']:>8.2f}")
+    print(f"Evaluated {len(model_paths)} models in {time.perf_counter() - started:.1f}s -> {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+# utils/figures.py
+# Tables and Plotly figures of the evaluation, comparison and dashboard pages.
+# Builders take plain inputs (metrics entries, curve arrays, frames) and never
+# call Streamlit, so the pages and the headless report (python -m utils.report)
+# draw the same charts from the same data.
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Dashboard labels for the encoded columns
+DISPLAY_MAPS = {
+    "readmitted": {0: "Not Readmitted", 1: "Readmitted"},
+    "gender": {0: "Female", 1: "Male"},
+    "race": {0: "Caucasian", 1: "AfricanAmerican", 2: "Other", 3: "Asian", 4: "Hispanic"},
+    "admission_type_id": {0: "Emergency", 1: "Urgent", 2: "Elective", 3: "Newborn", 4: "Trauma"},
+    "discharge_disposition_id": {
+        0: "Home", 1: "Transfer", 2: "Expired", 3: "Hospice", 4: "Left AMA", 5: "Still Patient"
+    },
+    "admission_source_id": {
+        0: "Referral",
+        1: "Transfer from Healthcare Facility",
+        2: "Emergency",
+        3: "Birth/Neonatal",
+        4: "Readmission/Home Health"
+    },
+}
+
+# Chart columns that have bootstrap intervals
+CI_METRICS = {"ROC AUC": "roc_auc", "Accuracy": "accuracy", "F1-Score (1)": "f1"}
+
+METRIC_COLORS = {
+    "ROC AUC": "skyblue",
+    "Accuracy": "lightgreen",
+    "Precision (1)": "lightcoral",
+    "Recall (1)": "plum",
+    "F1-Score (1)": "lightsalmon"
+}
+
+ROC_LINE_STYLES = {
+    "LightGBM with Random Search CV": dict(color='skyblue', width=3),
+    "CatBoost with Random Search CV": dict(color='deepskyblue', dash='dot', width=3),
+    "LightGBM with Grid Search CV": dict(color='lightgreen', dash='dash', width=2),
+    "XGBoost with Grid Search CV": dict(color='salmon', width=2),
+    "CatBoost Base Model": dict(color='palegreen', dash='dashdot', width=2)
+}
+
+# (column, bins, title, color) of the dashboard histograms, in page order
+DISTRIBUTIONS = [
+    ("number_of_visits", 30, "Number of Visits", "#6a5acd"),
+    ("time_in_hospital", 15, "Time in Hospital", "#20b2aa"),
+    ("number_diagnoses", 15, "Number of Diagnoses", "#ffa07a"),
+    ("num_lab_procedures", 20, "Lab Procedures", "#8a2be2"),
+    ("num_medications", 20, "Medications", "#2ca02c"),
+    ("numchange", 10, "Medication Changes", "#d62728"),
+]
+
+MEDICATION_COLORS = {
+    "metformin": "#9b59b6",
+    "insulin": "#f39c12",
+    "glipizide": "#16a085"
+}
+
+
+# ---------------------- Model Evaluation ---------------------- #
+def classification_report_frame(report):
+    report_df = pd.DataFrame(report).transpose()
+    report_df = report_df[["precision", "recall", "f1-score", "support"]].round(3)
+
+    # Format accuracy row
+    if "accuracy" in report_df.index:
+        report_df.loc["accuracy", ["precision", "recall", "f1-score"]] = report_df.loc["accuracy", "precision"]
+        report_df.loc["accuracy", "support"] = None
+
+    report_df["support"] = report_df["support"].apply(lambda x: f"{int(x):,}" if pd.notna(x) else "")
+    return report_df
+
+
+def style_classification_report(report_df):
+    # Dark-mode friendly styling
+    return (
+        report_df.style
+        .format("{:.3f}", subset=["precision", "recall", "f1-score"])
+        .apply(lambda s: ['background-color: #2e2f38; color: #f1f1f1']*len(s) if s.name == 'accuracy' else ['']*len(s), axis=1)
+        .background_gradient(cmap="PuBuGn", subset=["precision", "recall", "f1-score"], axis=None)
+        .set_properties(subset=["precision", "recall", "f1-score", "support"], **{
+            'text-align': 'center',
+            'font-size': '14px',
+            'padding': '8px',
+            'color': 'white',
+            'background-color': '#1e1e1e',
+            'border': '1px solid #3a3a3a'
+        })
+        .set_table_styles([
+            {"selector": "th", "props": [
+                ("font-size", "14px"),
+                ("text-align", "center"),
+                ("color", "white"),
+                ("background-color", "#111"),
+                ("padding", "8px")
+            ]},
+            {"selector": "td", "props": [
+                ("border", "1px solid #3a3a3a")
+            ]},
+            {"selector": "caption", "props": [
+                ("caption-side", "top"),
+                ("font-size", "16px"),
+                ("color", "#ccc"),
+                ("text-align", "center"),
+                ("padding", "10px")
+            ]}
+        ])
+        .set_caption("📋 Detailed Classification Report")
+    )
+
+
+def confusion_matrix_figure(cm):
+    fig = go.Figure(data=go.Heatmap(
+        z=cm,
+        x=["Predicted 0", "Predicted 1"],
+        y=["Actual 0", "Actual 1"],
+        colorscale="Blues",
+        showscale=True,
+        text=cm,
+        texttemplate="%{text}"
+    ))
+    fig.update_layout(title="Confusion Matrix Heatmap", xaxis_title="Predicted", yaxis_title="Actual")
+    return fig
+
+
+def roc_figure(fpr, tpr):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=fpr,
+        y=tpr,
+        mode='lines',
+        name='ROC Curve',
+        line=dict(color='blue')
+    ))
+    fig.add_trace(go.Scatter(
+        x=[0, 1],
+        y=[0, 1],
+        mode='lines',
+        name='Random Guess',
+        line=dict(dash='dash', color='gray')
+    ))
+    fig.update_layout(
+        xaxis_title='False Positive Rate',
+        yaxis_title='True Positive Rate',
+        title='ROC Curve',
+        width=700,
+        height=500
+    )
+    return fig
+
+
+# ---------------------- Model Comparison ---------------------- #
+def comparison_frame(entries):
+    # One row per metrics catalog entry, ranked by ROC AUC; entries that can't be read are returned separately
+    data = {
+        "Model": [],
+        "ROC AUC": [],
+        "Accuracy": [],
+        "Precision (1)": [],
+        "Recall (1)": [],
+        "F1-Score (1)": []
+    }
+    failed = []
+    for entry in entries:
+        try:
+            auc = round(entry["roc_auc"], 4)
+            accuracy = entry["accuracy"]
+            precision = round(entry["precision"], 4)
+            recall = round(entry["recall"], 4)
+            f1 = round(entry["f1"], 4)
+
+            data["Model"].append(entry["name"])
+            data["ROC AUC"].append(auc)
+            data["Accuracy"].append(round(accuracy, 4) if accuracy is not None else None)
+            data["Precision (1)"].append(precision)
+            data["Recall (1)"].append(recall)
+            data["F1-Score (1)"].append(f1)
+
+        except Exception as e:
+            failed.append((entry["name"], e))
+
+    df_eval = pd.DataFrame(data).sort_values(by="ROC AUC", ascending=False).reset_index(drop=True)
+    df_eval["Rank"] = df_eval.index + 1
+    return df_eval, failed
+
+
+def _interval_trace(intervals, models, metric, group, color):
+    # Bootstrap CIs come from re-scoring the holdout set, so they're drawn around that re-scored
+    # estimate (a marker over the bar) rather than around the notebook value the bar shows
+    if metric not in CI_METRICS or not intervals:
+        return None
+    cis = [intervals.get(model, {}).get(CI_METRICS[metric]) for model in models]
+    if not any(cis):
+        return None
+    return go.Scatter(
+        x=list(models),
+        y=[ci["estimate"] if ci else None for ci in cis],
+        mode="markers",
+        name=f"{group} (holdout 95% CI)",
+        legendgroup=group,
+        showlegend=False,
+        offsetgroup=group,
+        marker=dict(color="white", size=7, symbol="diamond", line=dict(color=color, width=1)),
+        error_y=dict(type="data", array=[ci["high"] - ci["estimate"] if ci else 0 for ci in cis],
+                     arrayminus=[ci["estimate"] - ci["low"] if ci else 0 for ci in cis],
+                     visible=True, color="white", thickness=1.5),
+        hovertemplate="%{x}<br>Holdout re-score: %{y:.4f}<extra>" + metric + "</extra>",
+    )
+
+
+def metrics_comparison_figure(df, metric_option="All", intervals=None):
+    fig = go.Figure()
+
+    # =============== CASE: ALL METRICS (Grouped, colored by metric) =============== #
+    if metric_option == "All":
+        for metric in METRIC_COLORS:
+            fig.add_trace(go.Bar(
+                x=df["Model"],
+                y=df[metric],
+                name=metric,
+                marker_color=METRIC_COLORS.get(metric),
+                text=df[metric].round(4),
+                textposition='auto',
+                legendgroup=metric,
+                offsetgroup=metric
+            ))
+            markers = _interval_trace(intervals, df["Model"], metric, metric, METRIC_COLORS.get(metric))
+            if markers is not None:
+                fig.add_trace(markers)
+    # =============== CASE: ONE METRIC (Single, colored by model) =============== #
+    else:
+        model_colors = px.colors.qualitative.Plotly
+        for idx, row in df.iterrows():
+            color = model_colors[idx % len(model_colors)]
+            fig.add_trace(go.Bar(
+                x=[row["Model"]],
+                y=[row[metric_option]],
+                name=row["Model"],
+                marker_color=color,
+                text=f"{row[metric_option]:.4f}",
+                textposition='auto',
+                legendgroup=row["Model"],
+                offsetgroup=row["Model"]
+            ))
+            markers = _interval_trace(intervals, [row["Model"]], metric_option, row["Model"], color)
+            if markers is not None:
+                fig.add_trace(markers)
+
+    fig.update_layout(
+        barmode="group",
+        scattermode="group",
+        title="Performance Metrics Comparison",
+        xaxis_title="Model",
+        yaxis_title="Score",
+        legend_title="Metric" if metric_option == "All" else "Model",
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+
+def roc_comparison_figure(curves):
+    # curves: (model name, fpr, tpr, auc) in legend order; fpr None keeps the model's color slot but draws nothing
+    fig = go.Figure()
+    fallback_colors = px.colors.qualitative.Pastel
+    for idx, (model_name, fpr, tpr, auc) in enumerate(curves):
+        if fpr is None or tpr is None:
+            continue
+        style = ROC_LINE_STYLES.get(model_name, dict(color=fallback_colors[idx % len(fallback_colors)], width=2))
+        fig.add_trace(go.Scatter(
+            x=fpr,
+            y=tpr,
+            mode='lines',
+            name=f"{model_name} (AUC = {auc:.4f})" if auc else model_name,
+            line=style
+        ))
+
+    # Diagonal reference line
+    fig.add_trace(go.Scatter(
+        x=[0, 1],
+        y=[0, 1],
+        mode='lines',
+        name='Random Guess',
+        line=dict(color='gray', dash='dash'),
+        showlegend=True
+    ))
+
+    fig.update_layout(
+        title=dict(
+            text="ROC Curve Comparison",
+            x=0.25,
+            font=dict(size=20)
+        ),
+        xaxis_title="False Positive Rate",
+        yaxis_title="True Positive Rate",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(
+            bgcolor='rgba(0,0,0,0.1)',
+            bordercolor='gray',
+            borderwidth=1
+        ),
+        height=500
+    )
+    return fig
+
+
+# ---------------------- Dashboard ---------------------- #
+def readmission_count_figure(df):
+    readmit_counts = df["readmitted"].value_counts().sort_index()
+    return px.bar(
+        x=readmit_counts.index.map({0: "No", 1: "Yes"}),
+        y=readmit_counts.values,
+        labels={"x": "Readmitted", "y": "Count"},
+        title="Readmission Count",
+        color=readmit_counts.index.map({0: "No", 1: "Yes"}),
+        color_discrete_sequence=["#1f77b4", "#ff7f0e"]
+    )
+
+
+def distribution_figure(df, column, nbins, title, color):
+    return px.histogram(df, x=column, nbins=nbins, title=title, color_discrete_sequence=[color])
+
+
+def admission_type_figure(df):
+    adm_df = df["admission_type_id"].value_counts().reset_index()
+    adm_df.columns = ["Admission Type", "Count"]
+    return px.bar(
+        adm_df, x="Admission Type", y="Count", title="Admission Type Distribution",
+        color="Admission Type", color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def discharge_figure(df):
+    dis_df = df["discharge_disposition_id"].value_counts().reset_index()
+    dis_df.columns = ["Discharge Disposition", "Count"]
+    return px.bar(
+        dis_df, x="Discharge Disposition", y="Count", title="Discharge Disposition Distribution",
+        color="Discharge Disposition", color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+
+def medication_usage_figure(df, med):
+    med_counts = df[med].value_counts().sort_index()
+    usage_df = pd.DataFrame({
+        "Usage": med_counts.index.map({0: "No", 1: "Yes"}),
+        "Count": med_counts.values
+    })
+    return px.bar(
+        usage_df, x="Usage", y="Count", title=f"{med.capitalize()} Usage",
+        color="Usage",
+        color_discrete_sequence=[MEDICATION_COLORS[med], "#95a5a6"]
+    )
+
+
+def calibration_frame(decile, observed, predicted, bands):
+    # Observed vs. predicted rate per risk decile: one pass of bincount over the rows
+    n = len(bands)
+    counts = np.bincount(decile, minlength=n + 1)[1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed_rate = np.bincount(decile, weights=observed, minlength=n + 1)[1:] / counts
+        predicted_rate = np.bincount(decile, weights=predicted, minlength=n + 1)[1:] / counts
+    return pd.DataFrame({
+        "Risk Decile": [f"D{d} ({low:.0%}–{high:.0%})" for d, (low, high) in enumerate(bands, start=1)],
+        "Patients": counts,
+        "Observed": observed_rate,
+        "Predicted": predicted_rate,
+    })
+
+
+def calibration_figure(calibration):
+    chart = calibration.melt(id_vars=["Risk Decile", "Patients"], value_vars=["Observed", "Predicted"],
+                             var_name="Rate", value_name="Readmission Rate")
+    return px.bar(
+        chart, x="Risk Decile", y="Readmission Rate", color="Rate", barmode="group",
+        hover_data=["Patients"], title="Calibration by Predicted Risk Decile",
+        color_discrete_sequence=["#ff7f0e", "#1f77b4"]
+    ).update_yaxes(tickformat=".0%")
@@ -1,12 +1,14 @@
 # utils/gemini_intent.py
 import google.generativeai as genai
 import os
+from utils.llm_client import client_from_env
 
 api_key = os.getenv("GOOGLE_API_KEY")  
 genai.configure(api_key=api_key)
 
-# Gemini model (can be imported anywhere)
-model = genai.GenerativeModel("gemini-1.5-flash")
+# Gemini model (can be imported anywhere). Calls go through a rate-limited,
+# coalescing client; set MOCK_LLM_URL to point it at utils/mock_llm_server.
+model = client_from_env(genai.GenerativeModel("gemini-1.5-flash"))
 
 # ---------------- Intent Extraction ---------------- #
 def get_user_intent(query):
@@ -0,0 +1,252 @@
+# utils/global_shap.py
+# Dataset-wide SHAP summary of the Top 10 model, computed once per model and
+# dataset version:
+#   - mean |SHAP| per feature (global importance)
+#   - dependence: mean and spread of each feature's SHAP value per feature value (or quantile bin)
+#   - mean |SHAP interaction| per feature pair, on a fixed random sample of rows
+#
+# Contributions come from the booster's own TreeSHAP (LightGBM pred_contrib,
+# XGBoost pred_contribs), computed in row chunks across processes. Each chunk
+# only returns sums; finished chunks are kept on disk so an interrupted run
+# resumes where it stopped.
+#   python -m utils.global_shap --workers 8
+#   python -m utils.global_shap --model Top10Model/gradientboosting_top10.pkl --interaction-rows 0
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.dataset import DATA_PATH, TOP10_FEATURES, load_dataset
+from utils.model_loader import DEFAULT_MODEL_PATH, get_model, model_feature_names, model_version
+from utils.score_cache import cache_key
+
+SUMMARY_DIR = ".cache/global_shap"
+CHUNK_ROWS = 10_000
+INTERACTION_ROWS = 2_000
+MAX_DISCRETE_VALUES = 50
+QUANTILE_BINS = 20
+
+_worker = {}
+
+
+# ---------------------- Contributions ---------------------- #
+def _booster(model):
+    # Native artifacts keep the framework object in .booster, sklearn wrappers in .booster_ / get_booster()
+    booster = getattr(model, "booster", None) or getattr(model, "booster_", None)
+    if booster is None and hasattr(model, "get_booster"):
+        booster = model.get_booster()
+    if booster is None or type(booster).__module__.split(".")[0] not in ("lightgbm", "xgboost"):
+        raise ValueError(f"{type(model).__name__} has no LightGBM/XGBoost booster with native SHAP output")
+    return booster
+
+
+def _is_lightgbm(booster):
+    return type(booster).__module__.startswith("lightgbm")
+
+
+def _contributions(booster, X, threads):
+    # (rows, features + 1) in log-odds; the last column is the expected value
+    if _is_lightgbm(booster):
+        return booster.predict(X, pred_contrib=True, num_threads=threads)
+    import xgboost as xgb
+    return booster.predict(xgb.DMatrix(X, nthread=threads), pred_contribs=True)
+
+
+def _interactions(booster, X, threads):
+    # (rows, features, features); off-diagonal entries are split evenly between the pair
+    if _is_lightgbm(booster):
+        import shap
+        return np.asarray(shap.TreeExplainer(booster).shap_interaction_values(X))
+    import xgboost as xgb
+    return booster.predict(xgb.DMatrix(X, nthread=threads), pred_interactions=True)[:, :-1, :-1]
+
+
+def _bin_edges(values):
+    # Discrete features: one bin per value. Otherwise quantile bins labelled by their upper edge.
+    unique = np.unique(values)
+    if len(unique) <= MAX_DISCRETE_VALUES:
+        return unique
+    return np.unique(np.quantile(values, np.linspace(0, 1, QUANTILE_BINS + 1)[1:]))
+
+
+# ---------------------- Worker ---------------------- #
+def _init_worker(model_path, data_path, features, threads):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _worker["booster"] = _booster(get_model(model_path))
+    # Workers map the shared Arrow copy of the dataset instead of receiving a pickled one
+    _worker["X"] = load_dataset(data_path)[features]
+    _worker["threads"] = threads
+
+
+def _chunk_summary(start, stop, sample_rows, edges, out_path):
+    X = _worker["X"].iloc[start:stop]
+    contributions = _contributions(_worker["booster"], X, _worker["threads"])
+    shap_values = contributions[:, :-1]
+    n_bins = max(len(e) for e in edges)
+
+    counts = np.zeros((len(edges), n_bins))
+    sums = np.zeros((len(edges), n_bins))
+    squares = np.zeros((len(edges), n_bins))
+    for i, feature_edges in enumerate(edges):
+        bins = np.minimum(np.searchsorted(feature_edges, X.iloc[:, i].to_numpy(), side="left"), len(feature_edges) - 1)
+        counts[i] = np.bincount(bins, minlength=n_bins)
+        sums[i] = np.bincount(bins, weights=shap_values[:, i], minlength=n_bins)
+        squares[i] = np.bincount(bins, weights=shap_values[:, i] ** 2, minlength=n_bins)
+
+    sample = sample_rows[(sample_rows >= start) & (sample_rows < stop)] - start
+    interaction_sum = np.zeros((len(edges), len(edges)))
+    if len(sample):
+        interaction_sum = np.abs(_interactions(_worker["booster"], X.iloc[sample], _worker["threads"])).sum(axis=0)
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp_path, rows=stop - start, abs_sum=np.abs(shap_values).sum(axis=0), sum=shap_values.sum(axis=0),
+        base_sum=contributions[:, -1].sum(), counts=counts, sums=sums, squares=squares,
+        interaction_sum=interaction_sum, interaction_rows=len(sample),
+    )
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+# ---------------------- Summary ---------------------- #
+def _summary_path(model_path, data_path):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(SUMMARY_DIR, f"{stem}-{cache_key(model_path, data_path)}.joblib")
+
+
+def _combine(chunk_paths, features, edges):
+    totals = {}
+    for path in chunk_paths:
+        with np.load(path) as chunk:
+            for name in chunk.files:
+                totals[name] = totals.get(name, 0) + chunk[name]
+
+    rows = int(totals["rows"])
+    mean_abs = totals["abs_sum"] / rows
+    dependence = {}
+    for i, feature in enumerate(features):
+        n = len(edges[i])
+        counts = totals["counts"][i, :n]
+        keep = counts > 0
+        mean = totals["sums"][i, :n][keep] / counts[keep]
+        variance = np.maximum(totals["squares"][i, :n][keep] / counts[keep] - mean ** 2, 0)
+        dependence[feature] = pd.DataFrame({
+            "value": edges[i][keep], "count": counts[keep].astype(int),
+            "mean_shap": mean, "std_shap": np.sqrt(variance),
+        })
+
+    interaction_rows = int(totals["interaction_rows"])
+    interactions = None
+    if interaction_rows:
+        interactions = pd.DataFrame(totals["interaction_sum"] / interaction_rows, index=features, columns=features)
+    return {
+        "features": features,
+        "n_rows": rows,
+        "base_value": float(totals["base_sum"] / rows),
+        "mean_abs": pd.Series(mean_abs, index=features).sort_values(ascending=False),
+        "mean": pd.Series(totals["sum"] / rows, index=features),
+        # Share of total mean |SHAP|, the scale the assistant reports importances on
+        "importance": {f: float(v) for f, v in zip(features, mean_abs / mean_abs.sum())},
+        "dependence": dependence,
+        "interactions": interactions,
+        "interaction_rows": interaction_rows,
+    }
+
+
+def compute_global_shap(model_path=DEFAULT_MODEL_PATH, data_path=DATA_PATH, workers=None,
+                        chunk_rows=CHUNK_ROWS, interaction_rows=INTERACTION_ROWS, progress=None):
+    started = time.perf_counter()
+    model = get_model(model_path)
+    _booster(model)
+    df = load_dataset(data_path)  # writes the shared Arrow file once, before the workers map it
+    features = model_feature_names(model) or TOP10_FEATURES
+    edges = [_bin_edges(df[feature].to_numpy()) for feature in features]
+    n_rows = len(df)
+    sample_rows = np.sort(np.random.default_rng(0).choice(n_rows, min(interaction_rows, n_rows), replace=False))
+
+    # One file per chunk; chunks already on disk from an interrupted run are skipped
+    # Chunk boundaries and the interaction sample depend on these settings, so a run with
+    # other values must not reuse the chunks
+    summary_path = _summary_path(model_path, data_path)
+    chunk_dir = f"{summary_path[: -len('.joblib')]}-c{chunk_rows}-i{interaction_rows}"
+    os.makedirs(chunk_dir, exist_ok=True)
+    chunks = [(start, min(start + chunk_rows, n_rows), os.path.join(chunk_dir, f"chunk-{start:09d}.npz"))
+              for start in range(0, n_rows, chunk_rows)]
+    pending = [c for c in chunks if not os.path.exists(c[2])]
+
+    workers = workers or min(len(pending), os.cpu_count() or 1) or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    done = len(chunks) - len(pending)
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, data_path, features, threads)) as pool:
+            futures = [pool.submit(_chunk_summary, start, stop, sample_rows, edges, path)
+                       for start, stop, path in pending]
+            for future in as_completed(futures):
+                future.result()
+                done += 1
+                if progress:
+                    progress(done, len(chunks))
+
+    summary = _combine([c[2] for c in chunks], features, edges)
+    summary.update({
+        "model_path": model_path,
+        "model_version": model_version(model_path),
+        "data_path": data_path,
+        "computed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seconds": time.perf_counter() - started,
+        "workers": workers,
+    })
+    tmp_path = f"{summary_path}.{os.getpid()}.tmp"
+    joblib.dump(summary, tmp_path)
+    os.replace(tmp_path, summary_path)
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    return summary
+
+
+@lru_cache(maxsize=4)
+def _load(path, mtime):
+    return joblib.load(path)
+
+
+def load_global_shap(model_path=DEFAULT_MODEL_PATH, data_path=DATA_PATH):
+    # The persisted summary for the current model/dataset version, or None until the job has run.
+    # Misses aren't cached: a summary written later by the CLI in another process is picked up.
+    try:
+        path = _summary_path(model_path, data_path)
+        return _load(path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+# ---------------------- CLI ---------------------- #
+def main():
+    parser = argparse.ArgumentParser(description="Compute the dataset-wide SHAP summary of a tree model.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--interaction-rows", type=int, default=INTERACTION_ROWS,
+                        help="Rows sampled for pairwise interaction values (0 to skip)")
+    args = parser.parse_args()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} chunks", end="", flush=True)
+
+    summary = compute_global_shap(args.model, args.data, args.workers, args.chunk_rows,
+                                  args.interaction_rows, progress)
+    print(f"\n{summary['model_version']}: {summary['n_rows']:,} rows in {summary['seconds']:.1f}s "
+          f"({summary['workers']} workers)")
+    for feature, value in summary["mean_abs"].items():
+        print(f"{feature:<24}{value:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# utils/llm_client.py
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+
+from utils.tracing import span
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = {"ResourceExhausted", "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "TooManyRequests"}
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+# ---------------------- Token Bucket ---------------------- #
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# ---------------------- Backends ---------------------- #
+class LLMResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class HTTPBackend:
+    # Talks to utils/mock_llm_server (or anything speaking the same JSON shape)
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip("/") + "/generate"
+        self.timeout = timeout
+
+    def generate_content(self, prompt):
+        body = json.dumps({"prompt": prompt}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return LLMResponse(json.loads(response.read())["text"])
+
+
+def _is_retryable(exc):
+    status = getattr(exc, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError, urllib.error.URLError)) and not isinstance(exc, urllib.error.HTTPError):
+        return True
+    return type(exc).__name__ in RETRYABLE_NAMES
+
+
+# ---------------------- Client ---------------------- #
+class LLMClient:
+    # Drop-in for genai.GenerativeModel: same generate_content(prompt) -> .text
+    def __init__(self, backend, rate=1.0, burst=5, max_retries=3, base_delay=0.5, max_delay=8.0, acquire_timeout=30.0):
+        self.backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "coalesced": 0, "backend_calls": 0, "retries": 0, "failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.stats["requests"] += 1
+            call = self._inflight.get(prompt)
+            leader = call is None
+            if leader:
+                call = Future()
+                self._inflight[prompt] = call
+            else:
+                self.stats["coalesced"] += 1
+
+        # Identical prompts already on the wire share the leader's response
+        if not leader:
+            return call.result()
+
+        try:
+            response = self._call_with_retry(prompt)
+            call.set_result(response)
+            return response
+        except BaseException as e:
+            self._count("failures")
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(prompt, None)
+
+    def _call_with_retry(self, prompt):
+        attempt = 0
+        while True:
+            if not self.bucket.acquire(timeout=self.acquire_timeout):
+                raise RateLimitExceeded(f"LLM rate limit: no capacity within {self.acquire_timeout:.0f}s")
+            self._count("backend_calls")
+            try:
+                with span("gemini.call"):
+                    return self.backend.generate_content(prompt)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+            attempt += 1
+            self._count("retries")
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+
+def client_from_env(default_backend):
+    mock_url = os.getenv("MOCK_LLM_URL")
+    backend = HTTPBackend(mock_url) if mock_url else default_backend
+    return LLMClient(
+        backend,
+        rate=float(os.getenv("LLM_RATE_PER_SEC", "1.0")),
+        burst=int(os.getenv("LLM_BURST", "5")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    )
@@ -0,0 +1,128 @@
+# utils/llm_loadtest.py
+# Load test for the LLM client layer against the local mock server:
+#   python -m utils.llm_loadtest --users 40 --duration 20 --quota-rps 10
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+
+from utils.llm_client import HTTPBackend, LLMClient
+from utils.mock_llm_server import start_in_thread
+
+# A handful of dashboard questions many users ask at once, plus a long tail
+POPULAR_PROMPTS = [
+    "What's the readmission rate?",
+    "Which model performs best?",
+    "Which feature is most correlated with readmission?",
+    "Rank the models by AUC.",
+]
+
+
+def _percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(generate, users, duration, popular_share):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def user_loop(user_id):
+        rng = random.Random(user_id)
+        while time.monotonic() < stop_at:
+            if rng.random() < popular_share:
+                prompt = rng.choice(POPULAR_PROMPTS)
+            else:
+                prompt = f"Ad-hoc question {user_id}-{rng.randrange(10**6)}"
+            start = time.perf_counter()
+            try:
+                generate(prompt)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+            time.sleep(rng.uniform(0.2, 1.0))  # think time between questions
+
+    threads = [threading.Thread(target=user_loop, args=(i,)) for i in range(users)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return {
+        "ok": len(latencies),
+        "errors": len(errors),
+        "error_rate": len(errors) / max(1, len(latencies) + len(errors)),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=float("nan")) * 1000,
+    }
+
+
+def _server_stats(url):
+    with urllib.request.urlopen(url + "/stats") as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the LLM client against the mock server")
+    parser.add_argument("--url", help="Existing mock server URL (default: start one in-process)")
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--popular-share", type=float, default=0.6)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--jitter-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--quota-rps", type=float, default=10.0)
+    parser.add_argument("--client-rps", type=float, default=None, help="Client token rate (default: 90%% of quota)")
+    args = parser.parse_args()
+
+    client_rps = args.client_rps or args.quota_rps * 0.9
+    results = {}
+    for mode in ("direct", "client"):
+        if args.url:
+            url = args.url
+        else:
+            server, url = start_in_thread(
+                latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                error_rate=args.error_rate, quota_rps=args.quota_rps,
+            )
+        backend = HTTPBackend(url)
+        before = _server_stats(url)
+        if mode == "direct":
+            report = run_load(backend.generate_content, args.users, args.duration, args.popular_share)
+        else:
+            client = LLMClient(backend, rate=client_rps, burst=max(1, int(client_rps)), acquire_timeout=60)
+            report = run_load(client.generate_content, args.users, args.duration, args.popular_share)
+            report.update({k: client.stats[k] for k in ("coalesced", "retries")})
+        after = _server_stats(url)
+        report["backend_requests"] = after["requests"] - before["requests"]
+        report["throttled"] = after["throttled"] - before["throttled"]
+        results[mode] = report
+        if not args.url:
+            server.shutdown()
+
+    columns = ["ok", "errors", "error_rate", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+               "backend_requests", "throttled", "coalesced", "retries"]
+    print(f"{'metric':<18}" + "".join(f"{mode:>12}" for mode in results))
+    for column in columns:
+        row = []
+        for mode in results:
+            value = results[mode].get(column, "-")
+            row.append(f"{value:>12.3f}" if isinstance(value, float) else f"{value:>12}")
+        print(f"{column:<18}" + "".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# utils/metrics_catalog.py
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import joblib
+import numpy as np
+
+from utils.curve_downsample import PLOT_POINTS, downsample_curve
+
+# LiveMetrics/ is written by utils/evaluation_engine in the same format
+METRICS_DIRS = ["EvaluationMetrics", "BaseModelMetrics", "LiveMetrics"]
+INDEX_PATH = ".cache/metrics_index.json"
+RESCAN_INTERVAL = 5.0
+# The model shown on the evaluation page and in the report's evaluation section
+EVALUATION_METRICS_PATH = "EvaluationMetrics/Lightgbm_Randomsearch_Metrics.pkl"
+# The five models the comparison page has always shown by default
+FEATURED_METRICS_PATHS = [
+    "EvaluationMetrics/Lightgbm_Randomsearch_Metrics.pkl",
+    "EvaluationMetrics/CatBoost_Randomsearch_Metrics.pkl",
+    "EvaluationMetrics/Lightgbm_Gridsearch_Metrics.pkl",
+    "EvaluationMetrics/XGBoost_Gridsearch_Metrics.pkl",
+    "BaseModelMetrics/catboost_base_metrics.pkl",
+]
+
+# Notebook artifacts don't record their model file; it follows from the metrics file name
+MODEL_DIR_FOR = {
+    "EvaluationMetrics": ("HypertunedModels", "_metrics"),
+    "BaseModelMetrics": ("BaseModels", "_base_metrics"),
+}
+
+FRAMEWORK_NAMES = {
+    "lightgbm": "LightGBM",
+    "catboost": "CatBoost",
+    "xgboost": "XGBoost",
+    "gradientboosting": "Gradient Boosting",
+    "simpler_ann": "Simpler ANN",
+}
+SEARCH_NAMES = {"randomsearch": "Random Search CV", "gridsearch": "Grid Search CV", "halvingsearch": "Successive Halving"}
+
+_lock = threading.Lock()
+_catalog = {}
+_last_scan = 0.0
+
+
+# ---------------------- Naming ---------------------- #
+def display_name(stem):
+    # "Lightgbm_Randomsearch_Metrics"            -> "LightGBM with Random Search CV"
+    # "catboost_base_metrics"                    -> "CatBoost Base Model"
+    # "lightgbm_top10_randomsearch_live_metrics" -> "LightGBM Top 10 with Random Search CV (Live)"
+    tokens = stem.lower().split("_")
+    if tokens[-1] == "metrics":
+        tokens.pop()
+
+    flags = {flag: flag in tokens for flag in ("base", "live", "top10")}
+    search = next((t for t in tokens if t in SEARCH_NAMES), None)
+    framework = "_".join(t for t in tokens if t not in flags and t != search)
+
+    label = FRAMEWORK_NAMES.get(framework, framework.replace("_", " ").title())
+    if flags["top10"]:
+        label += " Top 10"
+    if search:
+        label += f" with {SEARCH_NAMES[search]}"
+    if flags["base"]:
+        label += " Base Model"
+    if flags["live"]:
+        label += " (Live)"
+    return label
+
+
+# ---------------------- Extraction ---------------------- #
+def _to_builtin(value):
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _roc_arrays(metrics):
+    curve = metrics.get("roc_curve") or {}
+    fpr = curve.get("fpr") if "fpr" in curve else metrics.get("fpr")
+    tpr = curve.get("tpr") if "tpr" in curve else metrics.get("tpr")
+    return fpr, tpr
+
+
+def _summarize(path, stat):
+    metrics = joblib.load(path)
+    report = metrics.get("classification_report") or metrics.get("report") or {}
+    accuracy = metrics.get("accuracy")
+    if accuracy is None:
+        accuracy = report.get("accuracy")
+    positive = report.get("1", {})
+    fpr, tpr = _roc_arrays(metrics)
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    # Only small fields are kept; fpr/tpr stay on disk until a chart asks
+    return _to_builtin({
+        "path": path,
+        "name": display_name(stem),
+        "model_name": metrics.get("model_name", stem),
+        "model_path": metrics.get("model_path"),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "roc_auc": metrics.get("roc_auc"),
+        "accuracy": accuracy,
+        "precision": positive.get("precision"),
+        "recall": positive.get("recall"),
+        "f1": positive.get("f1-score"),
+        "classification_report": report,
+        "confusion_matrix": metrics.get("confusion_matrix"),
+        "best_params": metrics.get("best_params"),
+        "has_roc": fpr is not None and tpr is not None,
+    })
+
+
+# ---------------------- Catalog ---------------------- #
+def _read_index():
+    try:
+        with open(INDEX_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(index):
+    try:
+        os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+        tmp_path = f"{INDEX_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, INDEX_PATH)
+    except OSError:
+        pass
+
+
+def _scan(known):
+    index, changed = {}, False
+    for directory in METRICS_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if not entry.name.endswith(".pkl"):
+                continue
+            path = f"{directory}/{entry.name}"
+            stat = entry.stat()
+            cached = known.get(path)
+            if cached and cached["mtime"] == stat.st_mtime and cached["size"] == stat.st_size:
+                index[path] = cached
+                continue
+            try:
+                index[path] = _summarize(path, stat)
+            except Exception as e:
+                index[path] = {"path": path, "name": display_name(entry.name[:-4]), "mtime": stat.st_mtime,
+                               "size": stat.st_size, "error": str(e)}
+            changed = True
+    return index, changed or index.keys() != known.keys()
+
+
+def load_catalog(force=False):
+    global _catalog, _last_scan
+    with _lock:
+        now = time.monotonic()
+        if force or not _catalog or now - _last_scan > RESCAN_INTERVAL:
+            known = _catalog or _read_index()
+            _catalog, changed = _scan(known)
+            _last_scan = now
+            if changed:
+                _write_index(_catalog)
+        return dict(_catalog)
+
+
+def list_entries(include_errors=False):
+    entries = load_catalog().values()
+    return [e for e in entries if include_errors or "error" not in e]
+
+
+def get_entry(path):
+    return load_catalog().get(path)
+
+
+# ---------------------- Model Files ---------------------- #
+def model_path_for(entry):
+    if entry.get("model_path"):
+        return entry["model_path"]
+    directory, filename = os.path.split(entry["path"])
+    if directory not in MODEL_DIR_FOR:
+        return None
+    model_dir, suffix = MODEL_DIR_FOR[directory]
+    stem = filename[:-len(".pkl")].lower()
+    stem = stem[:-len(suffix)] if stem.endswith(suffix) else stem
+    if not os.path.isdir(model_dir):
+        return None
+    for name in os.listdir(model_dir):
+        if name.lower() == f"{stem}.pkl":
+            return f"{model_dir}/{name}"
+    return None
+
+
+# ---------------------- Lazy ROC Arrays ---------------------- #
+@lru_cache(maxsize=32)
+def _load_roc(path, mtime):
+    fpr, tpr = _roc_arrays(joblib.load(path))
+    if fpr is None or tpr is None:
+        return None, None
+    return np.asarray(fpr), np.asarray(tpr)
+
+
+def load_roc_curve(path):
+    entry = get_entry(path)
+    if entry is None or not entry.get("has_roc"):
+        return None, None
+    return _load_roc(path, entry["mtime"])
+
+
+@lru_cache(maxsize=64)
+def _load_plot_roc(path, mtime, max_points):
+    fpr, tpr = _load_roc(path, mtime)
+    if fpr is None:
+        return None, None, None
+    return downsample_curve(fpr, tpr, max_points)
+
+
+def load_plot_roc_curve(path, max_points=PLOT_POINTS):
+    # Shape-preserving reduction for charts; full arrays stay available above
+    entry = get_entry(path)
+    if entry is None or not entry.get("has_roc"):
+        return None, None, None
+    return _load_plot_roc(path, entry["mtime"], max_points)
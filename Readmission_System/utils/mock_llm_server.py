@@ -0,0 +1,122 @@
+# utils/mock_llm_server.py
+# Local stand-in for the Gemini API used in load tests:
+#   python -m utils.mock_llm_server --port 8765 --latency-ms 400 --error-rate 0.02 --quota-rps 10
+# then run the app with MOCK_LLM_URL=http://127.0.0.1:8765
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.llm_client import TokenBucket
+
+INTENTS = [
+    "get_top_correlation", "get_negative_correlation", "get_best_model",
+    "get_model_ranking", "get_top_features", "get_readmission_rate",
+]
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=300.0, jitter_ms=100.0, error_rate=0.0, quota_rps=None):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # Server-side quota mirrors Gemini's per-minute limits: excess gets 429
+        self.quota = TokenBucket(quota_rps, max(1, quota_rps)) if quota_rps else None
+        self.counters = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.server.snapshot())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        server = self.server
+        if self.path != "/generate":
+            self._reply(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        prompt = json.loads(self.rfile.read(length) or b"{}").get("prompt", "")
+        server.count("requests")
+
+        if server.quota is not None and not server.quota.acquire(timeout=0):
+            server.count("throttled")
+            self._reply(429, {"error": "quota exceeded"})
+            return
+
+        delay = max(0.0, random.gauss(server.latency_ms, server.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            server.count("errors")
+            self._reply(503, {"error": "backend unavailable"})
+            return
+
+        # Deterministic text per prompt; intent prompts get a valid keyword back
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        if "return one of the following keywords" in prompt:
+            text = INTENTS[int(digest, 16) % len(INTENTS)]
+        else:
+            text = f"Mock explanation {digest[:8]}."
+        server.count("ok")
+        self._reply(200, {"text": text})
+
+
+def start_in_thread(port=0, **options):
+    server = MockLLMServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LLM server for load testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-rps", type=float, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        ("127.0.0.1", args.port),
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, quota_rps=args.quota_rps,
+    )
+    print(f"Mock LLM server listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+# utils/model_compaction.py
+# Builds a smaller copy of a tuned tree model and keeps it only if holdout AUC
+# stays within tolerance:
+#   python -m utils.model_compaction Top10Model/lightgbm_top10_randomsearch.pkl
+#   python -m utils.model_compaction HypertunedModels/CatBoost_Randomsearch.pkl --tolerance 0.002
+#
+# LightGBM models get all three steps, applied to the booster's text model:
+#   1. keep the shortest prefix of trees whose validation AUC is within tolerance
+#   2. collapse sibling leaves whose values differ by less than a searched epsilon
+#   3. rewrite thresholds on integer-valued features as k + 0.5 (same routing for
+#      every integer input, much shorter text)
+# CatBoost, XGBoost and sklearn gradient boosting models are truncated only.
+#
+# The notebook's 20% holdout is split in half: one half picks the tree count and
+# epsilon, the other half is the acceptance check.
+import argparse
+import copy
+import io
+import math
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from utils.binary_metrics import auc_from_counts, threshold_counts
+from utils.dataset import RANDOM_STATE, holdout_split, load_dataset
+from utils.model_loader import load_model, model_feature_names
+
+AUC_TOLERANCE = 0.001
+MERGE_EPSILONS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02]
+XGB_TRUNCATION_STEPS = 50
+
+INTERNAL_KEYS = ["split_feature", "split_gain", "threshold", "decision_type", "left_child", "right_child",
+                 "internal_value", "internal_weight", "internal_count"]
+LEAF_KEYS = ["leaf_value", "leaf_weight", "leaf_count"]
+
+
+def _auc(y_true, scores):
+    return auc_from_counts(threshold_counts(y_true, scores))
+
+
+def _framework(model):
+    return type(model).__module__.split(".")[0]
+
+
+# ---------------------- LightGBM Text Model ---------------------- #
+def parse_lgbm_model(text):
+    head, rest = text.split("\nTree=", 1)
+    trees_text, tail = ("Tree=" + rest).split("end of trees", 1)
+    # tree_sizes holds byte offsets of every tree; LightGBM parses sequentially without it
+    header = [line for line in head.splitlines() if not line.startswith("tree_sizes=")]
+    trees = []
+    for block in trees_text.strip().split("\n\n"):
+        tree = {}
+        for line in block.strip().splitlines():
+            key, _, value = line.partition("=")
+            tree[key] = value.split(" ") if key in INTERNAL_KEYS + LEAF_KEYS else value
+        trees.append(tree)
+    return header, trees, "end of trees" + tail
+
+
+def dump_lgbm_model(header, trees, tail):
+    blocks = []
+    for tree in trees:
+        lines = [f"{key}={' '.join(value) if isinstance(value, list) else value}" for key, value in tree.items()]
+        blocks.append("\n".join(lines))
+    return "\n".join(header) + "\n\n" + "\n\n\n".join(blocks) + "\n\n\n" + tail
+
+
+def _is_plain_tree(tree):
+    # Categorical and linear trees carry extra arrays; they are left untouched
+    return tree.get("num_cat", "0") == "0" and tree.get("is_linear", "0") == "0" and int(tree["num_leaves"]) > 1
+
+
+def _to_nodes(tree):
+    left = [int(v) for v in tree["left_child"]]
+    right = [int(v) for v in tree["right_child"]]
+
+    def build(child):
+        if child < 0:
+            leaf = ~child
+            return {"leaf": [tree[key][leaf] for key in LEAF_KEYS]}
+        return {"split": [tree[key][child] for key in INTERNAL_KEYS if key in tree],
+                "left": build(left[child]), "right": build(right[child])}
+    return build(0)
+
+
+def _merge(node, epsilon, is_root=True):
+    if "leaf" in node:
+        return node, 0
+    node["left"], merged_left = _merge(node["left"], epsilon, False)
+    node["right"], merged_right = _merge(node["right"], epsilon, False)
+    merged = merged_left + merged_right
+    left, right = node["left"].get("leaf"), node["right"].get("leaf")
+    if is_root or left is None or right is None or abs(float(left[0]) - float(right[0])) > epsilon:
+        return node, merged
+
+    # Hessian-weighted value, so the collapsed leaf matches its parent's output
+    w_left, w_right = float(left[1]), float(right[1])
+    total = w_left + w_right
+    value = (float(left[0]) * w_left + float(right[0]) * w_right) / total if total else float(left[0])
+    return {"leaf": [repr(value), repr(total), str(int(left[2]) + int(right[2]))]}, merged + 1
+
+
+def _from_nodes(tree, root):
+    internal_keys = [key for key in INTERNAL_KEYS if key in tree]
+    arrays = {key: [] for key in internal_keys + LEAF_KEYS}
+
+    def emit(node):
+        if "leaf" in node:
+            for key, value in zip(LEAF_KEYS, node["leaf"]):
+                arrays[key].append(value)
+            return -len(arrays["leaf_value"])
+        index = len(arrays["split_feature"])
+        for key, value in zip(internal_keys, node["split"]):
+            arrays[key].append(value)
+        arrays["left_child"][index] = str(emit(node["left"]))
+        arrays["right_child"][index] = str(emit(node["right"]))
+        return index
+
+    emit(root)
+    rebuilt = dict(tree)
+    rebuilt.update(arrays)
+    rebuilt["num_leaves"] = str(len(arrays["leaf_value"]))
+    return rebuilt
+
+
+def merge_similar_leaves(trees, epsilon):
+    merged_trees, merged = [], 0
+    for tree in trees:
+        if not _is_plain_tree(tree):
+            merged_trees.append(tree)
+            continue
+        root, count = _merge(_to_nodes(tree), epsilon)
+        merged_trees.append(_from_nodes(tree, root) if count else tree)
+        merged += count
+    return merged_trees, merged
+
+
+def quantize_thresholds(trees, integer_features):
+    quantized, changed = [], 0
+    for tree in trees:
+        if not _is_plain_tree(tree):
+            quantized.append(tree)
+            continue
+        tree = dict(tree)
+        thresholds = list(tree["threshold"])
+        for i, feature in enumerate(tree["split_feature"]):
+            if int(feature) in integer_features:
+                # x <= t and x <= floor(t) + 0.5 agree for every integer x
+                value = math.floor(float(thresholds[i])) + 0.5
+                text = repr(value)
+                if text != thresholds[i]:
+                    thresholds[i] = text
+                    changed += 1
+        tree["threshold"] = thresholds
+        quantized.append(tree)
+    return quantized, changed
+
+
+def _lgbm_with_text(model, text):
+    import lightgbm as lgb
+    compact = copy.copy(model)
+    compact._Booster = lgb.Booster(model_str=text)
+    compact._best_iteration = 0
+    compact.set_params(n_estimators=compact._Booster.num_trees())
+    return compact
+
+
+def _lgbm_staged_aucs(model, trees, X, y_true):
+    # One pred_leaf pass + cumulative leaf values gives the raw score after every tree
+    leaves = model.booster_.predict(X, pred_leaf=True)
+    contributions = np.column_stack([
+        np.asarray(tree["leaf_value"], dtype=float)[leaves[:, t]] for t, tree in enumerate(trees)
+    ])
+    staged = np.cumsum(contributions, axis=1)
+    return [_auc(y_true, staged[:, k]) for k in range(staged.shape[1])]
+
+
+# ---------------------- Truncation (all frameworks) ---------------------- #
+def _staged_aucs(model, X, y_true):
+    # AUC after 1..n_trees trees; XGBoost is sampled every few trees
+    framework = _framework(model)
+    if framework == "catboost":
+        staged = model.staged_predict(X, prediction_type="RawFormulaVal")
+        return {k + 1: _auc(y_true, raw) for k, raw in enumerate(staged)}
+    if framework == "sklearn":
+        return {k + 1: _auc(y_true, raw.ravel()) for k, raw in enumerate(model.staged_decision_function(X))}
+    if framework == "xgboost":
+        n_trees = model.get_booster().num_boosted_rounds()
+        counts = sorted(set(np.linspace(1, n_trees, XGB_TRUNCATION_STEPS).astype(int)))
+        return {k: _auc(y_true, model.predict(X, output_margin=True, iteration_range=(0, k))) for k in counts}
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+def _truncate(model, n_trees):
+    framework = _framework(model)
+    compact = copy.deepcopy(model)
+    if framework == "catboost":
+        compact.shrink(ntree_end=n_trees)
+    elif framework == "sklearn":
+        compact.estimators_ = compact.estimators_[:n_trees]
+        compact.train_score_ = compact.train_score_[:n_trees]
+        compact.n_estimators = n_trees
+    elif framework == "xgboost":
+        compact._Booster = compact.get_booster()[:n_trees]
+        compact.set_params(n_estimators=n_trees)
+    return compact
+
+
+def _shortest_prefix(staged, tolerance):
+    target = max(staged.values()) - tolerance
+    return min(k for k, auc in staged.items() if auc >= target)
+
+
+# ---------------------- Measurement ---------------------- #
+def _pickled_size(model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def _latency(model, X, calls=200):
+    rows = [X.iloc[[i % len(X)]] for i in range(calls)]
+    for row in rows[:20]:
+        model.predict_proba(row)
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    model.predict_proba(X)
+    return float(np.percentile(timings, 50)), len(X) / (time.perf_counter() - started)
+
+
+def _describe(model, X, y_true):
+    p50, throughput = _latency(model, X)
+    return {
+        "auc": _auc(y_true, model.predict_proba(X)[:, 1]),
+        "bytes": _pickled_size(model),
+        "p50_ms": p50,
+        "rows_per_sec": throughput,
+    }
+
+
+# ---------------------- Compaction ---------------------- #
+def compact_model(model_path, tolerance=AUC_TOLERANCE, epsilons=MERGE_EPSILONS):
+    # Works on the framework object, so never the native artifact
+    model = load_model(model_path, prefer_native=False)
+    X_train, X_test, _, y_test = holdout_split(load_dataset())
+    features = model_feature_names(model) or list(X_test.columns)
+    X_val, X_guard, y_val, y_guard = train_test_split(
+        X_test[features], y_test.to_numpy(), test_size=0.5, random_state=RANDOM_STATE, stratify=y_test
+    )
+    steps = {}
+
+    if _framework(model) == "lightgbm":
+        header, trees, tail = parse_lgbm_model(model.booster_.model_to_string())
+        staged = dict(enumerate(_lgbm_staged_aucs(model, trees, X_val, y_val), start=1))
+        # Half the budget for truncation, the rest for leaf merging
+        n_trees = _shortest_prefix(staged, tolerance / 2)
+        trees = trees[:n_trees]
+        steps["trees"] = (len(staged), n_trees)
+
+        full_val_auc = max(staged.values())
+        best_epsilon, merged_trees, merged = 0.0, trees, 0
+        for epsilon in epsilons:
+            candidate, count = merge_similar_leaves(copy.deepcopy(trees), epsilon)
+            scores = _lgbm_with_text(model, dump_lgbm_model(header, candidate, tail)).predict_proba(X_val)[:, 1]
+            if _auc(y_val, scores) < full_val_auc - tolerance:
+                break
+            best_epsilon, merged_trees, merged = epsilon, candidate, count
+        steps["merged_leaves"] = (merged, best_epsilon)
+
+        integer_features = {i for i, name in enumerate(features) if np.all(np.mod(X_train[name].dropna(), 1) == 0)}
+        quantized_trees, quantized = quantize_thresholds(merged_trees, integer_features)
+        steps["quantized_thresholds"] = quantized
+        compact = _lgbm_with_text(model, dump_lgbm_model(header, quantized_trees, tail))
+    else:
+        staged = _staged_aucs(model, X_val, y_val)
+        n_trees = _shortest_prefix(staged, tolerance)
+        steps["trees"] = (max(staged), n_trees)
+        compact = _truncate(model, n_trees)
+
+    before = _describe(model, X_guard, y_guard)
+    after = _describe(compact, X_guard, y_guard)
+    return {
+        "model": compact,
+        "steps": steps,
+        "before": before,
+        "after": after,
+        "accepted": after["auc"] >= before["auc"] - tolerance,
+        "tolerance": tolerance,
+    }
+
+
+def compact_path(model_path):
+    stem, ext = os.path.splitext(model_path)
+    return f"{stem}_compact{ext}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune and quantize a tuned tree model within an AUC tolerance")
+    parser.add_argument("model", help="Model .pkl from Top10Model/ or HypertunedModels/")
+    parser.add_argument("--tolerance", type=float, default=AUC_TOLERANCE, help="Maximum holdout AUC loss")
+    parser.add_argument("--out", default=None, help="Output path (default: <model>_compact.pkl)")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, don't write the compact model")
+    args = parser.parse_args()
+
+    result = compact_model(args.model, args.tolerance)
+    steps, before, after = result["steps"], result["before"], result["after"]
+
+    print(f"Trees: {steps['trees'][0]} -> {steps['trees'][1]}")
+    if "merged_leaves" in steps:
+        print(f"Merged sibling leaves: {steps['merged_leaves'][0]} (epsilon {steps['merged_leaves'][1]})")
+        print(f"Quantized thresholds: {steps['quantized_thresholds']}")
+    print()
+    print(f"{'':<12}{'AUC':>9}{'size KB':>10}{'p50 ms':>9}{'rows/s':>12}")
+    for label, stats in (("original", before), ("compact", after)):
+        print(f"{label:<12}{stats['auc']:>9.4f}{stats['bytes'] / 1024:>10.0f}{stats['p50_ms']:>9.3f}{stats['rows_per_sec']:>12,.0f}")
+    print(f"{'change':<12}{after['auc'] - before['auc']:>+9.4f}{after['bytes'] / before['bytes'] - 1:>+10.0%}"
+          f"{after['p50_ms'] / before['p50_ms'] - 1:>+9.0%}{after['rows_per_sec'] / before['rows_per_sec'] - 1:>+12.0%}")
+
+    if not result["accepted"]:
+        print(f"Rejected: holdout AUC dropped by more than {result['tolerance']}.")
+        return
+    if args.dry_run:
+        print("Accepted (dry run, nothing written).")
+        return
+    out_path = args.out or compact_path(args.model)
+    joblib.dump(result["model"], out_path)
+    print(f"Accepted -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
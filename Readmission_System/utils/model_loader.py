@@ -1,8 +1,77 @@
 # utils/model_loader.py
+import hashlib
+import os
+import threading
 import joblib
+from utils.artifacts import artifact_matches, has_artifact, load_artifact
+from utils.tracing import traced
 
-def load_model(path):
+MODEL_DIRS = ["BaseModels", "HypertunedModels", "Top10Model"]
+DEFAULT_MODEL_PATH = "Top10Model/lightgbm_top10_randomsearch.pkl"
+
+# "pickle" ignores exported artifacts, e.g. to compare against the originals
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "native")
+
+@traced("model.load")
+def load_model(path, prefer_native=True):
+    # A verified native artifact next to the .pkl is used instead of unpickling, but only if it
+    # was exported from this exact pickle, so predictions always match model_version(path)
     try:
+        if prefer_native and MODEL_FORMAT != "pickle" and has_artifact(path) and artifact_matches(path, _file_sha256(path)):
+            return load_artifact(path)
         return joblib.load(path)
     except Exception as e:
         raise FileNotFoundError(f"Failed to load model at {path}: {e}")
+
+# One loaded instance per model file and server process, shared by every session
+_models = {}
+_model_locks = {}
+
+def get_model(path):
+    key = (path, os.stat(path).st_mtime_ns) if os.path.exists(path) else (path, None)
+    model = _models.get(key)
+    if model is None:
+        with _model_locks.setdefault(path, threading.Lock()):
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = load_model(path)
+    return model
+
+# Hashed once per file version; shared by the artifact check and model_version
+_digests = {}
+
+def _file_sha256(path):
+    key = (path, os.stat(path).st_mtime_ns)
+    sha256 = _digests.get(key)
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        sha256 = _digests[key] = digest.hexdigest()
+    return sha256
+
+# "<path>@<sha256 prefix>": identifies the exact file behind a prediction, even
+# after a retrained model is saved under the same name. load_model never serves an
+# artifact exported from another version of the file, so this is what scored.
+def model_version(path):
+    return f"{path}@{_file_sha256(path)[:12]}"
+
+def discover_models(dirs=MODEL_DIRS):
+    paths = []
+    for directory in dirs:
+        if os.path.isdir(directory):
+            paths += [f"{directory}/{name}" for name in sorted(os.listdir(directory)) if name.endswith(".pkl")]
+    return paths
+
+def model_feature_names(model):
+    # sklearn/XGBoost expose feature_names_in_, CatBoost feature_names_; older
+    # LightGBM pickles only keep the names on the booster
+    for attr in ("feature_names_in_", "feature_names_"):
+        names = getattr(model, attr, None)
+        if names is not None:
+            return list(names)
+    booster = getattr(model, "booster_", None)
+    if booster is not None:
+        return booster.feature_name()
+    return None
@@ -0,0 +1,330 @@
+# utils/report.py
+# Static report of the evaluation, comparison and dashboard pages, built
+# without a Streamlit session from the metrics artifacts, the dataset and the
+# cohort risk scores. Figures come from utils/figures, so they match the pages.
+#
+# The report is split into independent sections. Each section has a
+# fingerprint of its inputs (metrics file versions, dataset version, model
+# version, and the figure/report code itself) and its HTML fragment is cached
+# in .cache/report/ under that fingerprint: a run only rebuilds the sections
+# whose inputs changed, spread across processes, and stitches all fragments into
+# one self-contained HTML file (plotly.js inline, print styles for
+# "Save as PDF"). Dashboard sections cover the whole cohort, without filters.
+#   python -m utils.report                      # reports/readmission-report-<date>.html
+#   python -m utils.report --workers 4 --force --out weekly.html
+import argparse
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import plotly
+from plotly.offline import get_plotlyjs
+
+from utils import figures
+from utils.dataset import DATA_PATH, load_dataset
+from utils.metrics_catalog import EVALUATION_METRICS_PATH, get_entry, list_entries, load_plot_roc_curve
+from utils.model_loader import DEFAULT_MODEL_PATH
+from utils.score_cache import N_DECILES, cache_key, cohort_scores
+from utils.shared_data import data_key, decoded_column
+
+REPORT_DIR = "reports"
+FRAGMENT_DIR = ".cache/report"
+
+STYLE = """
+body { background: #0e1117; color: #fafafa; font-family: "Source Sans Pro", sans-serif; margin: 2rem auto; max-width: 1100px; }
+h1, h2, h3 { font-weight: 600; }
+section { margin-bottom: 3rem; }
+.metrics { display: flex; gap: 2rem; margin: 1rem 0; }
+.metric .label { color: #a3a8b8; font-size: 0.9rem; }
+.metric .value { font-size: 1.8rem; }
+.charts { display: flex; flex-wrap: wrap; gap: 1rem; }
+table.frame { border-collapse: collapse; margin: 1rem 0; }
+table.frame th, table.frame td { border: 1px solid #3a3a3a; padding: 6px 10px; text-align: center; }
+.note { color: #a3a8b8; font-size: 0.9rem; }
+.error { color: #ff6b6b; }
+@media print {
+  body { margin: 0; max-width: none; -webkit-print-color-adjust: exact; print-color-adjust: exact; }
+  section { break-before: page; }
+  section:first-of-type { break-before: auto; }
+  .plotly-graph-div { break-inside: avoid; }
+}
+"""
+
+
+# ---------------------- Fragments ---------------------- #
+def _figure(fig):
+    # Dark template to match the app; plotly.js itself is inlined once per report
+    fig.update_layout(template="plotly_dark")
+    return fig.to_html(full_html=False, include_plotlyjs=False, config={"displaylogo": False})
+
+
+def _table(df, index=False):
+    return df.to_html(index=index, classes="frame", border=0, na_rep="")
+
+
+def _metrics(items):
+    cells = "".join(f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+                    f'<div class="value">{html.escape(value)}</div></div>' for label, value in items)
+    return f'<div class="metrics">{cells}</div>'
+
+
+def _cohort_frame():
+    df = load_dataset(DATA_PATH)
+    for column, mapping in figures.DISPLAY_MAPS.items():
+        if column != "readmitted":
+            df[column] = decoded_column(DATA_PATH, column, mapping)
+    return df
+
+
+# ---------------------- Sections ---------------------- #
+def _evaluation():
+    metrics = get_entry(EVALUATION_METRICS_PATH)
+    if metrics is None:
+        raise FileNotFoundError(EVALUATION_METRICS_PATH)
+    if "error" in metrics:
+        raise ValueError(metrics["error"])
+    report_df = figures.classification_report_frame(metrics["classification_report"])
+    parts = [
+        _metrics([("ROC AUC", f"{metrics['roc_auc']:.4f}"), ("Accuracy", f"{metrics['accuracy']:.4f}")]),
+        figures.style_classification_report(report_df).to_html(),
+        _figure(figures.confusion_matrix_figure(metrics["confusion_matrix"])),
+    ]
+    fpr, tpr, _ = load_plot_roc_curve(EVALUATION_METRICS_PATH)
+    if fpr is not None:
+        parts.append(_figure(figures.roc_figure(fpr, tpr)))
+    return "".join(parts)
+
+
+def _comparison():
+    entries = sorted(list_entries(), key=lambda e: e["roc_auc"] or 0, reverse=True)
+    if not entries:
+        raise FileNotFoundError("No evaluation metrics found in EvaluationMetrics/ or BaseModelMetrics/")
+    df_eval, failed = figures.comparison_frame(entries)
+    auc_by_model = dict(zip(df_eval["Model"], df_eval["ROC AUC"]))
+    curves = []
+    for entry in entries:
+        fpr, tpr, _ = load_plot_roc_curve(entry["path"])
+        curves.append((entry["name"], fpr, tpr, auc_by_model.get(entry["name"])))
+
+    parts = [_table(df_eval)]
+    if failed:
+        parts.append(f'<p class="error">Could not read: {html.escape(", ".join(name for name, _ in failed))}</p>')
+    parts.append(_figure(figures.metrics_comparison_figure(df_eval)))
+    parts.append(_figure(figures.roc_comparison_figure(curves)))
+    return "".join(parts)
+
+
+def _overview():
+    df = _cohort_frame()
+    parts = [
+        _metrics([("🧍 Patients", f"{len(df):,}"), ("🔁 Readmission Rate", f"{df['readmitted'].mean():.2%}")]),
+        _figure(figures.readmission_count_figure(df)),
+        _figure(figures.admission_type_figure(df)),
+        _figure(figures.discharge_figure(df)),
+    ]
+    parts.extend(_figure(figures.medication_usage_figure(df, med))
+                 for med in figures.MEDICATION_COLORS if med in df.columns)
+    return "".join(parts)
+
+
+def _distributions():
+    df = load_dataset(DATA_PATH)
+    charts = "".join(_figure(figures.distribution_figure(df, *spec).update_layout(width=520, height=400))
+                     for spec in figures.DISTRIBUTIONS)
+    return f'<div class="charts">{charts}</div>'
+
+
+def _risk():
+    cohort = cohort_scores(DEFAULT_MODEL_PATH, DATA_PATH)
+    decile = cohort["decile"].to_numpy()
+    observed = load_dataset(DATA_PATH)["readmitted"].to_numpy()
+    predicted = cohort["probability"].to_numpy()
+    calibration = figures.calibration_frame(decile, observed, predicted, cohort["bands"])
+    return "".join([
+        _metrics([
+            ("Observed Readmission Rate", f"{observed.mean():.2%}"),
+            ("Mean Predicted Risk", f"{predicted.mean():.2%}"),
+            ("Patients in Top Risk Decile", f"{(decile == N_DECILES).sum():,}"),
+        ]),
+        _figure(figures.calibration_figure(calibration)),
+        _table(calibration.assign(Observed=calibration["Observed"].map("{:.2%}".format),
+                                  Predicted=calibration["Predicted"].map("{:.2%}".format))),
+        f'<p class="note">Scores from {html.escape(cohort["model_version"])}.</p>',
+    ])
+
+
+def _file_version(path):
+    # A missing file is an input version too; the section then reports the error
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _evaluation_inputs():
+    return _file_version(EVALUATION_METRICS_PATH)
+
+
+def _comparison_inputs():
+    return sorted(_file_version(e["path"]) for e in list_entries())
+
+
+def _dataset_inputs():
+    return data_key(DATA_PATH)
+
+
+def _risk_inputs():
+    return cache_key(DEFAULT_MODEL_PATH, DATA_PATH)
+
+
+# name: (title, inputs, build), in report order
+SECTIONS = {
+    "evaluation": ("📊 LightGBM Model Evaluation", _evaluation_inputs, _evaluation),
+    "comparison": ("📌 Model Comparison", _comparison_inputs, _comparison),
+    "overview": ("🔄 Readmission, Admission & Medication Overview", _dataset_inputs, _overview),
+    "distributions": ("📈 Key Feature Distributions", _dataset_inputs, _distributions),
+    "risk": ("🎯 Predicted Risk (Top 10 Model)", _risk_inputs, _risk),
+}
+
+
+# ---------------------- Cache ---------------------- #
+def _code_version():
+    # Changing how a figure is drawn invalidates its cached fragments too
+    digest = hashlib.sha1(plotly.__version__.encode("utf-8"))
+    for path in (figures.__file__, __file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def section_key(name, code_version=None):
+    _, inputs, _ = SECTIONS[name]
+    raw = json.dumps([name, inputs(), code_version or _code_version()])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _fragment_path(name, key):
+    return os.path.join(FRAGMENT_DIR, f"{name}-{key}.html")
+
+
+def _build_section(name, path):
+    started = time.perf_counter()
+    title, _, build = SECTIONS[name]
+    fragment = f"<section><h2>{html.escape(title)}</h2>{build()}</section>"
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(fragment)
+    os.replace(tmp_path, path)
+    # Fragments of earlier input versions are never read again
+    for entry in os.scandir(FRAGMENT_DIR):
+        if entry.name.startswith(f"{name}-") and entry.name.endswith(".html") and entry.path != path:
+            os.remove(entry.path)
+    return time.perf_counter() - started
+
+
+# ---------------------- Report ---------------------- #
+def build_report(out=None, sections=None, workers=None, force=False, progress=None):
+    started = time.perf_counter()
+    sections = sections or list(SECTIONS)
+    out = out or os.path.join(REPORT_DIR, f"readmission-report-{datetime.now():%Y-%m-%d}.html")
+    os.makedirs(FRAGMENT_DIR, exist_ok=True)
+
+    code_version = _code_version()
+    paths, results = {}, {}
+    for name in sections:
+        paths[name] = _fragment_path(name, section_key(name, code_version))
+        if not force and os.path.exists(paths[name]):
+            results[name] = {"status": "cached", "seconds": 0.0}
+    pending = [name for name in sections if name not in results]
+
+    def finished(name, seconds=None, error=None):
+        if error is None:
+            results[name] = {"status": "built", "seconds": seconds}
+        else:
+            results[name] = {"status": "failed", "error": str(error)}
+        if progress:
+            progress(name, results[name])
+
+    if pending:
+        load_dataset(DATA_PATH)  # writes the shared Arrow file once, before the workers map it
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        if workers <= 1:
+            for name in pending:
+                try:
+                    finished(name, _build_section(name, paths[name]))
+                except Exception as e:
+                    finished(name, error=e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_build_section, name, paths[name]): name for name in pending}
+                for future in as_completed(futures):
+                    try:
+                        finished(futures[future], future.result())
+                    except Exception as e:
+                        finished(futures[future], error=e)
+
+    body = []
+    for name in sections:
+        if results[name]["status"] == "failed":
+            title = SECTIONS[name][0]
+            body.append(f'<section><h2>{html.escape(title)}</h2>'
+                        f'<p class="error">❌ Could not build this section: {html.escape(results[name]["error"])}</p></section>')
+            continue
+        with open(paths[name], encoding="utf-8") as f:
+            body.append(f.read())
+
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    document = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f"<title>Readmission Report {generated}</title>"
+        f"<style>{STYLE}</style>"
+        f'<script type="text/javascript">{get_plotlyjs()}</script>'
+        "</head><body>"
+        f'<h1>🏥 Diabetic Patient Readmission Report</h1><p class="note">Generated {generated} from {html.escape(DATA_PATH)}. '
+        "Dashboard sections cover every encounter, without filters.</p>"
+        f"{''.join(body)}</body></html>"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(document)
+    os.replace(tmp_path, out)
+
+    return {
+        "path": out,
+        "sections": results,
+        "bytes": os.path.getsize(out),
+        "seconds": time.perf_counter() - started,
+        "workers": workers if pending else 0,
+    }
+
+
+# ---------------------- CLI ---------------------- #
+def main():
+    parser = argparse.ArgumentParser(description="Build the static HTML report of the evaluation, comparison and dashboard pages.")
+    parser.add_argument("--out", default=None, help="Output .html (default reports/readmission-report-<date>.html)")
+    parser.add_argument("--sections", nargs="+", choices=list(SECTIONS), default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Rebuild every section even if its inputs are unchanged")
+    args = parser.parse_args()
+
+    def progress(name, result):
+        if result["status"] == "failed":
+            print(f"{name:<16}failed: {result['error']}")
+        else:
+            print(f"{name:<16}built in {result['seconds']:.2f}s")
+
+    result = build_report(args.out, args.sections, args.workers, args.force, progress)
+    for name, section in result["sections"].items():
+        if section["status"] == "cached":
+            print(f"{name:<16}unchanged, cached")
+    print(f"{result['path']} ({result['bytes'] / 1e6:.1f} MB) in {result['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# utils/schema.py
+# Shared input schema for the Top 10 model, used by the manual form and batch
+# CSV scoring. Every check works on whole columns: spellings are normalized
+# once per distinct value, ranges and cross-field rules are boolean masks, and
+# bad rows come back in an error report instead of failing the whole file.
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset import TOP10_FEATURES
+from utils.mappings import encoding_maps
+
+VISIT_TYPES = ["number_inpatient", "number_emergency", "number_outpatient"]
+
+# Numeric features: inclusive bounds. Visit counts have no natural maximum; their caps sit
+# well above anything in the UCI data (21 inpatient, 76 emergency, 42 outpatient) and only
+# catch typos and values that would overflow an int64.
+NUMERIC_RANGES = {
+    "number_of_visits": (0, 300),
+    "number_inpatient": (0, 100),
+    "number_diagnoses": (0, 20),
+    "number_emergency": (0, 100),
+    "number_outpatient": (0, 100),
+    # One change per diabetes medication column in the source data
+    "numchange": (0, 23),
+    "time_in_hospital": (1, 30),
+    "num_lab_procedures": (0, 132),
+}
+
+# Coded features: the codes come from encoding_maps, plus extra spellings seen in uploads
+EXTRA_SPELLINGS = {
+    "diabetesMed": {"y": 1, "n": 0, "true": 1, "false": 0, "t": 1, "f": 0},
+    "admission_source_id": {
+        "referral clinic physician hmo": 0,
+        "transfer from healthcare facility snf rehab etc": 1,
+        "emergency admission": 2,
+        "birth neonatal care": 3,
+        "readmission or home health referral": 4,
+    },
+}
+CODED_FEATURES = [name for name in TOP10_FEATURES if name in encoding_maps]
+
+ERROR_COLUMNS = ["Row", "Column", "Value", "Problem"]
+
+
+# ---------------------- Spelling Normalization ---------------------- #
+def _normalize(text):
+    # "Yes " / "YES" / "Home-Health" -> "yes" / "yes" / "home health"
+    return re.sub(r"[^0-9a-z]+", " ", str(text).lower()).strip()
+
+
+def _spellings(name):
+    spellings = {}
+    for code, label in encoding_maps[name].items():
+        spellings[_normalize(label)] = code
+        spellings[str(code)] = code
+        spellings[f"{code} 0"] = code  # "1.0" once normalized
+    spellings.update(EXTRA_SPELLINGS.get(name, {}))
+    return spellings
+
+
+SPELLINGS = {name: _spellings(name) for name in CODED_FEATURES}
+
+
+def _coerce_coded(name, column):
+    # Each distinct spelling is looked up once, then broadcast back with the factorize codes
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    lookup = SPELLINGS[name]
+    mapped = np.array([lookup.get(_normalize(u), np.nan) for u in uniques] + [np.nan], dtype=float)
+    return mapped[codes]
+
+
+def _coerce_numeric(column):
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        return column.to_numpy(dtype=float, na_value=np.nan)
+    text = column.astype("string").str.strip()
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+# ---------------------- Validation ---------------------- #
+def _report(problems, raw):
+    parts = []
+    for column, mask, message in problems:
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            parts.append(pd.DataFrame({
+                "Row": rows + 1,
+                "Column": column,
+                "Value": raw[column].iloc[rows].astype("string").fillna("(blank)").to_numpy(),
+                "Problem": message,
+            }))
+    if not parts:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values(["Row", "Column"], kind="stable").reset_index(drop=True)
+
+
+def missing_columns(df):
+    return [name for name in TOP10_FEATURES if name not in df.columns]
+
+
+def validate_top10(df):
+    # Returns (clean rows with integer Top 10 columns, error report). Row numbers are
+    # 1-based positions in `df`, i.e. data lines below the CSV header.
+    n_rows = len(df)
+    values = {}
+    problems = []
+
+    for name in TOP10_FEATURES:
+        column = df[name]
+        blank = column.isna().to_numpy(copy=True)
+        if column.dtype == object or pd.api.types.is_string_dtype(column):
+            blank |= (column.astype("string").str.strip() == "").fillna(False).to_numpy(dtype=bool)
+
+        if name in SPELLINGS:
+            coerced = _coerce_coded(name, column)
+            allowed = ", ".join(f"{code} ({label})" for code, label in encoding_maps[name].items())
+            problems.append((name, np.isnan(coerced) & ~blank, f"Unknown value; expected one of {allowed}"))
+        else:
+            coerced = _coerce_numeric(column)
+            unparsed = np.isnan(coerced) & ~blank
+            problems.append((name, unparsed, "Not a number"))
+            present = ~np.isnan(coerced)
+            # "inf" parses as a float; it is neither a whole number nor castable to int64
+            problems.append((name, present & ~np.isfinite(coerced), "Not a number"))
+            present &= np.isfinite(coerced)
+            problems.append((name, present & (coerced != np.round(coerced)), "Must be a whole number"))
+            low, high = NUMERIC_RANGES[name]
+            if low is not None:
+                problems.append((name, present & (coerced < low), f"Below the minimum of {low}"))
+            if high is not None:
+                problems.append((name, present & (coerced > high), f"Above the maximum of {high}"))
+
+        problems.append((name, blank, "Missing value"))
+        values[name] = coerced
+
+    # Cross-field: total visits cannot be fewer than the visits broken down by type
+    visit_sum = np.sum([values[name] for name in VISIT_TYPES], axis=0)
+    problems.append(("number_of_visits", values["number_of_visits"] < visit_sum,
+                     "Fewer than number_inpatient + number_emergency + number_outpatient"))
+
+    errors = _report(problems, df)
+    valid = np.ones(n_rows, dtype=bool)
+    valid[errors["Row"].to_numpy(dtype=int) - 1] = False
+
+    clean = df.loc[valid].copy()
+    for name in TOP10_FEATURES:
+        clean[name] = values[name][valid].astype(np.int64)
+    return clean, errors
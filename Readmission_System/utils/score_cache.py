@@ -0,0 +1,126 @@
+# utils/score_cache.py
+import hashlib
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset import DATA_PATH, TOP10_FEATURES, holdout_split, load_dataset
+from utils.model_loader import DEFAULT_MODEL_PATH, get_model, load_model, model_feature_names, model_version
+from utils.shared_data import register_shared
+
+SCORE_CACHE_DIR = ".cache/scores"
+N_DECILES = 10
+
+_cohort_lock = threading.Lock()
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def cache_key(model_path, data_path=DATA_PATH):
+    # Invalidated whenever either the model file or the dataset changes
+    raw = f"{_fingerprint(model_path)}|{_fingerprint(data_path)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_path(model_path, data_path):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(SCORE_CACHE_DIR, f"{stem}-{cache_key(model_path, data_path)}.npz")
+
+
+def store_scores(model_path, y_true, scores, data_path=DATA_PATH):
+    os.makedirs(SCORE_CACHE_DIR, exist_ok=True)
+    path = _cache_path(model_path, data_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, y_true=np.asarray(y_true, dtype=np.int8), scores=np.asarray(scores, dtype=np.float64))
+    os.replace(tmp_path, path)
+    return path
+
+
+@lru_cache(maxsize=16)
+def _holdout_scores(model_path, data_path, key):
+    path = _cache_path(model_path, data_path)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return cached["y_true"], cached["scores"]
+
+    _, X_test, _, y_test = holdout_split(load_dataset(data_path))
+    model = load_model(model_path)
+    features = model_feature_names(model) or list(X_test.columns)
+    scores = model.predict_proba(X_test[features])[:, 1]
+    store_scores(model_path, y_test.to_numpy(), scores, data_path)
+    return y_test.to_numpy().astype(np.int8), scores
+
+
+def holdout_scores(model_path, data_path=DATA_PATH):
+    # Scored once per model/dataset version, then served from disk or memory
+    return _holdout_scores(model_path, data_path, cache_key(model_path, data_path))
+
+
+# ---------------------- Cohort Risk Scores ---------------------- #
+def _cohort_path(model_path, data_path):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(SCORE_CACHE_DIR, f"cohort-{stem}-{cache_key(model_path, data_path)}.npz")
+
+
+def _score_cohort(model_path, data_path):
+    df = load_dataset(data_path)
+    model = get_model(model_path)
+    features = model_feature_names(model) or TOP10_FEATURES
+    probability = model.predict_proba(df[features])[:, 1].astype(np.float32)
+
+    # Rows by descending risk; offsets[i]:offsets[i + 1] of that order is decile
+    # N_DECILES - i, so every decile holds the same number of encounters even with ties
+    order = np.argsort(-probability, kind="stable").astype(np.int32)
+    offsets = np.linspace(0, len(order), N_DECILES + 1).round().astype(np.int64)
+    decile = np.empty(len(order), dtype=np.int8)
+    for i in range(N_DECILES):
+        decile[order[offsets[i]:offsets[i + 1]]] = N_DECILES - i
+    return {"probability": probability, "decile": decile, "order": order, "offsets": offsets,
+            "model_version": np.array(model_version(model_path))}
+
+
+@lru_cache(maxsize=4)
+def _cohort_scores(model_path, data_path, key):
+    path = _cohort_path(model_path, data_path)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            arrays = {name: cached[name] for name in cached.files}
+    else:
+        arrays = _score_cohort(model_path, data_path)
+        os.makedirs(SCORE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    probability, order, offsets = arrays["probability"], arrays["order"], arrays["offsets"]
+    # Lowest and highest probability in each decile, decile 1 first
+    bands = [(float(probability[order[offsets[i + 1] - 1]]), float(probability[order[offsets[i]]]))
+             for i in reversed(range(N_DECILES))]
+    return {
+        # Aligned with the dataset rows and shared by every session, like the decoded columns
+        "probability": register_shared(pd.Series(probability, name="predicted_risk")),
+        "decile": register_shared(pd.Series(arrays["decile"], name="risk_decile")),
+        "order": order,
+        "offsets": offsets,
+        "bands": bands,
+        "model_version": str(arrays["model_version"]),
+    }
+
+
+def cohort_scores(model_path=DEFAULT_MODEL_PATH, data_path=DATA_PATH):
+    # Every encounter scored once per model/dataset version
+    key = cache_key(model_path, data_path)
+    with _cohort_lock:
+        return _cohort_scores(model_path, data_path, key)
+
+
+def decile_rows(scores, decile):
+    # Row positions in one decile, highest risk first
+    i = N_DECILES - decile
+    return scores["order"][scores["offsets"][i]:scores["offsets"][i + 1]]
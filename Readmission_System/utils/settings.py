@@ -0,0 +1,123 @@
+# utils/settings.py
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+from utils.model_loader import DEFAULT_MODEL_PATH
+
+SETTINGS_DIR = "settings"
+THRESHOLD_PATH = os.path.join(SETTINGS_DIR, "decision_threshold.json")
+CASCADE_PATH = os.path.join(SETTINGS_DIR, "cascade.json")
+DEFAULT_THRESHOLD = 0.5
+
+_lock = threading.Lock()
+
+
+# ---------------------- Versioned JSON Settings ---------------------- #
+def _read(path):
+    # Only a missing file means "nothing saved yet". A corrupt one raises instead of
+    # reading as empty, which would let the next save overwrite every past version.
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"current": None, "versions": []}
+    except ValueError as e:
+        raise ValueError(f"{path} is not valid JSON ({e}); restore it before reading or saving settings") from e
+
+
+@contextmanager
+def _writer_lock(path):
+    # _lock covers threads of this server; the lock file covers other processes
+    # (the CLIs, batch workers, a second server) saving at the same time
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _append_version(path, values):
+    # Versions are never edited in place, so every past operating point stays auditable
+    with _writer_lock(path):
+        data = _read(path)
+        version = len(data["versions"]) + 1
+        data["versions"].append({
+            "version": version,
+            "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **values,
+        })
+        data["current"] = version
+        _write(path, data)
+    return version
+
+
+def _current(path):
+    data = _read(path)
+    for entry in data["versions"]:
+        if entry["version"] == data["current"]:
+            return entry
+    return None
+
+
+# ---------------------- Decision Threshold ---------------------- #
+def get_decision_threshold(model_path=DEFAULT_MODEL_PATH):
+    # A threshold only holds for the scores of the model it was tuned on: the current version
+    # if it belongs to model_path, else the latest version saved for model_path, else the default.
+    # Versions saved before thresholds recorded their model apply to any model.
+    data = _read(THRESHOLD_PATH)
+    versions = sorted(data["versions"], key=lambda e: (e["version"] == data["current"], e["version"]), reverse=True)
+    for entry in versions:
+        if entry.get("model_path") in (None, model_path):
+            return float(entry["threshold"]), entry["version"]
+    return DEFAULT_THRESHOLD, 0
+
+
+def save_decision_threshold(threshold, **details):
+    return _append_version(THRESHOLD_PATH, {"threshold": float(threshold), **details})
+
+
+def threshold_history():
+    return _read(THRESHOLD_PATH)["versions"]
+
+
+# ---------------------- Scoring Cascade ---------------------- #
+def get_cascade_config():
+    entry = _current(CASCADE_PATH)
+    if entry is None or not entry.get("enabled", True):
+        return None
+    return entry
+
+
+def save_cascade_config(fast_model, expensive_models, band, threshold, **details):
+    # The cascade's mixed fast/expensive scores get their own decision threshold
+    return _append_version(CASCADE_PATH, {
+        "fast_model": fast_model,
+        "expensive_models": list(expensive_models),
+        "band": [float(band[0]), float(band[1])],
+        "threshold": float(threshold),
+        **details,
+    })
+
+
+def disable_cascade(**details):
+    return _append_version(CASCADE_PATH, {"enabled": False, **details})
@@ -1,13 +1,35 @@
 # utils/shap_plot.py
+import threading
+import weakref
 import shap
 import plotly.graph_objects as go
 import streamlit as st
 from utils.gemini_intent import model
-
-def generate_shap_plot(model_obj, input_df):
-    explainer = shap.TreeExplainer(model_obj)
-    shap_values = explainer.shap_values(input_df)
-
+from utils.background import submit, render_job_result
+from utils.tracing import span, traced
+
+# Explainers live as long as their (cached) model object
+_explainers = weakref.WeakKeyDictionary()
+_explainer_lock = threading.Lock()
+
+def get_explainer(model_obj):
+    with _explainer_lock:
+        explainer = _explainers.get(model_obj)
+    if explainer is None:
+        with span("shap.build_explainer"):
+            # Native artifacts wrap the framework booster, which SHAP reads directly
+            explainer = shap.TreeExplainer(getattr(model_obj, "booster", None) or model_obj)
+        with _explainer_lock:
+            explainer = _explainers.setdefault(model_obj, explainer)
+    return explainer
+
+def compute_shap(model_obj, input_df):
+    explainer = get_explainer(model_obj)
+    with span("shap.compute"):
+        shap_values = explainer.shap_values(input_df)
+    return shap_values[0], float(explainer.expected_value)
+
+def generate_shap_plot(input_df, shap_row, base_value):
     st.write("### 🔍 SHAP Explanation of Prediction")
     st.markdown("""
     **ℹ️ How to read this chart:**
@@ -17,12 +39,10 @@ def generate_shap_plot(model_obj, input_df):
     """)
 
     # Prepare data for Plotly waterfall
-    shap_values_list = shap_values[0]
-    base_value = float(explainer.expected_value)
-    final_value = float(base_value + sum(shap_values_list))
+    final_value = float(base_value + sum(shap_row))
 
     features = input_df.columns.tolist()
-    values = shap_values_list.tolist()
+    values = shap_row.tolist()
     measure = ["relative"] * len(features) + ["total"]
     x_labels = features + ["Prediction"]
     y_values = values + [final_value]
@@ -48,13 +68,10 @@ def generate_shap_plot(model_obj, input_df):
 
     st.plotly_chart(fig, use_container_width=True)
 
-def explain_with_gemini(model_obj, input_df, prediction, probability):
-    explainer = shap.TreeExplainer(model_obj)
-    shap_values = explainer.shap_values(input_df)
-
-    shap_impact = dict(zip(input_df.columns, shap_values[0]))
-    base_value = float(explainer.expected_value)
-    fx_val = float(base_value + sum(shap_values[0]))
+@traced("shap.gemini_explanation")
+def build_gemini_explanation(input_df, shap_row, base_value, prediction, probability):
+    shap_impact = dict(zip(input_df.columns, shap_row))
+    fx_val = float(base_value + sum(shap_row))
     prob_percent = round(float(probability) * 100, 2)
 
     prompt = f"""
@@ -74,10 +91,25 @@ def explain_with_gemini(model_obj, input_df, prediction, probability):
     Please provide a clear explanation of why this prediction was made, referencing the most influential features and what they imply about the patient's risk. Begin with the predicted probability.
     """
 
-    try:
-        response = model.generate_content(prompt)
-        st.markdown("### 🧠 Gemini Explanation of Prediction")
-        st.info(response.text)
-    except Exception as e:
-        st.warning("Could not generate Gemini explanation.")
-        st.text(str(e))
+    return model.generate_content(prompt).text
+
+def _render_gemini_explanation(text):
+    st.markdown("### 🧠 Gemini Explanation of Prediction")
+    st.info(text)
+
+def explain_with_gemini(input_df, shap_row, base_value, prediction, probability):
+    # Starts the explanation on the background pool so the page keeps rendering
+    return submit(
+        "prediction_explanation",
+        build_gemini_explanation,
+        input_df, shap_row, base_value, prediction, probability,
+        key=(tuple(input_df.iloc[0].tolist()), prediction),
+    )
+
+def render_gemini_explanation():
+    render_job_result(
+        "prediction_explanation",
+        _render_gemini_explanation,
+        pending_message="🧠 Gemini is preparing an explanation...",
+        failure_message="Could not generate Gemini explanation.",
+    )
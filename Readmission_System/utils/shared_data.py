@@ -0,0 +1,250 @@
+# utils/shared_data.py
+# One read-only copy of the cleaned dataset per machine instead of one per session:
+# the CSV is converted once to an Arrow IPC file in .cache/shared/, every process
+# memory-maps it, and every session gets a copy-on-write view whose numeric
+# columns point straight into the mapped pages. Decoded label columns
+# ("Male"/"Female" etc.) are built once per process and shared the same way.
+#
+# Sessions report which of their frames' bytes are shared vs. private, so the
+# savings show on the Performance page and in:
+#   python -m utils.shared_data --sessions 30
+import argparse
+import hashlib
+import multiprocessing as mp
+import os
+import threading
+import time
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SHARED_DIR = ".cache/shared"
+SESSION_TTL = 3600
+
+_lock = threading.Lock()
+# Serializes the first map/decode so concurrent sessions (or warm-up threads) build each once
+_build_lock = threading.RLock()
+_shared_ranges = []
+_shared_addresses = set()
+_sessions = {}
+
+
+# ---------------------- Arrow File ---------------------- #
+def data_key(data_path):
+    stat = os.stat(data_path)
+    raw = f"{os.path.abspath(data_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def arrow_path(data_path):
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    return os.path.join(SHARED_DIR, f"{stem}-{data_key(data_path)}.arrow")
+
+
+def _build(data_path, path):
+    # Parsed with pandas so dtypes match pd.read_csv exactly; one record batch per file
+    # keeps every column a single contiguous buffer that pandas can view without copying
+    table = pa.Table.from_pandas(pd.read_csv(data_path), preserve_index=False).combine_chunks()
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=4)
+def _table(data_path, key):
+    path = arrow_path(data_path)
+    if not os.path.exists(path):
+        _build(data_path, path)
+    mapped = pa.memory_map(path).read_buffer()
+    with _lock:
+        _shared_ranges.append((mapped.address, mapped.address + mapped.size))
+    return ipc.open_file(mapped).read_all()
+
+
+@lru_cache(maxsize=4)
+def _frame(data_path, key):
+    # split_blocks gives one numpy view per column instead of consolidating (copying) them
+    return _table(data_path, key).to_pandas(split_blocks=True)
+
+
+def shared_table(data_path):
+    # The mapped Arrow table itself, for code that streams slices of it (e.g. exports)
+    key = data_key(data_path)
+    with _build_lock:
+        return _table(data_path, key)
+
+
+def shared_frame(data_path):
+    # Shallow copy: adding or replacing columns only affects the caller's view,
+    # and the mapped buffers are read-only, so in-place writes cannot leak across sessions
+    key = data_key(data_path)
+    with _build_lock:
+        frame = _frame(data_path, key)
+    return frame.copy(deep=False)
+
+
+@lru_cache(maxsize=64)
+def _decoded(data_path, key, name, items):
+    column = _frame(data_path, key)[name].map(dict(items))
+    with _lock:
+        _shared_addresses.update(_buffer_addresses(column))
+    return column
+
+
+def decoded_column(data_path, name, mapping):
+    key = data_key(data_path)
+    with _build_lock:
+        return _decoded(data_path, key, name, tuple(mapping.items()))
+
+
+def register_shared(column):
+    # For other process-wide columns (e.g. cohort risk scores) that sessions attach to their frames
+    with _lock:
+        _shared_addresses.update(_buffer_addresses(column))
+    return column
+
+
+# ---------------------- Memory Accounting ---------------------- #
+def _buffer_addresses(column):
+    try:
+        array = pa.Array.from_pandas(column)
+    except (pa.ArrowException, TypeError, ValueError):
+        return []
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    return [buffer.address for chunk in chunks for buffer in chunk.buffers() if buffer is not None]
+
+
+def _is_shared(column):
+    addresses = _buffer_addresses(column)
+    if not addresses:
+        return False
+    with _lock:
+        return all(
+            address in _shared_addresses or any(low <= address < high for low, high in _shared_ranges)
+            for address in addresses
+        )
+
+
+def frame_memory(df):
+    shared = private = 0
+    for name in df.columns:
+        column = df[name]
+        nbytes = int(column.memory_usage(index=False, deep=True))
+        if _is_shared(column):
+            shared += nbytes
+        else:
+            private += nbytes
+    return shared, private
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx  # type: ignore
+        ctx = get_script_run_ctx(suppress_warning=True)
+        return ctx.session_id if ctx else "main"
+    except ImportError:
+        return "main"
+
+
+def track_frame(label, df):
+    # Remembers this session's latest frame per label, e.g. ("dashboard", filtered view)
+    shared, private = frame_memory(df)
+    now = time.time()
+    with _lock:
+        frames = _sessions.setdefault(_session_id(), {"frames": {}, "seen": now})
+        frames["frames"][label] = (shared, private)
+        frames["seen"] = now
+        for session_id in [s for s, v in _sessions.items() if now - v["seen"] > SESSION_TTL]:
+            del _sessions[session_id]
+
+
+def session_memory():
+    with _lock:
+        return [
+            {"session": session_id, "frames": dict(entry["frames"]), "seen": entry["seen"]}
+            for session_id, entry in _sessions.items()
+        ]
+
+
+def shared_bytes():
+    with _lock:
+        return sum(high - low for low, high in _shared_ranges)
+
+
+def process_rss():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------------- Session Simulation ---------------------- #
+DEMO_MAPS = {
+    "gender": {0: "Female", 1: "Male"},
+    "race": {0: "Caucasian", 1: "AfricanAmerican", 2: "Other", 3: "Asian", 4: "Hispanic"},
+    "readmitted": {0: "Not Readmitted", 1: "Readmitted"},
+    "admission_source_id": {0: "Referral", 1: "Transfer from Healthcare Facility", 2: "Emergency",
+                            3: "Birth/Neonatal", 4: "Readmission/Home Health"},
+}
+
+
+def _simulate(mode, data_path, n_sessions, queue):
+    # One process per mode so the RSS numbers are not polluted by the other run
+    rss_start = process_rss()
+    frames = []
+    for _ in range(n_sessions):
+        if mode == "copy":
+            df = pd.read_csv(data_path)
+            for name, mapping in DEMO_MAPS.items():
+                df[name] = df[name].map(mapping)
+            frames.append((df, df.copy()))
+        else:
+            df = shared_frame(data_path)
+            for name, mapping in DEMO_MAPS.items():
+                df[name] = decoded_column(data_path, name, mapping)
+            frames.append((df, df.copy(deep=False)))
+    queue.put((process_rss() - rss_start, frame_memory(frames[-1][0])))
+
+
+def compare(data_path, n_sessions):
+    ctx = mp.get_context("spawn")
+    results = {}
+    for mode in ("copy", "shared"):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_simulate, args=(mode, data_path, n_sessions, queue))
+        process.start()
+        results[mode] = queue.get()
+        process.join()
+    return results
+
+
+def main():
+    from utils.dataset import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Memory of N dashboard-style sessions with and without the shared dataset")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--data", default=DATA_PATH)
+    args = parser.parse_args()
+
+    _frame(args.data, data_key(args.data))  # build the Arrow file outside the timed runs
+    print(f"Arrow file: {arrow_path(args.data)} ({os.path.getsize(arrow_path(args.data)) / 1e6:.1f} MB)")
+    results = compare(args.data, args.sessions)
+    print(f"{'mode':<8}{'RSS growth MB':>15}{'MB/session':>12}{'shared MB':>11}{'private MB':>12}")
+    for mode, (growth, (shared, private)) in results.items():
+        print(f"{mode:<8}{growth / 1e6:>15.1f}{growth / 1e6 / args.sessions:>12.2f}{shared / 1e6:>11.1f}{private / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# utils/similar_patients.py
+# "What happened to patients like this one?": k nearest past encounters on the
+# Top 10 features. Distances are Euclidean after dividing each feature by its
+# standard deviation, so visit counts and lab procedures weigh alike.
+#
+# The features are small integers and many encounters share the exact same
+# vector, so the KD-tree holds each distinct vector once and points at the rows
+# behind it. The index is built once per dataset version and kept in
+# .cache/similar/.
+#   python -m utils.similar_patients --rows 1000000   # build + query latency at 1M encounters
+import argparse
+import os
+import threading
+import time
+from functools import lru_cache
+
+import joblib
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from utils.dataset import DATA_PATH, TARGET, TOP10_FEATURES, load_dataset
+from utils.shared_data import data_key
+
+INDEX_DIR = ".cache/similar"
+DEFAULT_K = 20
+LEAF_SIZE = 40
+
+_lock = threading.Lock()
+
+
+# ---------------------- Index ---------------------- #
+def build_index(X):
+    X = np.asarray(X, dtype=np.float64)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    points, group, counts = np.unique(X, axis=0, return_inverse=True, return_counts=True)
+    return {
+        "tree": KDTree(points / scale, leaf_size=LEAF_SIZE),
+        "scale": scale,
+        # Rows of distinct vector g: rows[offsets[g]:offsets[g + 1]]
+        "rows": np.argsort(group.ravel(), kind="stable").astype(np.int32),
+        "offsets": np.concatenate([[0], np.cumsum(counts)]),
+    }
+
+
+def query_index(index, values, k=DEFAULT_K):
+    # Row positions of the k nearest encounters (closest first) and their distances
+    x = np.asarray(values, dtype=np.float64).reshape(1, -1) / index["scale"]
+    # k distinct vectors always cover at least k rows
+    n_groups = min(k, len(index["offsets"]) - 1)
+    distances, groups = index["tree"].query(x, k=n_groups)
+    rows, row_distances = [], []
+    for distance, g in zip(distances[0], groups[0]):
+        members = index["rows"][index["offsets"][g]:index["offsets"][g + 1]][:k - len(rows)]
+        rows.extend(members)
+        row_distances.extend([distance] * len(members))
+        if len(rows) >= k:
+            break
+    return np.array(rows), np.array(row_distances)
+
+
+def _index_path(data_path):
+    return os.path.join(INDEX_DIR, f"{data_key(data_path)}.joblib")
+
+
+@lru_cache(maxsize=2)
+def _load_index(data_path, key):
+    path = _index_path(data_path)
+    if os.path.exists(path):
+        return joblib.load(path)
+    index = build_index(load_dataset(data_path)[TOP10_FEATURES].to_numpy())
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(index, tmp_path)
+    os.replace(tmp_path, path)
+    return index
+
+
+def get_index(data_path=DATA_PATH):
+    key = data_key(data_path)
+    with _lock:
+        return _load_index(data_path, key)
+
+
+def similar_patients(input_df, k=DEFAULT_K, data_path=DATA_PATH):
+    # input_df: one validated Top 10 row. Returns the neighbours' Top 10 values and outcome.
+    rows, distances = query_index(get_index(data_path), input_df[TOP10_FEATURES].to_numpy()[0], k)
+    neighbours = load_dataset(data_path).iloc[rows][TOP10_FEATURES + [TARGET]]
+    return neighbours.assign(distance=distances.round(3))
+
+
+# ---------------------- Benchmark ---------------------- #
+def _synthetic(n_rows, seed=0):
+    # Resample the real encounters and jitter the counts, so the index is as spread out as real data
+    rng = np.random.default_rng(seed)
+    X = load_dataset()[TOP10_FEATURES].to_numpy()
+    X = X[rng.integers(0, len(X), n_rows)]
+    return np.maximum(X + rng.integers(-1, 2, X.shape), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the similar-patient index and time queries.")
+    parser.add_argument("--rows", type=int, default=0, help="Index this many synthetic encounters instead of the dataset")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.rows:
+        X = _synthetic(args.rows)
+        index = build_index(X)
+    else:
+        X = load_dataset()[TOP10_FEATURES].to_numpy()
+        index = get_index()
+    print(f"index: {len(X):,} encounters, {len(index['offsets']) - 1:,} distinct vectors, "
+          f"ready in {time.perf_counter() - started:.2f}s")
+
+    queries = X[np.random.default_rng(1).integers(0, len(X), args.queries)]
+    timings = []
+    for values in queries:
+        started = time.perf_counter()
+        query_index(index, values, args.k)
+        timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1000
+    print(f"query k={args.k}: p50 {np.percentile(timings, 50):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
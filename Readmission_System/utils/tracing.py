@@ -0,0 +1,192 @@
+# utils/tracing.py
+# Lightweight timing spans for pages and their expensive stages:
+#   with span("dashboard.load_csv"):
+#       df = pd.read_csv(...)
+#
+# Enabled with TRACING=1. Each span name keeps a fixed-bucket histogram (no raw
+# samples), exposed as Prometheus text on TRACING_PORT (default 9464, /metrics)
+# and/or appended as JSON lines to TRACING_LOG every TRACING_LOG_INTERVAL seconds.
+# When disabled, span() returns one shared no-op context manager.
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("TRACING", "0").lower() in ("1", "true", "yes")
+PORT = int(os.getenv("TRACING_PORT", "9464"))
+LOG_PATH = os.getenv("TRACING_LOG")
+LOG_INTERVAL = float(os.getenv("TRACING_LOG_INTERVAL", "60"))
+
+# Upper bounds in seconds (Prometheus "le" buckets); the last bucket is +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_histograms = {}
+_started = False
+
+
+# ---------------------- Histograms ---------------------- #
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket, as Prometheus' histogram_quantile does
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = BUCKETS[index - 1] if index else 0.0
+                high = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def span(name):
+    return _Span(name) if ENABLED else _NOOP
+
+
+def traced(name):
+    # Decorator form of span(); returns the function untouched when tracing is off
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: {"count": h.count, "sum": h.sum, "max": h.max, "counts": list(h.counts),
+                   "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+            for name, h in sorted(_histograms.items())
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+# ---------------------- Exporters ---------------------- #
+def render_prometheus():
+    lines = [
+        "# HELP readmission_span_seconds Wall time of traced app stages",
+        "# TYPE readmission_span_seconds histogram",
+    ]
+    for name, stats in snapshot().items():
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), stats["counts"]):
+            cumulative += n
+            lines.append(f'readmission_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'readmission_span_seconds_sum{{span="{name}"}} {stats["sum"]:.6f}')
+        lines.append(f'readmission_span_seconds_count{{span="{name}"}} {stats["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="tracing-metrics", daemon=True).start()
+    return server
+
+
+def _write_log(path, interval):
+    while True:
+        time.sleep(interval)
+        record = {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), "spans": snapshot()}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def _instrument_streamlit():
+    # st.plotly_chart is where figures are serialized to JSON for the browser
+    import streamlit as st  # type: ignore
+    if not getattr(st.plotly_chart, "_traced", False):
+        st.plotly_chart = traced("streamlit.plotly_chart")(st.plotly_chart)
+        st.plotly_chart._traced = True
+
+
+def start():
+    # Called once per process from app.py; Streamlit reruns the script, so this is guarded
+    global _started
+    if not ENABLED:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    _instrument_streamlit()
+    if PORT:
+        try:
+            _serve(PORT)
+        except OSError:
+            pass  # another process already serves the port
+    if LOG_PATH:
+        threading.Thread(target=_write_log, args=(LOG_PATH, LOG_INTERVAL), name="tracing-log", daemon=True).start()
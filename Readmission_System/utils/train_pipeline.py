@@ -0,0 +1,206 @@
+# utils/train_pipeline.py
+# Rebuilds the Top 10 and hypertuned models from the cleaned dataset with
+# successive-halving search (same split and scoring as Model_Building.ipynb):
+#   python -m utils.train_pipeline --targets all --workers 8
+#   python -m utils.train_pipeline --targets lightgbm_top10 --n-candidates 24
+#
+# Each target writes the model .pkl, a metrics .pkl in EvaluationMetrics/ (the
+# format the comparison and evaluation pages read) and a native artifact.
+import argparse
+import os
+import platform
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from scipy.stats import randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold
+
+from utils.artifacts import export_artifact
+from utils.binary_metrics import evaluate_scores
+from utils.dataset import DATA_PATH, RANDOM_STATE, TOP10_FEATURES, holdout_split, load_dataset
+from utils.score_cache import cache_key
+
+FOLDS_DIR = ".cache/cv_folds"
+CV_FOLDS = 5
+N_CANDIDATES = 48
+HALVING_FACTOR = 3
+MAX_TREES = 300
+
+
+# ---------------------- Search Spaces ---------------------- #
+# Same ranges as the notebook's random searches, minus the tree count: that is the
+# halving budget (early rounds fit few trees, survivors get up to MAX_TREES).
+# Every estimator is single-threaded so the search itself can use every core.
+def _lightgbm():
+    from lightgbm import LGBMClassifier
+    return LGBMClassifier(random_state=RANDOM_STATE, n_jobs=1, verbose=-1), "n_estimators", {
+        "num_leaves": randint(20, 60),
+        "max_depth": randint(-1, 15),
+        "learning_rate": uniform(0.01, 0.2),
+        "min_child_samples": randint(10, 30),
+        "subsample": uniform(0.7, 0.3),
+        "colsample_bytree": uniform(0.7, 0.3),
+    }
+
+
+def _catboost():
+    from catboost import CatBoostClassifier
+    return CatBoostClassifier(verbose=0, random_state=RANDOM_STATE, thread_count=1), "iterations", {
+        "depth": randint(4, 10),
+        "learning_rate": uniform(0.01, 0.1),
+        "l2_leaf_reg": uniform(1, 5),
+    }
+
+
+def _xgboost():
+    from xgboost import XGBClassifier
+    return XGBClassifier(eval_metric="logloss", random_state=RANDOM_STATE, n_jobs=1), "n_estimators", {
+        "max_depth": randint(3, 8),
+        "learning_rate": uniform(0.01, 0.2),
+        "subsample": uniform(0.7, 0.3),
+        "colsample_bytree": uniform(0.7, 0.3),
+        "gamma": uniform(0, 1),
+    }
+
+
+def _gradientboosting():
+    from sklearn.ensemble import GradientBoostingClassifier
+    return GradientBoostingClassifier(random_state=RANDOM_STATE), "n_estimators", {
+        "max_depth": randint(3, 6),
+        "learning_rate": uniform(0.01, 0.2),
+        "subsample": uniform(0.7, 0.3),
+    }
+
+
+TARGETS = {
+    "lightgbm_top10": (_lightgbm, TOP10_FEATURES, "Top10Model/lightgbm_top10_halvingsearch.pkl",
+                       "EvaluationMetrics/Lightgbm_Top10_Halvingsearch_Metrics.pkl"),
+    "gradientboosting_top10": (_gradientboosting, TOP10_FEATURES, "Top10Model/gradientboosting_top10_halvingsearch.pkl",
+                               "EvaluationMetrics/GradientBoosting_Top10_Halvingsearch_Metrics.pkl"),
+    "lightgbm": (_lightgbm, None, "HypertunedModels/Lightgbm_Halvingsearch.pkl",
+                 "EvaluationMetrics/Lightgbm_Halvingsearch_Metrics.pkl"),
+    "catboost": (_catboost, None, "HypertunedModels/CatBoost_Halvingsearch.pkl",
+                 "EvaluationMetrics/CatBoost_Halvingsearch_Metrics.pkl"),
+    "xgboost": (_xgboost, None, "HypertunedModels/XGBoost_Halvingsearch.pkl",
+                "EvaluationMetrics/XGBoost_Halvingsearch_Metrics.pkl"),
+    "gradientboosting": (_gradientboosting, None, "HypertunedModels/GradientBoosting_Halvingsearch.pkl",
+                         "EvaluationMetrics/GradientBoosting_Halvingsearch_Metrics.pkl"),
+}
+
+
+# ---------------------- Cached CV Folds ---------------------- #
+def cv_folds(y_train, data_path=DATA_PATH, n_splits=CV_FOLDS):
+    # Fold indices depend only on the dataset version, so every target reuses them
+    os.makedirs(FOLDS_DIR, exist_ok=True)
+    key = cache_key(data_path, data_path)
+    path = os.path.join(FOLDS_DIR, f"{key}-k{n_splits}.npz")
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return [(cached[f"train_{i}"], cached[f"test_{i}"]) for i in range(n_splits)]
+
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    folds = list(splitter.split(np.zeros(len(y_train)), y_train))
+    arrays = {}
+    for i, (train_idx, test_idx) in enumerate(folds):
+        arrays[f"train_{i}"], arrays[f"test_{i}"] = train_idx, test_idx
+    np.savez(path, **arrays)
+    return folds
+
+
+# ---------------------- Training ---------------------- #
+def _versions():
+    import sklearn
+    versions = {"python": platform.python_version(), "numpy": np.__version__, "scikit-learn": sklearn.__version__}
+    for name in ("lightgbm", "xgboost", "catboost"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def train_target(name, data_path=DATA_PATH, n_candidates=N_CANDIDATES, workers=-1, export=True):
+    factory, features, model_path, metrics_path = TARGETS[name]
+    started = time.perf_counter()
+
+    X_train, X_test, y_train, y_test = holdout_split(load_dataset(data_path))
+    if features is not None:
+        X_train, X_test = X_train[features], X_test[features]
+    folds = cv_folds(y_train.to_numpy(), data_path)
+
+    # The budget is the tree count rather than rows, so the cached folds stay valid in every round
+    estimator, resource, space = factory()
+    search = HalvingRandomSearchCV(
+        estimator, space,
+        n_candidates=n_candidates,
+        factor=HALVING_FACTOR,
+        resource=resource,
+        max_resources=MAX_TREES,
+        min_resources="exhaust",
+        cv=folds,
+        scoring="roc_auc",
+        n_jobs=workers,
+        random_state=RANDOM_STATE,
+        refit=True,
+    )
+    search.fit(X_train, y_train)
+    model = search.best_estimator_
+
+    scores = model.predict_proba(X_test)[:, 1]
+    metrics = evaluate_scores(y_test.to_numpy(), scores)
+    metrics.update({
+        "model_name": os.path.splitext(os.path.basename(model_path))[0],
+        "model_path": model_path,
+        "best_params": search.best_params_,
+        "cv_roc_auc": float(search.best_score_),
+        "search": {
+            "method": "HalvingRandomSearchCV",
+            "n_candidates_per_round": [int(n) for n in search.n_candidates_],
+            "resource": resource,
+            "resource_per_round": [int(n) for n in search.n_resources_],
+            "cv_folds": len(folds),
+        },
+        "features": list(X_train.columns),
+        "data_path": data_path,
+        "data_key": cache_key(data_path, data_path),
+        "versions": _versions(),
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seconds": time.perf_counter() - started,
+    })
+
+    for path in (model_path, metrics_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(model, model_path)
+    joblib.dump(metrics, metrics_path)
+    if export:
+        export_artifact(model_path)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain models with successive-halving hyperparameter search")
+    parser.add_argument("--targets", nargs="+", default=["all"], help=f"Any of {', '.join(TARGETS)}, or 'all'")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--n-candidates", type=int, default=N_CANDIDATES, help="Configurations in the first round")
+    parser.add_argument("--workers", type=int, default=-1, help="Parallel fits (default: all cores)")
+    parser.add_argument("--no-export", action="store_true", help="Skip writing the native artifact")
+    args = parser.parse_args()
+
+    targets = list(TARGETS) if args.targets == ["all"] else args.targets
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    print(f"{'target':<24}{'CV AUC':>8}{'test AUC':>10}{'rounds':>26}{'sec':>8}")
+    for name in targets:
+        metrics = train_target(name, args.data, args.n_candidates, args.workers, not args.no_export)
+        rounds = " -> ".join(str(n) for n in metrics["search"]["n_candidates_per_round"])
+        print(f"{name:<24}{metrics['cv_roc_auc']:>8.4f}{metrics['roc_auc']:>10.4f}{rounds:>26}{metrics['seconds']:>8.0f}")
+        print(f"{'':<24}-> {TARGETS[name][2]}, {TARGETS[name][3]}")
+
+
+if __name__ == "__main__":
+    main()
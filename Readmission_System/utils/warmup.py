@@ -0,0 +1,193 @@
+# utils/warmup.py
+# Loads everything the first request would otherwise pay for (dataset, its
+# statistics, the metrics catalog, models, SHAP explainers, drift reference)
+# on background threads as soon as the server process starts. is_ready() turns
+# true only once every task has finished without error; status() reports
+# per-task timings and the time-to-ready, which is also written to
+# .cache/ready.json for deploy health checks.
+#
+# Extra models: WARMUP_MODELS="HypertunedModels/Lightgbm_Randomsearch.pkl,BaseModels/catboost.pkl"
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from utils.model_loader import DEFAULT_MODEL_PATH, get_model, model_version
+
+READY_PATH = ".cache/ready.json"
+ENABLED = os.getenv("WARMUP", "1").lower() not in ("0", "false", "no")
+MAX_THREADS = int(os.getenv("WARMUP_THREADS", "4"))
+
+_lock = threading.Lock()
+_tasks = {}
+_state = {"started": None, "ready_after": None}
+
+
+# ---------------------- Tasks ---------------------- #
+def _dataset():
+    from utils.dataset import load_dataset
+    load_dataset()
+
+
+def _statistics():
+    from utils.dataset import dataset_statistics
+    dataset_statistics()
+
+
+def _catalog():
+    from utils.metrics_catalog import load_catalog
+    load_catalog()
+
+
+def _model_and_explainer(path, explain):
+    def run():
+        model = get_model(path)
+        # Hashed once here so the first audited prediction doesn't pay for it
+        model_version(path)
+        if explain:
+            from utils.shap_plot import get_explainer
+            get_explainer(model)
+    return run
+
+
+def _cohort_scores():
+    from utils.score_cache import cohort_scores
+    cohort_scores()
+
+
+def _similar_patients():
+    from utils.similar_patients import get_index
+    get_index()
+
+
+def _global_shap():
+    from utils.global_shap import load_global_shap
+    load_global_shap()
+
+
+def _cascade():
+    from utils.cascade import load_cascade
+    load_cascade()
+
+
+def _drift_reference():
+    from utils.drift_monitor import load_reference
+    load_reference()
+
+
+def configured_tasks():
+    extra = [p.strip() for p in os.getenv("WARMUP_MODELS", "").split(",") if p.strip()]
+    tasks = {
+        "dataset": _dataset,
+        "dataset statistics": _statistics,
+        "metrics catalog": _catalog,
+        # The form explains predictions of the default model, so its explainer is built too
+        f"model + explainer: {DEFAULT_MODEL_PATH}": _model_and_explainer(DEFAULT_MODEL_PATH, True),
+        "cohort risk scores": _cohort_scores,
+        "similar-patient index": _similar_patients,
+        "global SHAP summary": _global_shap,
+        "cascade": _cascade,
+        "drift reference": _drift_reference,
+    }
+    for path in extra:
+        tasks[f"model: {path}"] = _model_and_explainer(path, False)
+    return tasks
+
+
+# ---------------------- Runner ---------------------- #
+def _run(name, fn):
+    started = time.perf_counter()
+    with _lock:
+        _tasks[name].update(state="running")
+    try:
+        fn()
+        result = {"state": "done"}
+    except Exception as e:
+        result = {"state": "failed", "error": str(e)}
+    result["seconds"] = time.perf_counter() - started
+    with _lock:
+        _tasks[name].update(result)
+        finished = all(t["state"] in ("done", "failed") for t in _tasks.values())
+        if finished and _state["ready_after"] is None:
+            _state["ready_after"] = time.perf_counter() - _state["started"]
+            _write_ready_file()
+
+
+def _write_ready_file():
+    # Called with _lock held
+    payload = {
+        "ready": all(t["state"] == "done" for t in _tasks.values()),
+        "time_to_ready": _state["ready_after"],
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "tasks": {name: dict(task) for name, task in _tasks.items()},
+    }
+    try:
+        os.makedirs(os.path.dirname(READY_PATH), exist_ok=True)
+        tmp_path = f"{READY_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, READY_PATH)
+    except OSError:
+        pass
+
+
+def start(tasks=None):
+    # Idempotent: Streamlit reruns app.py on every interaction, the warm-up runs once per process
+    with _lock:
+        if _state["started"] is not None or not ENABLED:
+            return False
+        _state["started"] = time.perf_counter()
+        tasks = tasks or configured_tasks()
+        for name in tasks:
+            _tasks[name] = {"state": "queued", "seconds": None}
+    pool = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="warmup")
+    for name, fn in tasks.items():
+        pool.submit(_run, name, fn)
+    pool.shutdown(wait=False)
+    return True
+
+
+def is_ready():
+    with _lock:
+        return bool(_tasks) and all(t["state"] == "done" for t in _tasks.values())
+
+
+def status():
+    with _lock:
+        return {
+            "enabled": ENABLED,
+            "ready": bool(_tasks) and all(t["state"] == "done" for t in _tasks.values()),
+            "finished": _state["ready_after"] is not None,
+            "time_to_ready": _state["ready_after"],
+            "elapsed": time.perf_counter() - _state["started"] if _state["started"] else None,
+            "tasks": {name: dict(task) for name, task in _tasks.items()},
+        }
+
+
+def wait(timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        current = status()
+        if current["finished"] or not current["tasks"]:
+            return current["ready"]
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+
+
+def main():
+    # python -m utils.warmup: run the warm-up in the foreground and print what it took
+    start()
+    wait()
+    current = status()
+    for name, task in current["tasks"].items():
+        seconds = f"{task['seconds']:.2f}s" if task["seconds"] is not None else "-"
+        print(f"{task['state']:<8}{seconds:>8}  {name}{'  ' + task['error'] if task.get('error') else ''}")
+    print(f"ready={current['ready']} time_to_ready={current['time_to_ready']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()